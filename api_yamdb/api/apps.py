@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        # сигналы словарей slug: версия тега меняется при записи жанров
+        # и категорий из любого кода, а не только из запросов к API
+        from . import slugs  # noqa: F401
@@ -0,0 +1,166 @@
+import asyncio
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.urls import Resolver404, resolve
+
+from api_yamdb.settings import ASGI_READ_THREADS, ASGI_WRITE_THREADS
+
+# маршруты только для чтения, у которых свой пул потоков
+READ_ROUTES = frozenset((
+    'titles-list',
+    'titles-detail',
+    'reviews-list',
+    'comments-list',
+    'genres-list',
+    'categories-list',
+))
+SAFE_METHODS = ('GET', 'HEAD')
+# сколько частей тела ответа поток может отдать вперёд event loop
+RESPONSE_QUEUE_SIZE = 8
+
+
+async def read_body(receive):
+    """Собирает тело запроса, None — клиент отключился."""
+    body = BytesIO()
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        body.write(message.get('body', b''))
+        if not message.get('more_body', False):
+            return body.getvalue()
+
+
+def build_environ(scope, body):
+    """Переводит HTTP scope ASGI в окружение WSGI."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'].encode().decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'REMOTE_ADDR': client[0],
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        value = value.decode('latin-1')
+        if name in environ:
+            value = f'{environ[name]},{value}'
+        environ[name] = value
+    return environ
+
+
+class ASGIHandler:
+    """
+    ASGI-приложение для Django 2.2, в которой своего ASGI ещё нет.
+
+    Event loop принимает соединения и читает запросы, а Django с теми же
+    middleware, правами, фильтрами и пагинацией работает в ограниченных
+    пулах потоков: чтение из READ_ROUTES — в своём пуле, чтобы медленные
+    записи не занимали потоки списков. Тело ответа передаётся в event
+    loop по частям, поэтому потоковые ответы не собираются в памяти.
+    """
+
+    def __init__(self):
+        self.wsgi = WSGIHandler()
+        self.read_pool = ThreadPoolExecutor(
+            ASGI_READ_THREADS, thread_name_prefix='asgi-read')
+        self.write_pool = ThreadPoolExecutor(
+            ASGI_WRITE_THREADS, thread_name_prefix='asgi-write')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(f'Соединения {scope["type"]} не поддерживаются')
+        body = await read_body(receive)
+        if body is None:
+            return
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(RESPONSE_QUEUE_SIZE)
+        future = loop.run_in_executor(
+            self.get_pool(scope), self.run_wsgi,
+            build_environ(scope, body), loop, queue,
+        )
+        message = None
+        try:
+            while True:
+                message = await queue.get()
+                if message is None:
+                    break
+                await send(message)
+        finally:
+            # поток не должен остаться ждать места в очереди
+            while message is not None:
+                message = await queue.get()
+            await future
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.read_pool.shutdown()
+                self.write_pool.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def get_pool(self, scope):
+        if scope['method'] not in SAFE_METHODS:
+            return self.write_pool
+        try:
+            match = resolve(scope['path'])
+        except Resolver404:
+            return self.write_pool
+        if match.url_name in READ_ROUTES:
+            return self.read_pool
+        return self.write_pool
+
+    def run_wsgi(self, environ, loop, queue):
+        """
+        Выполняется в потоке пула: запрос, чтение тела ответа и его
+        закрытие идут в одном потоке, как того требуют соединения с базой.
+        """
+        def put(message):
+            asyncio.run_coroutine_threadsafe(queue.put(message), loop).result()
+
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in headers
+            ]
+
+        try:
+            result = self.wsgi(environ, start_response)
+            try:
+                put({'type': 'http.response.start', **started})
+                for chunk in result:
+                    if chunk:
+                        put({'type': 'http.response.body', 'body': chunk,
+                             'more_body': True})
+                put({'type': 'http.response.body', 'body': b''})
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+        finally:
+            put(None)
@@ -0,0 +1,133 @@
+import threading
+import time
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.utils import datetime_to_epoch
+
+from api_yamdb.settings import USER_CLAIMS_TTL
+from reviews.models import User
+
+USER_CLAIMS = ('username', 'role', 'is_superuser')
+
+
+def user_claims(user):
+    return {claim: getattr(user, claim) for claim in USER_CLAIMS}
+
+
+class RoleAccessToken(AccessToken):
+    """Access-токен, в котором хранятся имя, роль и статус суперпользователя"""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['iat'] = datetime_to_epoch(token.current_time)
+        token.payload.update(user_claims(user))
+        return token
+
+
+class UserClaimsCache:
+    """
+    Кеш данных пользователей в памяти процесса,
+    записи живут не дольше ttl секунд
+    """
+    max_size = 10000
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        """
+        :return: (найдена ли запись, данные пользователя или None,
+                  если пользователь удалён)
+        """
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] < time.monotonic():
+            return False, None
+        return True, entry[1]
+
+    def set(self, user_id, claims):
+        with self._lock:
+            if len(self._entries) >= self.max_size:
+                self._prune()
+            self._entries[user_id] = (time.monotonic() + self.ttl, claims)
+
+    def update_user(self, user):
+        self.set(user.pk, user_claims(user))
+
+    def delete_user(self, user):
+        self.set(user.pk, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _prune(self):
+        now = time.monotonic()
+        self._entries = {
+            user_id: entry for user_id, entry in self._entries.items()
+            if entry[0] >= now
+        }
+
+
+user_claims_cache = UserClaimsCache(USER_CLAIMS_TTL)
+
+
+@receiver(post_save, sender=User)
+def refresh_user_claims(sender, instance, **kwargs):
+    if instance.is_active:
+        user_claims_cache.update_user(instance)
+    else:
+        user_claims_cache.delete_user(instance)
+
+
+@receiver(post_delete, sender=User)
+def forget_user_claims(sender, instance, **kwargs):
+    user_claims_cache.delete_user(instance)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Собирает пользователя из данных токена без запроса к базе.
+    Данные токенов старше USER_CLAIMS_TTL перечитываются из базы
+    не чаще раза в USER_CLAIMS_TTL секунд.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            raise AuthenticationFailed(
+                _('Token contained no recognizable user identification'),
+                code='token_not_valid',
+            )
+        claims = self.get_claims(validated_token, user_id)
+        if claims is None:
+            raise AuthenticationFailed(_('User not found'),
+                                       code='user_not_found')
+        return User(id=user_id, **claims)
+
+    def get_claims(self, validated_token, user_id):
+        found, claims = user_claims_cache.get(user_id)
+        if found:
+            return claims
+        if self.is_fresh(validated_token):
+            return {claim: validated_token[claim] for claim in USER_CLAIMS}
+        claims = User.objects.filter(
+            pk=user_id, is_active=True).values(*USER_CLAIMS).first()
+        user_claims_cache.set(user_id, claims)
+        return claims
+
+    @staticmethod
+    def is_fresh(validated_token):
+        issued_at = validated_token.get('iat')
+        if issued_at is None or any(
+                claim not in validated_token for claim in USER_CLAIMS):
+            return False
+        return time.time() - issued_at < USER_CLAIMS_TTL
@@ -0,0 +1,191 @@
+import hashlib
+import threading
+import time
+from collections import defaultdict
+
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, router
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from api_yamdb.settings import API_CACHE
+from reviews.models import CacheTag
+
+TITLES = 'titles'
+TITLES_LIST = 'titles-list'
+GENRES = 'genres'
+CATEGORIES = 'categories'
+SIMILAR = 'similar'
+
+
+def title_tag(title_id):
+    return f'title:{title_id}'
+
+
+def get_cache():
+    return caches[API_CACHE]
+
+
+class CacheStats:
+    """Счётчики попаданий и промахов кеша ответов по эндпоинтам"""
+
+    def __init__(self):
+        self._counters = defaultdict(lambda: {'hits': 0, 'misses': 0})
+        self._lock = threading.Lock()
+
+    def hit(self, endpoint):
+        with self._lock:
+            self._counters[endpoint]['hits'] += 1
+
+    def miss(self, endpoint):
+        with self._lock:
+            self._counters[endpoint]['misses'] += 1
+
+    def as_dict(self):
+        with self._lock:
+            return {endpoint: dict(counters)
+                    for endpoint, counters in self._counters.items()}
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+
+
+cache_stats = CacheStats()
+
+
+def tag_versions(tags, using=None):
+    """
+    Возвращает текущие версии тегов из базы using, по умолчанию — из
+    той, с которой читает запрос: версии реплики соответствуют её
+    данным. Строки тегов создаёт только invalidate, чтение ничего не
+    пишет: тег без строки ещё не менялся, его версия — 0.
+    """
+    db = using or router.db_for_read(CacheTag) or DEFAULT_DB_ALIAS
+    versions = dict(CacheTag.objects.using(db).filter(name__in=tags)
+                    .values_list('name', 'version'))
+    return [str(versions.get(tag, 0)) for tag in tags]
+
+
+def invalidate(*tags):
+    """
+    Сбрасывает ответы с этими тегами. Новая версия пишется в текущую
+    транзакцию и становится видна всем процессам вместе с данными.
+    """
+    db = router.db_for_write(CacheTag)
+    version = time.time_ns()
+    # версия только растёт, даже если часы процесса отстают
+    updated = CacheTag.objects.using(db).filter(name__in=tags).update(
+        version=Greatest(F('version') + 1, Value(version)))
+    if updated < len(set(tags)):
+        CacheTag.objects.using(db).bulk_create(
+            [CacheTag(name=tag, version=version) for tag in set(tags)],
+            ignore_conflicts=True,
+        )
+
+
+def response_digest(request, versions):
+    role = request.user.role if request.user.is_authenticated else 'anonymous'
+    raw = '|'.join([
+        role,
+        request.accepted_renderer.format,
+        request.get_full_path(),
+        *versions,
+    ])
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def last_modified(versions):
+    """
+    Версии тегов — время изменения в наносекундах. None, если ни один
+    тег ещё не менялся и время изменения неизвестно.
+    """
+    return max(map(int, versions), default=0) // 10 ** 9 or None
+
+
+class CachedResponseMixin:
+    """
+    Кеширует ответы list с ключом по пути, параметрам запроса
+    и роли пользователя. Запись через вьюсет сбрасывает теги
+    из get_invalidated_tags.
+
+    Версии тегов служат и валидаторами: ETag — это хеш ключа ответа,
+    Last-Modified — время последнего изменения тегов. Условный запрос
+    с актуальными значениями получает 304 после одного запроса версий,
+    без запроса списка и сериализации.
+    """
+    cache_tags = ()
+
+    def get_cache_tags(self):
+        return self.cache_tags
+
+    def get_invalidated_tags(self, instance):
+        return self.cache_tags
+
+    def list(self, request, *args, **kwargs):
+        return self.cached(super().list, request, *args, **kwargs)
+
+    def cached(self, handler, request, *args, **kwargs):
+        endpoint = f'{self.basename}-{self.action}'
+        # версии читаются до данных и из той же базы, поэтому ответ
+        # отстающей реплики не сохранится под версией после записи
+        db = router.db_for_read(CacheTag) or DEFAULT_DB_ALIAS
+        versions = tag_versions(self.get_cache_tags(), using=db)
+        digest = response_digest(request, versions)
+        self._validators = (f'"{digest}"', last_modified(versions))
+        not_modified = get_conditional_response(
+            request, etag=self._validators[0],
+            last_modified=self._validators[1],
+        )
+        if not_modified is not None:
+            return not_modified
+        key = f'response:{db}:{digest}'
+        cached = get_cache().get(key)
+        if cached is not None:
+            cache_stats.hit(endpoint)
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+            response['X-Cache'] = 'HIT'
+            return response
+        cache_stats.miss(endpoint)
+        self._response_cache_key = key
+        return handler(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs)
+        key = getattr(self, '_response_cache_key', None)
+        if key is not None and response.status_code == 200:
+            response.render()
+            get_cache().set(key, (response.content, response['Content-Type']))
+            response['X-Cache'] = 'MISS'
+        validators = getattr(self, '_validators', None)
+        if validators is not None and response.status_code in (200, 304):
+            response['ETag'] = validators[0]
+            if validators[1] is not None:
+                response['Last-Modified'] = http_date(validators[1])
+        return response
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        invalidate(*self.get_invalidated_tags(serializer.instance))
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        invalidate(*self.get_invalidated_tags(serializer.instance))
+
+    def perform_destroy(self, instance):
+        tags = self.get_invalidated_tags(instance)
+        super().perform_destroy(instance)
+        invalidate(*tags)
+
+    def perform_bulk_save(self, serializers, update):
+        instances = super().perform_bulk_save(serializers, update)
+        tags = set()
+        for instance in instances:
+            tags.update(self.get_invalidated_tags(instance))
+        invalidate(*tags)
+        return instances
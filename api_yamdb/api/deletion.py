@@ -0,0 +1,202 @@
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from reviews.models import (Category, Comments, DeletionJob, Genre, Review,
+                            Title, User, UserWriteMark, rating_changes)
+from reviews.search import index_titles, remove_titles
+
+from .cache import TITLES, TITLES_LIST, invalidate
+
+GenreTitle = Title.genre.through
+
+# комментарии без автора или с автором, который не ждёт удаления
+VISIBLE_COMMENTS = Q(author__isnull=True) | Q(author__is_active=True)
+
+
+def tombstone(obj):
+    # ~ недопустим в slug и имени пользователя, метка не совпадёт
+    # со значением нового объекта
+    return f'~{obj.pk}'
+
+
+def discount_reviews(author):
+    """
+    Вычитает отзывы автора из счётчиков произведений одним UPDATE на
+    каждую оценку: у автора не больше одного отзыва на произведение.
+    """
+    reviews = Review.objects.filter(author=author)
+    for score in reviews.order_by().values_list('score', flat=True).distinct():
+        Title._base_manager.filter(
+            reviews__author=author, reviews__score=score,
+        ).update(**rating_changes(
+            -(score or 0), 0 if score is None else -1, -1,
+            {} if score is None else {score: -1},
+        ))
+    invalidate(TITLES)
+
+
+def delete_rows(batch):
+    batch.delete()
+
+
+def unlink_genre(batch):
+    title_ids = list(batch.values_list('title_id', flat=True))
+    batch.delete()
+    index_titles(title_ids)
+    invalidate(TITLES_LIST)
+
+
+def clear_category(batch):
+    title_ids = list(batch.values_list('id', flat=True))
+    batch.update(category=None)
+    index_titles(title_ids)
+    invalidate(TITLES_LIST)
+
+
+class Deletion:
+    """
+    Удаление объекта по стадиям: стадия обрабатывает строки своего
+    queryset пачками по id, после всех стадий удаляется сам объект.
+    """
+    model = None
+    kind = None
+
+    def __init__(self, object_id):
+        self.object_id = object_id
+
+    def stages(self):
+        """Пары (queryset, обработчик пачки строк этого queryset)."""
+        return ()
+
+    def count(self):
+        """Сколько строк обработают стадии, включая сам объект."""
+        return sum(queryset.count() for queryset, _ in self.stages()) + 1
+
+    def process_batch(self, batch_size):
+        """
+        Обрабатывает до batch_size строк первой незавершённой стадии,
+        :return: сколько строк обработано, 0 — все стадии пройдены
+        """
+        for queryset, handler in self.stages():
+            ids = list(queryset.order_by('id')
+                       .values_list('id', flat=True)[:batch_size])
+            if ids:
+                handler(queryset.filter(id__in=ids))
+                return len(ids)
+        return 0
+
+    def finish(self):
+        self.model._base_manager.filter(pk=self.object_id).delete()
+
+
+class TitleDeletion(Deletion):
+    model = Title
+    kind = DeletionJob.TITLE
+
+    def stages(self):
+        return (
+            (Comments.objects.filter(review__title_id=self.object_id),
+             delete_rows),
+            (Review.objects.filter(title_id=self.object_id), delete_rows),
+            (GenreTitle.objects.filter(title_id=self.object_id),
+             delete_rows),
+        )
+
+    def finish(self):
+        remove_titles([self.object_id])
+        super().finish()
+
+
+class GenreDeletion(Deletion):
+    model = Genre
+    kind = DeletionJob.GENRE
+
+    def stages(self):
+        return (
+            (GenreTitle.objects.filter(genre_id=self.object_id),
+             unlink_genre),
+        )
+
+
+class CategoryDeletion(Deletion):
+    model = Category
+    kind = DeletionJob.CATEGORY
+
+    def stages(self):
+        return (
+            (Title._base_manager.filter(category_id=self.object_id),
+             clear_category),
+        )
+
+
+class UserDeletion(Deletion):
+    model = User
+    kind = DeletionJob.USER
+
+    def stages(self):
+        return (
+            (Comments.objects.filter(author_id=self.object_id), delete_rows),
+            (Comments.objects.filter(review__author_id=self.object_id),
+             delete_rows),
+            # из рейтинга отзывы вычтены при постановке в очередь
+            (Review.objects.filter(author_id=self.object_id), delete_rows),
+        )
+
+    def finish(self):
+        UserWriteMark.objects.filter(user_id=self.object_id).delete()
+        super().finish()
+
+
+DELETIONS = {
+    deletion.kind: deletion
+    for deletion in (TitleDeletion, GenreDeletion, CategoryDeletion,
+                     UserDeletion)
+}
+KINDS = {deletion.model: kind for kind, deletion in DELETIONS.items()}
+
+
+@transaction.atomic
+def schedule_deletion(obj):
+    """
+    Скрывает объект и ставит его удаление в очередь DeletionJob.
+    Уникальные slug, имя и почта освобождаются сразу, отзывы
+    пользователя сразу перестают учитываться в рейтинге.
+    """
+    if isinstance(obj, User):
+        obj.is_active = False
+        obj.username = tombstone(obj)
+        obj.email = f'{tombstone(obj)}@deleted.invalid'
+        obj.save(update_fields=['is_active', 'username', 'email'])
+        # отзывы и комментарии отключённого автора скрыты сразу
+        discount_reviews(obj)
+    else:
+        obj.is_hidden = True
+        fields = ['is_hidden']
+        if isinstance(obj, (Genre, Category)):
+            obj.slug = tombstone(obj)
+            fields.append('slug')
+        obj.save(update_fields=fields)
+    return DeletionJob.objects.create(kind=KINDS[type(obj)],
+                                      object_id=obj.pk)
+
+
+def process_job(job, batch_size):
+    """
+    Обрабатывает очередную пачку строк задания и сохраняет прогресс,
+    последний вызов удаляет сам объект и завершает задание,
+    :return: завершено ли задание
+    """
+    deletion = DELETIONS[job.kind](job.object_id)
+    if job.total is None:
+        job.total = deletion.count()
+        job.save(update_fields=['total'])
+    with transaction.atomic():
+        processed = deletion.process_batch(batch_size)
+        if not processed:
+            deletion.finish()
+            processed = 1
+            job.finished_at = timezone.now()
+        job.processed += processed
+        job.save(update_fields=['processed', 'finished_at'])
+    return job.finished_at is not None
@@ -0,0 +1,207 @@
+import csv
+from collections import defaultdict
+from io import StringIO
+
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import DateTimeField
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from api_yamdb.settings import EXPORT_CHUNK_SIZE
+from reviews.csv_layout import CSV_COLUMNS, format_date
+from reviews.models import Category, Comments, Genre, Review, Title, User
+
+from .deletion import VISIBLE_COMMENTS
+
+GenreTitle = Title.genre.through
+
+# поля модели для каждого файла static/data в порядке CSV_COLUMNS
+CSV_TABLES = {
+    'users.csv': (User, ('id', 'username', 'email', 'role', 'bio',
+                         'first_name', 'last_name')),
+    'category.csv': (Category, ('id', 'name', 'slug')),
+    'genre.csv': (Genre, ('id', 'name', 'slug')),
+    'titles.csv': (Title, ('id', 'name', 'year', 'category_id')),
+    'genre_title.csv': (GenreTitle, ('id', 'title_id', 'genre_id')),
+    'review.csv': (Review, ('id', 'title_id', 'text', 'author_id', 'score',
+                            'pub_date')),
+    'comments.csv': (Comments, ('id', 'review_id', 'text', 'author_id',
+                                'pub_date')),
+}
+# сколько байт копится перед отправкой очередной части ответа
+BUFFER_SIZE = 64 * 1024
+
+
+class NDJSONRenderer(JSONRenderer):
+    """Выгрузка по объекту JSON на строку, ошибки — одной строкой."""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+
+class CSVRenderer(BaseRenderer):
+    """Выгрузка в CSV, ошибки — таблицей с колонками из ключей ответа."""
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not isinstance(data, dict):
+            data = {'detail': data}
+        buffer = StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(data)
+        writer.writerow(data.values())
+        return buffer.getvalue().encode(self.charset)
+
+
+def get_table(request, tables):
+    """Имя таблицы из ?table=, по умолчанию первое из tables."""
+    name = request.query_params.get('table', next(iter(tables)))
+    if name not in tables:
+        raise ValidationError({'table': [
+            f'Допустимые значения: {", ".join(tables)}'
+        ]})
+    return name
+
+
+def keyset_chunks(queryset, size=EXPORT_CHUNK_SIZE):
+    """
+    Пачки строк values() по возрастанию id. Каждая пачка — отдельный
+    запрос по первичному ключу, в памяти держится только одна пачка.
+    """
+    last_id = 0
+    while True:
+        chunk = list(queryset.filter(id__gt=last_id).order_by('id')[:size])
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1]['id']
+
+
+def table_rows(db, filename, condition):
+    """Строки файла static/data, подходящие под условие Q."""
+    model, fields = CSV_TABLES[filename]
+    queryset = model.objects.using(db).filter(condition).values(*fields)
+    for chunk in keyset_chunks(queryset):
+        for row in chunk:
+            yield tuple(
+                format_date(value) if field == 'pub_date'
+                else '' if value is None else value
+                for field, value in row.items()
+            )
+
+
+def title_objects(db):
+    """Произведения с жанрами и категорией, как в списке API."""
+    categories = {
+        row.pop('id'): row
+        for row in Category.objects.using(db).values('id', 'name', 'slug')
+    }
+    genres = {
+        row.pop('id'): row
+        for row in Genre.objects.using(db).values('id', 'name', 'slug')
+    }
+    titles = Title.objects.using(db).values(
+        'id', 'name', 'year', 'rating_avg', 'description', 'category_id')
+    for chunk in keyset_chunks(titles):
+        links = defaultdict(list)
+        for title_id, genre_id in (
+                GenreTitle.objects.using(db)
+                .filter(title_id__in=[row['id'] for row in chunk],
+                        genre__is_hidden=False)
+                .order_by('id').values_list('title_id', 'genre_id')):
+            links[title_id].append(genres[genre_id])
+        for row in chunk:
+            rating = row['rating_avg']
+            yield {
+                'id': row['id'],
+                'name': row['name'],
+                'year': row['year'],
+                'rating': None if rating is None else int(rating),
+                'description': row['description'],
+                'genre': links[row['id']],
+                'category': categories.get(row['category_id']),
+            }
+
+
+def review_objects(db, title_id):
+    """Отзывы произведения, у каждого — список комментариев."""
+    date = DateTimeField()
+    reviews = Review.objects.using(db).filter(
+        title_id=title_id, author__is_active=True).values(
+        'id', 'text', 'author__username', 'score', 'pub_date')
+    for chunk in keyset_chunks(reviews):
+        comments = defaultdict(list)
+        for row in (Comments.objects.using(db)
+                    .filter(VISIBLE_COMMENTS,
+                            review_id__in=[row['id'] for row in chunk])
+                    .order_by('id')
+                    .values('id', 'review_id', 'text', 'author__username',
+                            'pub_date')):
+            comments[row['review_id']].append({
+                'id': row['id'],
+                'text': row['text'],
+                'author': row['author__username'],
+                'pub_date': date.to_representation(row['pub_date']),
+            })
+        for row in chunk:
+            yield {
+                'id': row['id'],
+                'text': row['text'],
+                'author': row['author__username'],
+                'score': row['score'],
+                'pub_date': date.to_representation(row['pub_date']),
+                'comments': comments[row['id']],
+            }
+
+
+def ndjson_chunks(objects):
+    encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    buffer = StringIO()
+    for obj in objects:
+        buffer.write(encoder.encode(obj))
+        buffer.write('\n')
+        if buffer.tell() >= BUFFER_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def csv_chunks(filename, rows):
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS[filename])
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= BUFFER_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def stream_response(request, chunks, filename):
+    response = StreamingHttpResponse(
+        chunks,
+        content_type=(f'{request.accepted_renderer.media_type}; '
+                      'charset=utf-8'),
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def export_csv(request, db, tables):
+    """
+    Таблица static/data из ?table=,
+    :param tables: имя таблицы -> условие отбора строк Q
+    """
+    name = get_table(request, tables)
+    filename = f'{name}.csv'
+    rows = table_rows(db, filename, tables[name])
+    return stream_response(request, csv_chunks(filename, rows), filename)
+
+
+def export_ndjson(request, objects, name):
+    return stream_response(request, ndjson_chunks(objects), f'{name}.ndjson')
@@ -1,24 +1,86 @@
 import django_filters
+from rest_framework.filters import OrderingFilter
 
-from reviews.models import Category, Genre, Title
+from reviews.models import Title
+from reviews.search import search_titles
+
+from .slugs import SlugChoices, category_slugs, genre_slugs
+
+
+class SlugMapFilter(django_filters.MultipleChoiceFilter):
+    """
+    Фильтр по slug связанной модели: допустимые slug и их id берутся
+    из общего словаря slug_map, без запросов к таблице модели.
+    """
+
+    def __init__(self, *args, slug_map, **kwargs):
+        self.slug_map = slug_map
+        super().__init__(*args, **kwargs)
+
+    @property
+    def field(self):
+        if not hasattr(self, '_field'):
+            # choices читаются лениво, при проверке значения фильтра
+            self.extra['choices'] = SlugChoices(
+                self.slug_map, getattr(self.parent, 'request', None))
+        return super().field
+
+    def filter(self, qs, value):
+        if not value:
+            return qs
+        ids = self.slug_map.get_ids(getattr(self.parent, 'request', None))
+        qs = self.get_method(qs)(**{
+            f'{self.field_name}__in': [ids[slug] for slug in value
+                                       if slug in ids],
+        })
+        return qs.distinct() if self.distinct else qs
 
 
 class TitleFilter(django_filters.FilterSet):
-    genre = django_filters.ModelMultipleChoiceFilter(
-        field_name="genre__slug",
-        to_field_name="slug",
-        queryset=Genre.objects.all(),
-    )
-    category = django_filters.ModelMultipleChoiceFilter(
-        field_name="category__slug",
-        to_field_name="slug",
-        queryset=Category.objects.all(),
-    )
+    genre = SlugMapFilter(field_name="genre", slug_map=genre_slugs)
+    category = SlugMapFilter(field_name="category", slug_map=category_slugs,
+                             distinct=False)
     name = django_filters.CharFilter(
         field_name="name", lookup_expr="icontains"
     )
     year = django_filters.NumberFilter(field_name="year")
+    search = django_filters.CharFilter(method="filter_search")
 
     class Meta:
         model = Title
-        fields = ["category", "genre", "name", "year"]
+        fields = ["category", "genre", "name", "year", "search"]
+
+    def filter_search(self, queryset, name, value):
+        return search_titles(queryset, value)
+
+
+class TitleOrderingFilter(OrderingFilter):
+    """
+    Сортировка произведений по сохранённым столбцам с индексами:
+    ?ordering=-rating,year. Одинаковые значения упорядочиваются по id
+    в том же направлении, что и последнее поле, поэтому страница
+    читается одним проходом индекса. Без параметра сохраняется порядок
+    поиска по релевантности, а остальные списки сортируются по id.
+    """
+    ordering_fields = {
+        'rating': 'rating_avg',
+        'year': 'year',
+        'name': 'name',
+        'reviews_count': 'reviews_count',
+    }
+
+    def get_ordering(self, request, queryset, view):
+        params = request.query_params.get(self.ordering_param, '')
+        ordering, seen = [], set()
+        for term in params.split(','):
+            term = term.strip()
+            column = self.ordering_fields.get(term.lstrip('-'))
+            if column is None or column in seen:
+                continue
+            seen.add(column)
+            ordering.append(f'-{column}' if term.startswith('-') else column)
+        if ordering:
+            return [*ordering, '-id' if ordering[-1][0] == '-' else 'id']
+        if queryset.ordered:
+            return None
+        return ['id']
@@ -0,0 +1,163 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from .cache import cache_stats
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+current_request = ContextVar('current_request', default=None)
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин по эндпоинтам"""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(endpoint)
+            if series is None:
+                series = self._series[endpoint] = [
+                    [0] * (len(self.buckets) + 1), 0.0, 0
+                ]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.help_text}',
+                 f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = {endpoint: (list(counts), total, count)
+                      for endpoint, (counts, total, count)
+                      in self._series.items()}
+        for endpoint, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            bounds = [*map(str, self.buckets), '+Inf']
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{endpoint="{endpoint}",'
+                             f'le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{endpoint="{endpoint}"}} {total}')
+            lines.append(f'{self.name}_count{{endpoint="{endpoint}"}} {count}')
+        return lines
+
+
+REQUEST_DURATION = Histogram(
+    'yamdb_request_duration_seconds',
+    'Время обработки запроса', LATENCY_BUCKETS)
+DB_QUERIES = Histogram(
+    'yamdb_db_queries', 'Количество запросов к базе за запрос', QUERY_BUCKETS)
+DB_DURATION = Histogram(
+    'yamdb_db_duration_seconds',
+    'Суммарное время запросов к базе за запрос', LATENCY_BUCKETS)
+SERIALIZATION_DURATION = Histogram(
+    'yamdb_serialization_duration_seconds',
+    'Время сериализации и рендеринга ответа', LATENCY_BUCKETS)
+HISTOGRAMS = (REQUEST_DURATION, DB_QUERIES, DB_DURATION,
+              SERIALIZATION_DURATION)
+
+
+class RequestMetrics:
+    __slots__ = ('queries', 'db_time', 'serialization_time', 'depth')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialization_time = 0.0
+        self.depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обёртка для connection.execute_wrapper"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+    def record(self, endpoint, duration):
+        REQUEST_DURATION.observe(endpoint, duration)
+        DB_QUERIES.observe(endpoint, self.queries)
+        DB_DURATION.observe(endpoint, self.db_time)
+        SERIALIZATION_DURATION.observe(endpoint, self.serialization_time)
+
+
+@contextmanager
+def track_serialization():
+    """
+    Учитывает время сериализации в метриках текущего запроса,
+    вложенные вызовы не суммируются повторно.
+    """
+    metrics = current_request.get()
+    if metrics is None:
+        yield
+        return
+    metrics.depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.depth -= 1
+        if not metrics.depth:
+            metrics.serialization_time += time.perf_counter() - started
+
+
+class TimedModelSerializer(serializers.ModelSerializer):
+    """Учитывает to_representation сериализатора в метриках запроса"""
+
+    def to_representation(self, instance):
+        with track_serialization():
+            return super().to_representation(instance)
+
+
+class MetricsJSONRenderer(JSONRenderer):
+    """JSONRenderer, время работы которого учитывается в метриках"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with track_serialization():
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+
+
+def expose_cache_stats():
+    lines = []
+    stats = sorted(cache_stats.as_dict().items())
+    for name, key in (('yamdb_cache_hits_total', 'hits'),
+                      ('yamdb_cache_misses_total', 'misses')):
+        lines.append(f'# TYPE {name} counter')
+        lines.extend(f'{name}{{endpoint="{endpoint}"}} {counters[key]}'
+                     for endpoint, counters in stats)
+    return lines
+
+
+def expose():
+    """Метрики в текстовом формате Prometheus"""
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.expose())
+    lines.extend(expose_cache_stats())
+    return '\n'.join(lines) + '\n'
+
+
+def reset():
+    for histogram in HISTOGRAMS:
+        histogram.reset()
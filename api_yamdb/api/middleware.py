@@ -0,0 +1,33 @@
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+from .metrics import RequestMetrics, current_request
+
+
+class MetricsMiddleware:
+    """
+    Собирает время обработки, число и время запросов к базе и время
+    сериализации по имени URL, например titles-list или signup.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = current_request.set(metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            current_request.reset(token)
+        duration = time.perf_counter() - started
+        match = request.resolver_match
+        endpoint = match.url_name if match and match.url_name else 'unresolved'
+        metrics.record(endpoint, duration)
+        return response
@@ -0,0 +1,314 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections, router, transaction
+from django.db.models import Exists, OuterRef, prefetch_related_objects
+from django.shortcuts import get_object_or_404
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.relations import SlugRelatedField
+from rest_framework.response import Response
+from rest_framework.validators import UniqueValidator
+
+from api_yamdb.settings import BULK_MAX_ITEMS
+from reviews.models import Review, Title
+
+from .deletion import schedule_deletion
+
+
+class ParentObjectsMixin:
+    """
+    Загружает произведение и отзыв из URL один раз за запрос,
+    результат используют queryset, права доступа и сериализатор.
+    """
+
+    def get_title(self):
+        if not hasattr(self, '_title'):
+            queryset = Title.objects.all()
+            user = self.request.user
+            if self.request.method == 'POST' and user.is_authenticated:
+                queryset = queryset.annotate(user_reviewed=Exists(
+                    Review.objects.filter(title=OuterRef('pk'),
+                                          author_id=user.pk)
+                ))
+            self._title = get_object_or_404(queryset,
+                                            pk=self.kwargs['title_id'])
+        return self._title
+
+    def get_review(self):
+        if not hasattr(self, '_review'):
+            title_id = self.kwargs['title_id']
+            review_id = self.kwargs['review_id']
+            review = (Review.objects.select_related('title')
+                      .filter(pk=review_id, title_id=title_id,
+                              title__is_hidden=False,
+                              author__is_active=True).first())
+            if review is None:
+                title = get_object_or_404(Title, pk=title_id)
+                raise ValidationError(
+                    {'detail': (f'Отзыва с ID {review_id} к произведению '
+                                f'{title} не существует')}
+                )
+            self._review = review
+            self._title = review.title
+        return self._review
+
+
+class DeferredDestroyMixin:
+    """
+    destroy скрывает объект и ставит удаление зависимых строк в очередь
+    команды process_deletions вместо каскада внутри запроса.
+    """
+
+    def perform_destroy(self, instance):
+        schedule_deletion(instance)
+
+
+class ValuesListMixin:
+    """
+    list отдаёт страницу через values_serializer_class: строки values()
+    без экземпляров моделей. Выключается FAST_READ_SERIALIZERS = False.
+    """
+    values_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        if not settings.FAST_READ_SERIALIZERS:
+            return super().list(request, *args, **kwargs)
+        serializer = self.values_serializer_class(
+            context=self.get_serializer_context())
+        queryset = serializer.get_queryset(
+            self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializer.serialize(page))
+        return Response(serializer.serialize(queryset))
+
+
+def insert_objects(model, objects):
+    """
+    bulk_create, после которого у объектов есть id. Базы, которые
+    возвращают id из INSERT, проставляют их сами. SQLite держит
+    блокировку записи от вставки до конца транзакции, а строке без id
+    выдаёт id больше всех существующих, поэтому последние id таблицы
+    после вставки таких объектов принадлежат им. На остальных базах
+    объекты без id сохраняются по одному.
+    """
+    connection = connections[router.db_for_write(model)]
+    generated = [obj for obj in objects if obj.pk is None]
+    if connection.features.can_return_ids_from_bulk_insert or not generated:
+        model.objects.bulk_create(objects)
+        return
+    with transaction.atomic(using=connection.alias):
+        model.objects.bulk_create(
+            [obj for obj in objects if obj.pk is not None])
+        if connection.vendor != 'sqlite':
+            for obj in generated:
+                obj.save(force_insert=True, using=connection.alias)
+            return
+        model.objects.bulk_create(generated)
+        ids = (model._base_manager.using(connection.alias).order_by('-pk')
+               .values_list('pk', flat=True)[:len(generated)])
+        for obj, pk in zip(generated, reversed(ids)):
+            obj.pk = pk
+
+
+class BulkMixin:
+    """
+    POST с JSON-массивом создаёт объекты, PATCH на адрес списка
+    изменяет их, объекты ищутся по bulk_lookup_field. Связанные по
+    slug объекты загружаются одним запросом на всю пачку, запись идёт
+    через bulk_create/bulk_update. Ошибки возвращаются для каждого
+    элемента, корректные элементы сохраняются, а с ?atomic=true
+    любая ошибка отменяет весь запрос.
+    """
+    bulk_lookup_field = 'id'
+
+    def create(self, request, *args, **kwargs):
+        if isinstance(request.data, list):
+            return self.bulk_save(request, update=False)
+        return super().create(request, *args, **kwargs)
+
+    def bulk_update(self, request, *args, **kwargs):
+        return self.bulk_save(request, update=True)
+
+    def bulk_save(self, request, update):
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError({'non_field_errors': [
+                'Ожидается список объектов'
+            ]})
+        if len(items) > BULK_MAX_ITEMS:
+            raise ValidationError({'non_field_errors': [
+                f'Не больше {BULK_MAX_ITEMS} объектов за запрос'
+            ]})
+        model = self.get_queryset().model
+        instances = self.get_bulk_instances(model, items) if update else {}
+        context = self.get_serializer_context()
+        context['related'] = self.get_bulk_related(items)
+        taken = self.get_bulk_taken(model, items)
+        serializers, errors = [], []
+        for index, item in enumerate(items):
+            serializer, item_errors = self.validate_bulk_item(
+                model, item, instances, context, taken, update)
+            if item_errors:
+                errors.append({'index': index, 'errors': item_errors})
+            else:
+                serializers.append(serializer)
+        atomic = request.query_params.get('atomic') in ('1', 'true')
+        if not serializers or errors and atomic:
+            return Response({'results': [], 'errors': errors},
+                            status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            self.perform_bulk_save(serializers, update)
+        if errors:
+            response_status = status.HTTP_207_MULTI_STATUS
+        elif update:
+            response_status = status.HTTP_200_OK
+        else:
+            response_status = status.HTTP_201_CREATED
+        return Response({
+            'results': [serializer.data for serializer in serializers],
+            'errors': errors,
+        }, status=response_status)
+
+    def get_bulk_instances(self, model, items):
+        """Загружает изменяемые объекты одним запросом."""
+        field = model._meta.get_field(self.bulk_lookup_field)
+        keys = set()
+        for item in items:
+            try:
+                keys.add(field.to_python(item.get(self.bulk_lookup_field)))
+            except (AttributeError, DjangoValidationError):
+                continue
+        keys.discard(None)
+        return self.get_queryset().in_bulk(
+            keys, field_name=self.bulk_lookup_field)
+
+    def get_bulk_related(self, items):
+        """
+        Загружает все объекты, на которые элементы ссылаются по slug,
+        одним запросом на модель.
+        """
+        related = {}
+        for name, field in self.get_serializer().fields.items():
+            field = getattr(field, 'child_relation', field)
+            if not isinstance(field, SlugRelatedField) or field.read_only:
+                continue
+            values = set()
+            for item in items:
+                value = item.get(name) if isinstance(item, dict) else None
+                values.update(value if isinstance(value, list) else [value])
+            slugs = {str(value) for value in values
+                     if isinstance(value, (str, int))}
+            key = (field.queryset.model, field.slug_field)
+            related[key] = related.get(key, {})
+            related[key].update(
+                (str(getattr(obj, field.slug_field)), obj)
+                for obj in field.queryset.filter(
+                    **{f'{field.slug_field}__in': slugs})
+            )
+        return related
+
+    def get_bulk_taken(self, model, items):
+        """Занятые значения уникальных полей: {поле: {значение: pk}}."""
+        taken = {}
+        for field in model._meta.fields:
+            if not field.unique or field.primary_key:
+                continue
+            values = {item.get(field.name) for item in items
+                      if isinstance(item, dict)}
+            values = {value for value in values if isinstance(value, str)}
+            taken[field.name] = dict(
+                model.objects.filter(**{f'{field.name}__in': values})
+                .values_list(field.name, 'pk')
+            ) if values else {}
+        return taken
+
+    def validate_bulk_item(self, model, item, instances, context, taken,
+                           update):
+        if not isinstance(item, dict):
+            return None, {'non_field_errors': ['Ожидается объект']}
+        instance = None
+        if update:
+            field = model._meta.get_field(self.bulk_lookup_field)
+            try:
+                key = field.to_python(item.get(self.bulk_lookup_field))
+            except DjangoValidationError:
+                key = None
+            instance = instances.get(key)
+            if instance is None:
+                return None, {self.bulk_lookup_field: ['Объект не найден']}
+            self.check_object_permissions(self.request, instance)
+        serializer = self.get_serializer(
+            instance, data=item, partial=update, context=context)
+        # уникальность проверяется для всей пачки в get_bulk_taken
+        for field in serializer.fields.values():
+            field.validators = [
+                validator for validator in field.validators
+                if not isinstance(validator, UniqueValidator)
+            ]
+        if not serializer.is_valid():
+            return None, serializer.errors
+        owner = instance.pk if instance else object()
+        return serializer, self.check_bulk_unique(serializer, taken, owner)
+
+    def check_bulk_unique(self, serializer, taken, owner):
+        """
+        Значение уникального поля не должно быть занято другим объектом,
+        в том числе другим элементом этой же пачки.
+        """
+        item_errors = {}
+        for name, values in taken.items():
+            value = serializer.validated_data.get(name)
+            if value is not None and values.setdefault(value, owner) != owner:
+                item_errors[name] = [
+                    'Объект с таким значением уже существует'
+                ]
+        return item_errors
+
+    def perform_bulk_save(self, serializers, update):
+        model = self.get_queryset().model
+        many_to_many = {field.name for field in model._meta.many_to_many}
+        objects, relations, fields = [], [], set()
+        for serializer in serializers:
+            data = dict(serializer.validated_data)
+            if update:
+                data.pop(model._meta.pk.name, None)
+            relations.append({name: data.pop(name)
+                              for name in many_to_many & data.keys()})
+            instance = serializer.instance or model()
+            for attr, value in data.items():
+                setattr(instance, attr, value)
+            fields.update(data)
+            objects.append(instance)
+            serializer.instance = instance
+        if not update:
+            insert_objects(model, objects)
+        elif fields:
+            model.objects.bulk_update(objects, fields)
+        for name in many_to_many:
+            self.set_bulk_relations(model, name, objects, relations, update)
+        if update:
+            for instance in objects:
+                instance._prefetched_objects_cache = {}
+        prefetch_related_objects(objects, *many_to_many)
+        return objects
+
+    def set_bulk_relations(self, model, name, objects, relations, update):
+        field = model._meta.get_field(name)
+        through = field.remote_field.through
+        source = through._meta.get_field(field.m2m_field_name())
+        target = through._meta.get_field(field.m2m_reverse_field_name())
+        changed = [(obj, related[name])
+                   for obj, related in zip(objects, relations)
+                   if name in related]
+        if not changed:
+            return
+        if update:
+            through.objects.filter(**{
+                f'{source.attname}__in': [obj.pk for obj, _ in changed]
+            }).delete()
+        through.objects.bulk_create([
+            through(**{source.attname: obj.pk, target.attname: value.pk})
+            for obj, values in changed
+            for value in dict.fromkeys(values)
+        ])
@@ -0,0 +1,146 @@
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from urllib import parse
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Пагинация по ключу (pub_date, id): страница выбирается условием
+    по индексу, без COUNT и OFFSET, поэтому глубина страницы не влияет
+    на время запроса. Страница может состоять из объектов или строк
+    values().
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    invalid_cursor_message = _('Invalid cursor')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        cursor = self.decode_cursor(request)
+        reverse = cursor is not None and cursor[0]
+        if reverse:
+            queryset = queryset.order_by('pub_date', 'id')
+        else:
+            queryset = queryset.order_by('-pub_date', '-id')
+        if cursor is not None:
+            pub_date, pk = cursor[1:]
+            if reverse:
+                queryset = queryset.filter(
+                    Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, id__gt=pk)
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=pk)
+                )
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        self.first, self.last = (
+            (results[0], results[-1]) if results else (None, None)
+        )
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_next_link(self):
+        if not self.has_next or self.last is None:
+            return None
+        return self.encode_cursor(False, self.last)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first is None:
+            return None
+        return self.encode_cursor(True, self.first)
+
+    def encode_cursor(self, reverse, obj):
+        if isinstance(obj, dict):
+            pub_date, pk = obj['pub_date'], obj['id']
+        else:
+            pub_date, pk = obj.pub_date, obj.pk
+        querystring = parse.urlencode({
+            'r': int(reverse),
+            'd': pub_date.isoformat(),
+            'i': pk,
+        })
+        encoded = b64encode(querystring.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param,
+                                   encoded)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            querystring = b64decode(encoded.encode('ascii')).decode('ascii')
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            reverse = bool(int(tokens['r'][0]))
+            pub_date = parse_datetime(tokens['d'][0])
+            pk = int(tokens['i'][0])
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if pub_date is None:
+            raise NotFound(self.invalid_cursor_message)
+        return reverse, pub_date, pk
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.cursor_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Курсор страницы',
+            'schema': {'type': 'string'},
+        }]
+
+
+class FeedPagination(BasePagination):
+    """
+    Постраничная пагинация по умолчанию и пагинация по ключу,
+    если передан ?pagination=cursor или курсор страницы.
+    """
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        keyset = KeysetPagination()
+        if (request.query_params.get(self.mode_query_param) == self.cursor_mode
+                or keyset.cursor_query_param in request.query_params):
+            self.paginator = keyset
+        else:
+            self.paginator = PageNumberPagination()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            *PageNumberPagination().get_schema_operation_parameters(view),
+            *KeysetPagination().get_schema_operation_parameters(view),
+            {
+                'name': self.mode_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'page (по умолчанию) или cursor',
+                'schema': {'type': 'string'},
+            },
+        ]
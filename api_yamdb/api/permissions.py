@@ -38,5 +38,5 @@ class AdminOrModeratorOrRead(permissions.BasePermission):
         return (request.method in SAFE_METHODS
                 or (request.user.is_authenticated
                     and request.user.is_adminisrator
-                    or request.user == obj.author
+                    or request.user.pk == obj.author_id
                     or request.user.is_moderator))
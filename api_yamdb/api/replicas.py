@@ -0,0 +1,101 @@
+import random
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from reviews.models import UserWriteMark
+
+from .authentication import ClaimsJWTAuthentication
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+# реплика, с которой читает текущий запрос, выставляет ReplicaMiddleware
+read_replica = ContextVar('read_replica', default=None)
+
+
+def is_sticky(user_id):
+    """Писал ли пользователь за последние REPLICA_STICKY_SECONDS."""
+    written_after = timezone.now() - timedelta(
+        seconds=settings.REPLICA_STICKY_SECONDS)
+    return UserWriteMark.objects.using('default').filter(
+        user_id=user_id, written_at__gt=written_after).exists()
+
+
+def mark_written(user_id):
+    """Запоминает время записи, строка пользователя перезаписывается."""
+    now = timezone.now()
+    marks = UserWriteMark.objects.using('default')
+    if not marks.filter(user_id=user_id).update(written_at=now):
+        marks.bulk_create([UserWriteMark(user_id=user_id, written_at=now)],
+                          ignore_conflicts=True)
+
+
+def request_user_id(request):
+    """id пользователя из JWT без запроса к базе, None для анонима."""
+    authentication = ClaimsJWTAuthentication()
+    header = authentication.get_header(request)
+    if header is None:
+        return None
+    try:
+        raw_token = authentication.get_raw_token(header)
+        if raw_token is None:
+            return None
+        token = authentication.get_validated_token(raw_token)
+    except AuthenticationFailed:
+        return None
+    return token.get(api_settings.USER_ID_CLAIM)
+
+
+class ReplicaRouter:
+    """
+    Чтение внутри GET и HEAD запросов идёт на выбранную для запроса
+    реплику DATABASE_REPLICAS, любая запись и остальное чтение — на
+    default.
+    """
+
+    def db_for_read(self, model, **hints):
+        return read_replica.get()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaMiddleware:
+    """
+    Отправляет GET и HEAD запросы на одну случайную реплику, все
+    запросы к базе внутри запроса видят одну копию. После записи
+    пользователь REPLICA_STICKY_SECONDS читает с основной базы, чтобы
+    сразу видеть свои изменения, даже если реплика отстаёт. Время
+    последней успешной записи хранится в базе и известно всем
+    процессам, запрос с ошибкой ничего не записал и его не меняет.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        user_id = request_user_id(request)
+        safe = request.method in SAFE_METHODS
+        replica = None
+        if safe and (user_id is None or not is_sticky(user_id)):
+            replica = random.choice(settings.DATABASE_REPLICAS)
+        token = read_replica.set(replica)
+        try:
+            response = self.get_response(request)
+        finally:
+            read_replica.reset(token)
+        if not safe and user_id is not None and response.status_code < 400:
+            mark_written(user_id)
+        return response
@@ -0,0 +1,13 @@
+from rest_framework import routers
+
+
+class BulkRouter(routers.DefaultRouter):
+    """
+    Добавляет PATCH на адрес списка, если у вьюсета есть bulk_update,
+    остальные вьюсеты регистрируются как в DefaultRouter.
+    """
+    routes = [
+        route._replace(mapping={**route.mapping, 'patch': 'bulk_update'})
+        if route.name == '{basename}-list' else route
+        for route in routers.DefaultRouter.routes
+    ]
@@ -1,11 +1,53 @@
 import datetime
+from collections import defaultdict
+from functools import lru_cache
 
+from django.utils import timezone
+from django.utils.encoding import smart_str
 from rest_framework import serializers
 
-from reviews.models import Category, Comments, Genre, Review, Title, User
-
-
-class UserSerializer(serializers.ModelSerializer):
+from reviews.models import (SCORE_FIELDS, Category, Comments, Genre, Review,
+                            SimilarTitle, Title, User)
+
+from .metrics import TimedModelSerializer, track_serialization
+from .slugs import category_slugs, genre_slugs
+
+GenreTitle = Title.genre.through
+
+
+class BulkSlugRelatedField(serializers.SlugRelatedField):
+    """
+    Берёт объект из context['related'], если вьюсет заранее загрузил
+    все объекты, на которые ссылается пачка. С slug_map объект
+    собирается по id из общего словаря slug -> id без запроса к базе,
+    иначе ищется в базе.
+    """
+
+    def __init__(self, slug_map=None, **kwargs):
+        self.slug_map = slug_map
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        related = self.context.get('related', {}).get(
+            (self.queryset.model, self.slug_field))
+        if related is None and self.slug_map is None:
+            return super().to_internal_value(data)
+        if not isinstance(data, (str, int)):
+            self.fail('invalid')
+        slug = str(data)
+        if related is not None:
+            obj = related.get(slug)
+        else:
+            pk = self.slug_map.get_ids(self.context.get('request')).get(slug)
+            obj = None if pk is None else self.queryset.model(
+                pk=pk, **{self.slug_field: slug})
+        if obj is None:
+            self.fail('does_not_exist', slug_name=self.slug_field,
+                      value=smart_str(data))
+        return obj
+
+
+class UserSerializer(TimedModelSerializer):
     class Meta:
         fields = (
             'username', 'email', 'first_name', 'last_name', 'bio', 'role',)
@@ -16,7 +58,7 @@ class UserSerializer(serializers.ModelSerializer):
             return self.username
 
 
-class MeSerializer(serializers.ModelSerializer):
+class MeSerializer(TimedModelSerializer):
     role = serializers.StringRelatedField(read_only=True)
 
     class Meta:
@@ -25,7 +67,7 @@ class MeSerializer(serializers.ModelSerializer):
         model = User
 
 
-class SingUpSerializer(serializers.ModelSerializer):
+class SingUpSerializer(TimedModelSerializer):
     class Meta:
         model = User
         fields = ('username', 'email')
@@ -44,7 +86,7 @@ class TokenSerializer(serializers.Serializer):
     confirmation_code = serializers.CharField(max_length=500)
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(TimedModelSerializer):
     """Сериализатор для жанров"""
     id = serializers.IntegerField(write_only=True, required=False)
 
@@ -56,7 +98,7 @@ class GenreSerializer(serializers.ModelSerializer):
         return f'{self.slug}', f'{self.name}'
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedModelSerializer):
     """Сериализатор для категорий"""
     id = serializers.IntegerField(write_only=True, required=False)
 
@@ -68,12 +110,14 @@ class CategorySerializer(serializers.ModelSerializer):
         return self.name, self.slug
 
 
-class TitlesWriteSerializer(serializers.ModelSerializer):
+class TitlesWriteSerializer(TimedModelSerializer):
     """Сериализатор для записи произведений"""
-    genre = serializers.SlugRelatedField(slug_field='slug', many=True,
-                                         queryset=Genre.objects.all())
-    category = serializers.SlugRelatedField(slug_field='slug',
-                                            queryset=Category.objects.all())
+    genre = BulkSlugRelatedField(slug_field='slug', many=True,
+                                 queryset=Genre.objects.all(),
+                                 slug_map=genre_slugs)
+    category = BulkSlugRelatedField(slug_field='slug',
+                                    queryset=Category.objects.all(),
+                                    slug_map=category_slugs)
 
     class Meta:
         model = Title
@@ -89,22 +133,68 @@ class TitlesWriteSerializer(serializers.ModelSerializer):
         return value
 
 
-class TitlesReadSerializer(serializers.ModelSerializer):
+def stats_requested(context):
+    """Просит ли запрос ?stats=true распределение оценок в ответе."""
+    request = context.get('request')
+    return (request is not None
+            and request.query_params.get('stats') in ('true', '1'))
+
+
+class TitleStatsSerializer(TimedModelSerializer):
+    """Число отзывов, средняя оценка и число отзывов с каждой оценкой"""
+    mean = serializers.FloatField(source='rating_avg', read_only=True)
+    scores = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Title
+        fields = ('reviews_count', 'mean', 'scores')
+
+    def get_scores(self, obj):
+        return [getattr(obj, field) for field in SCORE_FIELDS]
+
+
+class SimilarTitleSerializer(TimedModelSerializer):
+    """Соседнее произведение и его сходство с исходным"""
+    id = serializers.IntegerField(source='neighbor_id')
+    name = serializers.CharField(source='neighbor.name')
+    year = serializers.IntegerField(source='neighbor.year')
+    similarity = serializers.FloatField(source='score')
+
+    class Meta:
+        model = SimilarTitle
+        fields = ('id', 'name', 'year', 'similarity')
+
+
+class TitlesReadSerializer(TimedModelSerializer):
     """Сериализатор для чтения произведений"""
     genre = GenreSerializer(required=False, many=True)
     category = CategorySerializer(required=False)
     rating = serializers.IntegerField(read_only=True, required=False)
+    stats = TitleStatsSerializer(source='*', read_only=True)
 
     class Meta:
         model = Title
         fields = ('id', 'name', 'year', 'rating', 'description',
-                  'genre', 'category')
+                  'genre', 'category', 'stats')
 
     def __str__(self):
         return self.name
 
+    def get_fields(self):
+        fields = super().get_fields()
+        if not stats_requested(self.context):
+            del fields['stats']
+        return fields
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # скрытая категория ждёт удаления, у произведения её уже нет
+        if instance.category is not None and instance.category.is_hidden:
+            data['category'] = None
+        return data
 
-class ReviewSerializer(serializers.ModelSerializer):
+
+class ReviewSerializer(TimedModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True,
@@ -117,20 +207,16 @@ class ReviewSerializer(serializers.ModelSerializer):
         fields = ('id', 'text', 'author', 'score', 'pub_date',)
 
     def validate(self, data):
-        user = self.context['request'].user
-        title_id = self.context['request'].parser_context['kwargs']['title_id']
-        action_method = self.context['request'].method
-
-        reviews = Review.objects.filter(
-            author=user).filter(title_id=title_id).exists()
-        if reviews and action_method == 'POST':
+        request = self.context['request']
+        if (request.method == 'POST'
+                and self.context['view'].get_title().user_reviewed):
             raise serializers.ValidationError(
                 'Нельзя дважды оставить отзыва на одно и тоже произведение'
             )
         return data
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(TimedModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True,
@@ -141,3 +227,135 @@ class CommentSerializer(serializers.ModelSerializer):
         model = Comments
         fields = ('id', 'text', 'author', 'pub_date',)
         read_only_fields = ('author',)
+
+
+@lru_cache(maxsize=4096)
+def day_offset(tz, day):
+    """
+    Смещение и tzinfo часового пояса tz, если они одинаковы весь
+    UTC-день day, иначе None: в этот день был переход на другое время.
+    """
+    start = datetime.datetime.combine(day, datetime.time.min,
+                                      tzinfo=timezone.utc)
+    first = start.astimezone(tz)
+    last = (start + datetime.timedelta(days=1, microseconds=-1)).astimezone(tz)
+    if first.utcoffset() != last.utcoffset():
+        return None
+    return first.utcoffset(), first.tzinfo
+
+
+class ValuesSerializer:
+    """
+    Сериализатор списков только для чтения: ответ собирается из строк
+    values() и словарей связанных объектов без экземпляров моделей и
+    полей DRF. Вывод побайтно совпадает с model_serializer_class.
+    Наследники определяют to_representation(row).
+    """
+    model_serializer_class = None
+    fields = ()
+
+    def __init__(self, context=None):
+        self.context = context or {}
+        self.timezone = timezone.get_current_timezone()
+
+    def format_datetime(self, value):
+        """
+        DateTimeField.to_representation для формата ISO 8601. Даты из
+        базы приходят в UTC, смещение часового пояса берётся из кеша
+        по дням вместо перевода каждой даты.
+        """
+        offset = (day_offset(self.timezone, value.date())
+                  if value.tzinfo is timezone.utc else None)
+        if offset is None:
+            value = value.astimezone(self.timezone).isoformat()
+        else:
+            value = (value + offset[0]).replace(tzinfo=offset[1]).isoformat()
+        if value.endswith('+00:00'):
+            return value[:-6] + 'Z'
+        return value
+
+    def get_queryset(self, queryset):
+        return queryset.prefetch_related(None).values(*self.fields)
+
+    def serialize(self, rows):
+        with track_serialization():
+            rows = list(rows)
+            self.load_related(rows)
+            return [self.to_representation(row) for row in rows]
+
+    def load_related(self, rows):
+        pass
+
+
+class TitlesValuesSerializer(ValuesSerializer):
+    model_serializer_class = TitlesReadSerializer
+    fields = ('id', 'name', 'year', 'rating_sum', 'rating_count',
+              'description', 'category__name', 'category__slug',
+              'category__is_hidden')
+
+    def load_related(self, rows):
+        self.genres = defaultdict(list)
+        links = (GenreTitle.objects
+                 .filter(title_id__in=[row['id'] for row in rows],
+                         genre__is_hidden=False)
+                 .order_by('genre_id')
+                 .values_list('title_id', 'genre__name', 'genre__slug'))
+        for title_id, name, slug in links:
+            self.genres[title_id].append({'name': name, 'slug': slug})
+
+    def get_queryset(self, queryset):
+        queryset = super().get_queryset(queryset)
+        if stats_requested(self.context):
+            queryset = queryset.values(*self.fields, 'reviews_count',
+                                       'rating_avg', *SCORE_FIELDS)
+        return queryset
+
+    def to_representation(self, row):
+        rating_count = row['rating_count']
+        category = (None if row['category__is_hidden'] else
+                    row['category__slug'])
+        data = {
+            'id': row['id'],
+            'name': row['name'],
+            'year': row['year'],
+            'rating': (int(row['rating_sum'] / rating_count)
+                       if rating_count else None),
+            'description': row['description'],
+            'genre': self.genres[row['id']],
+            'category': (None if category is None else
+                         {'name': row['category__name'], 'slug': category}),
+        }
+        if 'rating_avg' in row:
+            data['stats'] = {
+                'reviews_count': row['reviews_count'],
+                'mean': row['rating_avg'],
+                'scores': [row[field] for field in SCORE_FIELDS],
+            }
+        return data
+
+
+class ReviewValuesSerializer(ValuesSerializer):
+    model_serializer_class = ReviewSerializer
+    fields = ('id', 'text', 'author__username', 'score', 'pub_date')
+
+    def to_representation(self, row):
+        return {
+            'id': row['id'],
+            'text': row['text'],
+            'author': row['author__username'],
+            'score': row['score'],
+            'pub_date': self.format_datetime(row['pub_date']),
+        }
+
+
+class CommentValuesSerializer(ValuesSerializer):
+    model_serializer_class = CommentSerializer
+    fields = ('id', 'text', 'author__username', 'pub_date')
+
+    def to_representation(self, row):
+        return {
+            'id': row['id'],
+            'text': row['text'],
+            'author': row['author__username'],
+            'pub_date': self.format_datetime(row['pub_date']),
+        }
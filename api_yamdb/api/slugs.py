@@ -0,0 +1,95 @@
+import threading
+
+from django.db import router
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from reviews.models import CacheTag, Category, Genre
+
+from .cache import CATEGORIES, GENRES, invalidate, tag_versions
+
+
+class SlugMap:
+    """
+    Словарь slug -> id небольшой таблицы, общий для процесса. Его
+    версия сверяется с версией тега в базе, которую запись меняет
+    в своей транзакции, поэтому изменение, сделанное другим процессом,
+    видно с фиксации этой транзакции. Версии читаются один раз
+    за запрос, переданный в get_ids.
+    """
+
+    def __init__(self, model, tag):
+        self.model = model
+        self.tag = tag
+        self._ids = {}
+        self._version = None
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo):
+        # поля сериализаторов копируются вместе с аргументами
+        return self
+
+    def get_ids(self, request=None):
+        # словарь и версия — с основной базы: реплика может отставать
+        db = router.db_for_write(self.model)
+        version = slug_versions(request)[self.tag]
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._ids = dict(self.model.objects.using(db)
+                                     .values_list('slug', 'id'))
+                    self._version = version
+        return self._ids
+
+    def choices(self, request=None):
+        return [(slug, slug) for slug in self.get_ids(request)]
+
+    def reset(self):
+        with self._lock:
+            self._version = None
+
+
+class SlugChoices:
+    """Ленивые choices поля формы из словаря для запроса."""
+
+    def __init__(self, slug_map, request=None):
+        self.slug_map = slug_map
+        self.request = request
+
+    def __call__(self):
+        return self.slug_map.choices(self.request)
+
+    def __deepcopy__(self, memo):
+        # поле формы копируется, запрос копировать нельзя
+        return self
+
+
+genre_slugs = SlugMap(Genre, GENRES)
+category_slugs = SlugMap(Category, CATEGORIES)
+SLUG_MAPS = {Genre: genre_slugs, Category: category_slugs}
+
+
+def slug_versions(request=None):
+    """
+    Версии тегов всех словарей одним запросом. Для запроса они
+    читаются один раз и запоминаются на нём: жанры, категория
+    и фильтры одного запроса сверяются с одной версией.
+    """
+    versions = getattr(request, '_slug_versions', None)
+    if versions is None:
+        tags = [slug_map.tag for slug_map in SLUG_MAPS.values()]
+        versions = dict(zip(tags, tag_versions(
+            tags, using=router.db_for_write(CacheTag))))
+        if request is not None:
+            request._slug_versions = versions
+    return versions
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_slugs(sender, **kwargs):
+    slug_map = SLUG_MAPS[sender]
+    slug_map.reset()
+    invalidate(slug_map.tag)
@@ -1,18 +1,19 @@
 from django.urls import include, path
-from rest_framework import routers
 
+from .routers import BulkRouter
 from .views import (CategoryViewSet, CommentsViewSet, GenreViewSet,
                     ReviewsViewSet, TitleViewSet, UserViewSet,
-                    delete_categories, delete_genre, get_token, get_update_me,
-                    signup)
+                    delete_categories, delete_genre, export_reviews,
+                    export_titles, get_cache_stats, get_metrics, get_token,
+                    get_update_me, signup)
 
-router = routers.DefaultRouter()
-router.register(r'users', UserViewSet)
-router.register(r'titles', TitleViewSet)
+router = BulkRouter()
+router.register(r'users', UserViewSet, basename='users')
+router.register(r'titles', TitleViewSet, basename='titles')
 router.register(r'categories', CategoryViewSet,
                 basename='categories')
 router.register(r'genres', GenreViewSet,
-                basename='categories')
+                basename='genres')
 router.register(r'titles/(?P<title_id>\d+)/reviews',
                 ReviewsViewSet, basename='reviews')
 router.register(
@@ -27,6 +28,11 @@ urlpatterns = [
         path('genres/<slug:slug>/', delete_genre, name='delete_genre'),
         path('auth/signup/', signup, name='signup'),
         path('auth/token/', get_token, name='gettoken'),
+        path('cache/stats/', get_cache_stats, name='cache_stats'),
+        path('metrics/', get_metrics, name='metrics'),
+        path('export/titles/', export_titles, name='export_titles'),
+        path('export/titles/<int:title_id>/reviews/', export_reviews,
+             name='export_reviews'),
         path('', include(router.urls)),
     ]))
 ]
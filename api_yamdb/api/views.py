@@ -1,35 +1,49 @@
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import router, transaction
+from django.db.models import Prefetch, Q
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, status, viewsets
-from rest_framework.decorators import api_view
-from rest_framework.exceptions import ValidationError
+from rest_framework.decorators import (action, api_view, permission_classes,
+                                       renderer_classes)
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
 
 from api_yamdb.settings import EMAIL
-from reviews.models import Category, Genre, Review, Title, User
+from reviews.models import (SCORE_FIELDS, Category, Genre, OutgoingEmail,
+                            Review, SimilarTitle, Title, User)
+from reviews.search import index_titles
 
-from .filters import TitleFilter
+from .authentication import RoleAccessToken
+from .cache import (CATEGORIES, GENRES, SIMILAR, TITLES, TITLES_LIST,
+                    CachedResponseMixin, cache_stats, invalidate, title_tag)
+from .deletion import VISIBLE_COMMENTS, schedule_deletion
+from .export import (CSVRenderer, NDJSONRenderer, export_csv,
+                     export_ndjson, review_objects, title_objects)
+from .filters import TitleFilter, TitleOrderingFilter
+from .metrics import expose
+from .mixins import (BulkMixin, DeferredDestroyMixin, ParentObjectsMixin,
+                     ValuesListMixin)
+from .pagination import FeedPagination
 from .permissions import (AdminOrModeratorOrRead, IsAdminOrSuperuser,
-                          IsAdminUserOrReadOnly, OwnerOrReadOnly)
+                          IsAdminUserOrReadOnly)
 from .serializers import (CategorySerializer, CommentSerializer,
-                          GenreSerializer, MeSerializer, ReviewSerializer,
-                          SingUpSerializer, TitlesReadSerializer,
+                          CommentValuesSerializer, GenreSerializer,
+                          MeSerializer, ReviewSerializer,
+                          ReviewValuesSerializer, SimilarTitleSerializer,
+                          SingUpSerializer, TitleStatsSerializer,
+                          TitlesReadSerializer, TitlesValuesSerializer,
                           TitlesWriteSerializer, TokenSerializer,
                           UserSerializer)
 
 
 def sent_verification_code(user):
     confirmation_code = default_token_generator.make_token(user)
-    send_mail(
-        'Код подтверждения',
-        f'Ваш код: {confirmation_code}',
-        EMAIL,
-        [user.email],
-        fail_silently=False,
+    OutgoingEmail.objects.create(
+        subject='Код подтверждения',
+        body=f'Ваш код: {confirmation_code}',
+        from_email=EMAIL,
+        to=user.email,
     )
 
 
@@ -52,7 +66,7 @@ def get_token(request):
     user = get_object_or_404(User, username=serializer.data['username'])
     confirmation_code = serializer.data['confirmation_code']
     if default_token_generator.check_token(user, confirmation_code):
-        token = AccessToken.for_user(user)
+        token = RoleAccessToken.for_user(user)
         return Response(f'{token}', status=status.HTTP_200_OK)
     return Response(
         "Отсутствует обязательное поле или оно некорректно",
@@ -80,8 +94,58 @@ def get_update_me(request):
                     status=status.HTTP_400_BAD_REQUEST)
 
 
-class UserViewSet(viewsets.ModelViewSet):
-    queryset = User.objects.all()
+@api_view(['GET'])
+@permission_classes((IsAdminOrSuperuser,))
+def get_cache_stats(request):
+    return Response(cache_stats.as_dict())
+
+
+@api_view(['GET'])
+@permission_classes((IsAdminOrSuperuser,))
+def get_metrics(request):
+    return HttpResponse(
+        expose(), content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+@api_view(['GET'])
+@renderer_classes((NDJSONRenderer, CSVRenderer))
+@permission_classes((IsAdminOrSuperuser,))
+def export_titles(request):
+    """
+    Весь каталог одним потоковым ответом: ?format=ndjson — произведения
+    с жанрами и категорией, ?format=csv&table= — файлы static/data,
+    включая пользователей — авторов отзывов и комментариев.
+    """
+    db = router.db_for_read(Title)
+    if request.accepted_renderer.format == CSVRenderer.format:
+        return export_csv(request, db, {
+            'titles': Q(), 'genre_title': Q(), 'genre': Q(), 'category': Q(),
+            'users': Q(is_active=True),
+        })
+    return export_ndjson(request, title_objects(db), 'titles')
+
+
+@api_view(['GET'])
+@renderer_classes((NDJSONRenderer, CSVRenderer))
+@permission_classes((IsAdminOrSuperuser,))
+def export_reviews(request, title_id):
+    """Отзывы произведения с комментариями одним потоковым ответом."""
+    db = router.db_for_read(Review)
+    title = get_object_or_404(Title.objects.using(db), pk=title_id)
+    if request.accepted_renderer.format == CSVRenderer.format:
+        return export_csv(request, db, {
+            'review': Q(title_id=title.pk, author__is_active=True),
+            'comments': Q(VISIBLE_COMMENTS, review__title_id=title.pk,
+                          review__author__is_active=True),
+        })
+    return export_ndjson(request, review_objects(db, title.pk),
+                         f'title-{title.pk}-reviews')
+
+
+class UserViewSet(DeferredDestroyMixin, viewsets.ModelViewSet):
+    # отключённые пользователи ждут удаления командой process_deletions
+    queryset = User.objects.filter(is_active=True)
     serializer_class = UserSerializer
     filter_backends = (filters.SearchFilter,)
     search_fields = ('username',)
@@ -90,27 +154,92 @@ class UserViewSet(viewsets.ModelViewSet):
     lookup_value_regex = "[^/]+"
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(CachedResponseMixin, BulkMixin, ValuesListMixin,
+                   DeferredDestroyMixin, viewsets.ModelViewSet):
     """Вьюсет для произведений"""
-    queryset = Title.objects.all().annotate(rating=Avg("reviews__score"))
+    queryset = Title.objects.select_related('category').prefetch_related(
+        Prefetch('genre', queryset=Genre.objects.order_by('id')))
+    values_serializer_class = TitlesValuesSerializer
     permission_classes = (IsAdminUserOrReadOnly,)
-    filter_backends = (DjangoFilterBackend, filters.SearchFilter,)
-    search_fields = ('slug', 'year', 'name')
+    filter_backends = (DjangoFilterBackend, TitleOrderingFilter)
     filterset_class = TitleFilter
+    cache_tags = (TITLES, TITLES_LIST)
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
             return TitlesReadSerializer
         return TitlesWriteSerializer
 
+    def get_cache_tags(self):
+        if self.action in ('retrieve', 'stats'):
+            return (TITLES, title_tag(self.kwargs[self.lookup_field]))
+        if self.action == 'similar':
+            # в ответе названия соседей, их меняет запись любого произведения
+            return (TITLES_LIST, SIMILAR)
+        return super().get_cache_tags()
+
+    def get_invalidated_tags(self, instance):
+        return (TITLES_LIST, title_tag(instance.pk))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached(super().retrieve, request, *args, **kwargs)
+
+    @action(detail=True)
+    def stats(self, request, pk=None):
+        """Распределение оценок из счётчиков произведения."""
+        return self.cached(self.get_stats, request, pk=pk)
 
-class GenreViewSet(viewsets.ModelViewSet):
+    def get_stats(self, request, pk=None):
+        title = get_object_or_404(
+            Title.objects.only('reviews_count', 'rating_avg', *SCORE_FIELDS),
+            pk=pk)
+        return Response(TitleStatsSerializer(title).data)
+
+    @action(detail=True)
+    def similar(self, request, pk=None):
+        """Похожие произведения из таблицы build_similar_titles."""
+        return self.cached(self.get_similar, request, pk=pk)
+
+    def get_similar(self, request, pk=None):
+        neighbors = list(
+            SimilarTitle.objects
+            .filter(title_id=pk, title__is_hidden=False,
+                    neighbor__is_hidden=False)
+            .select_related('neighbor').only('score', 'neighbor__name',
+                                             'neighbor__year')
+            .order_by('-score', 'neighbor_id'))
+        if not neighbors:
+            get_object_or_404(Title, pk=pk)
+        return Response(SimilarTitleSerializer(neighbors, many=True).data)
+
+    @transaction.atomic
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        index_titles([serializer.instance.pk])
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        index_titles([serializer.instance.pk])
+
+    def perform_bulk_save(self, serializers, update):
+        titles = super().perform_bulk_save(serializers, update)
+        index_titles([title.pk for title in titles])
+        return titles
+
+
+class GenreViewSet(CachedResponseMixin, BulkMixin, viewsets.ModelViewSet):
     """Вьюсет для жанров"""
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     filter_backends = (filters.SearchFilter,)
     permission_classes = (IsAdminUserOrReadOnly,)
     search_fields = ('slug', 'name')
+    cache_tags = (GENRES,)
+    bulk_lookup_field = 'slug'
+
+    def get_invalidated_tags(self, instance):
+        return (GENRES, TITLES)
 
 
 @api_view(['DELETE'])
@@ -119,18 +248,25 @@ def delete_genre(request, slug):
     if request.user.is_anonymous:
         return Response(status=status.HTTP_401_UNAUTHORIZED)
     if request.user.is_adminisrator:
-        genre.delete()
+        schedule_deletion(genre)
+        invalidate(GENRES, TITLES)
         return Response(status=status.HTTP_204_NO_CONTENT)
     return Response(status=status.HTTP_403_FORBIDDEN)
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(CachedResponseMixin, BulkMixin,
+                      viewsets.ModelViewSet):
     """Вьюсет для категорий"""
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
-    permission_classes = (OwnerOrReadOnly,)
+    permission_classes = (IsAdminUserOrReadOnly,)
     filter_backends = (filters.SearchFilter,)
     search_fields = ('slug', 'name')
+    cache_tags = (CATEGORIES,)
+    bulk_lookup_field = 'slug'
+
+    def get_invalidated_tags(self, instance):
+        return (CATEGORIES, TITLES)
 
 
 @api_view(['DELETE'])
@@ -140,51 +276,82 @@ def delete_categories(request, slug):
     if request.user.is_anonymous:
         return Response(status=status.HTTP_401_UNAUTHORIZED)
     if request.user.is_adminisrator:
-        category.delete()
+        schedule_deletion(category)
+        invalidate(CATEGORIES, TITLES)
         return Response(status=status.HTTP_204_NO_CONTENT)
     return Response(status=status.HTTP_403_FORBIDDEN)
 
 
-class ReviewsViewSet(viewsets.ModelViewSet):
+class ReviewsViewSet(ParentObjectsMixin, ValuesListMixin,
+                     viewsets.ModelViewSet):
     """
     Вьюсет для отзывов
     """
     serializer_class = ReviewSerializer
+    values_serializer_class = ReviewValuesSerializer
+    pagination_class = FeedPagination
     lookup_url_kwarg = 'review_id'
     permission_classes = (AdminOrModeratorOrRead,)
 
     def get_queryset(self):
-        title_id = self.kwargs['title_id']
-        titles = get_object_or_404(Title, id=title_id)
-        return titles.reviews.all()
+        # автор загружается тем же запросом, от него нужен только username,
+        # отзывы отключённых пользователей ждут удаления и скрыты
+        return self.get_title().reviews.filter(
+            author__is_active=True).select_related('author').only(
+            'id', 'text', 'score', 'pub_date', 'title_id',
+            'author__username')
 
+    @transaction.atomic
     def perform_create(self, serializer):
-        title_id = self.kwargs['title_id']
-        title = get_object_or_404(Title, pk=title_id)
-        serializer.save(author=self.request.user, title=title)
+        title = self.get_title()
+        review = serializer.save(author=self.request.user, title=title)
+        title.update_rating(new_score=review.score, reviews_delta=1)
+        invalidate(TITLES_LIST, title_tag(title.pk))
+
+    @staticmethod
+    def locked_scores(review_id):
+        """
+        Оценка отзыва, перечитанная в транзакции: экземпляр загружен до
+        неё и мог устареть, пустой список — отзыв уже удалён.
+        """
+        return list(Review.objects.select_for_update().filter(pk=review_id)
+                    .values_list('score', flat=True))
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        old_scores = self.locked_scores(serializer.instance.pk)
+        review = serializer.save()
+        if old_scores:
+            self.get_title().update_rating(old_score=old_scores[0],
+                                           new_score=review.score)
+        invalidate(TITLES_LIST, title_tag(review.title_id))
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        old_scores = self.locked_scores(instance.pk)
+        _, deleted = Review.objects.filter(pk=instance.pk).delete()
+        # рейтинг меняет только запрос, который действительно удалил отзыв
+        if old_scores and deleted.get(Review._meta.label):
+            self.get_title().update_rating(old_score=old_scores[0],
+                                           reviews_delta=-1)
+        invalidate(TITLES_LIST, title_tag(instance.title_id))
 
 
-class CommentsViewSet(viewsets.ModelViewSet):
+class CommentsViewSet(ParentObjectsMixin, ValuesListMixin,
+                      viewsets.ModelViewSet):
     """
     Вьюсет для комментариев
     """
     serializer_class = CommentSerializer
+    values_serializer_class = CommentValuesSerializer
+    pagination_class = FeedPagination
     lookup_url_kwarg = 'comments_id'
     permission_classes = (AdminOrModeratorOrRead,)
 
     def get_queryset(self):
-        title_id = self.kwargs['title_id']
-        review_id = self.kwargs['review_id']
-        title = get_object_or_404(Title, pk=title_id)
-        try:
-            reviews = title.reviews.get(pk=review_id)
-        except Review.DoesNotExist:
-            raise ValidationError(
-                {'detail': (f'Отзыва с ID {review_id} к произведению '
-                            f'{title} не существует')}
-            )
-        return reviews.comments.all()
+        return self.get_review().comments.filter(
+            VISIBLE_COMMENTS).select_related('author').only(
+            'id', 'text', 'pub_date', 'review_id', 'author__username')
 
     def perform_create(self, serializer):
-        review = get_object_or_404(Review, pk=self.kwargs['review_id'])
-        serializer.save(author=self.request.user, review=review)
+        serializer.save(author=self.request.user, review=self.get_review())
@@ -30,6 +30,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
+    'api.replicas.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -70,6 +72,19 @@ DATABASES = {
     }
 }
 
+# Реплики только для чтения: пути к базам через запятую в YAMDB_REPLICAS,
+# локальные копии SQLite обновляет команда sync_replicas
+DATABASE_REPLICAS = []
+for index, name in enumerate(
+        filter(None, os.getenv('YAMDB_REPLICAS', '').split(',')), start=1):
+    DATABASES[f'replica{index}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+    }
+    DATABASE_REPLICAS.append(f'replica{index}')
+
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+
 
 # Password validation
 
@@ -113,11 +128,15 @@ AUTH_USER_MODEL = 'reviews.User'
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 5,
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.metrics.MetricsJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.ClaimsJWTAuthentication',
     ],
 }
 
@@ -126,6 +145,27 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Cache
+# версии тегов кеша хранятся в базе (CacheTag), поэтому кеш ответов
+# в памяти процесса не отдаёт ответ, изменённый другим процессом.
+# Для общего кеша ответов между процессами замените BACKEND на
+# 'django.core.cache.backends.filebased.FileBasedCache', а LOCATION
+# на путь к каталогу
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'api': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'api-responses',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
@@ -135,3 +175,17 @@ EMAIL = 'db_yamdb@example.com'
 ADMIN = 'admin'
 USER = 'user'
 MODERATOR = 'moderator'
+# сколько секунд роль из токена или кеша считается актуальной
+USER_CLAIMS_TTL = 60
+API_CACHE = 'api'
+# сколько объектов можно создать или изменить одним запросом
+BULK_MAX_ITEMS = 5000
+# размеры пулов потоков ASGI для чтения каталога и остальных запросов
+ASGI_READ_THREADS = 16
+ASGI_WRITE_THREADS = 4
+# сколько секунд после записи пользователь читает с основной базы
+REPLICA_STICKY_SECONDS = 5
+# сколько строк выгрузка читает из базы одним запросом
+EXPORT_CHUNK_SIZE = 1000
+# списки отдаются из строк values() без экземпляров моделей
+FAST_READ_SERIALIZERS = True
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Category, Comments, Genre, Review, Title, User
+from .models import (Category, Comments, DeletionJob, Genre, OutgoingEmail,
+                     Review, Title, User)
 
 
 class TitleAdmin(admin.ModelAdmin):
@@ -16,6 +17,21 @@ class CommentsAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'to', 'subject', 'created', 'sent_at', 'attempts')
+    list_filter = ('sent_at',)
+    empty_value_display = '-пусто-'
+
+
+@admin.register(DeletionJob)
+class DeletionJobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'kind', 'object_id', 'created', 'finished_at',
+                    'processed', 'total', 'attempts')
+    list_filter = ('kind', 'finished_at')
+    empty_value_display = '-пусто-'
+
+
 admin.site.register(User)
 admin.site.register(Title, TitleAdmin)
 admin.site.register(Category)
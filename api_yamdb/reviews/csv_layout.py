@@ -0,0 +1,17 @@
+# колонки совпадают с файлами static/data
+CSV_COLUMNS = {
+    'users.csv': ('id', 'username', 'email', 'role', 'bio', 'first_name',
+                  'last_name'),
+    'category.csv': ('id', 'name', 'slug'),
+    'genre.csv': ('id', 'name', 'slug'),
+    'titles.csv': ('id', 'name', 'year', 'category'),
+    'genre_title.csv': ('id', 'title_id', 'genre_id'),
+    'review.csv': ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+    'comments.csv': ('id', 'review_id', 'text', 'author', 'pub_date'),
+}
+
+
+def format_date(value):
+    """Дата в формате static/data: 2019-09-24T21:08:21.567Z"""
+    return value.strftime('%Y-%m-%dT%H:%M:%S.') + (
+        f'{value.microsecond // 1000:03d}Z')
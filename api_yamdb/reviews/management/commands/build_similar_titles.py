@@ -0,0 +1,117 @@
+import os
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from api.cache import SIMILAR, invalidate
+from reviews.models import Review, SimilarityRun, SimilarTitle, Title
+from reviews.search import chunks
+from reviews.similarity import COSINE, METRICS, ScoreMatrix, compute_neighbors
+
+
+class Command(BaseCommand):
+    help = ('Рассчитывает похожие произведения по оценкам одних и тех же '
+            'пользователей')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--metric', choices=METRICS, default=COSINE,
+            help='Мера сходства: cosine или pearson',
+        )
+        parser.add_argument(
+            '--top-k', type=int, default=10,
+            help='Сколько соседей хранится у произведения',
+        )
+        parser.add_argument(
+            '--min-common', type=int, default=2,
+            help='Минимум пользователей, оценивших оба произведения',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Количество процессов расчёта',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=200,
+            help='Количество произведений в одной задаче и транзакции',
+        )
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Пересчитать все произведения, а не только изменённые',
+        )
+
+    def handle(self, *args, **options):
+        params = {'metric': options['metric'], 'top_k': options['top_k'],
+                  'min_common': options['min_common']}
+        previous = (SimilarityRun.objects
+                    .filter(finished_at__isnull=False, **params)
+                    .order_by('-started_at').first())
+        run = SimilarityRun.objects.create(started_at=timezone.now(),
+                                           **params)
+        full = options['full'] or previous is None
+        changed = set() if full else set(
+            Title._base_manager
+            .filter(reviews_changed_at__gte=previous.started_at)
+            .values_list('id', flat=True))
+        title_ids = []
+        if full or changed:
+            matrix = ScoreMatrix(
+                Review.objects.filter(score__isnull=False,
+                                      title__is_hidden=False,
+                                      author__is_active=True)
+                .values_list('author_id', 'title_id', 'score')
+                .iterator(chunk_size=10000),
+                options['metric'],
+            )
+            title_ids = sorted(self.all_titles(matrix) if full
+                               else self.affected_titles(matrix, changed))
+            self.store(matrix, title_ids, options)
+        run.titles = len(title_ids)
+        run.finished_at = timezone.now()
+        run.save(update_fields=['titles', 'finished_at'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Похожие произведения пересчитаны для {run.titles} произведений'
+        ))
+
+    @staticmethod
+    def all_titles(matrix):
+        title_ids = set(matrix.titles)
+        title_ids.update(SimilarTitle.objects.values_list(
+            'title_id', flat=True).distinct())
+        return title_ids
+
+    @staticmethod
+    def affected_titles(matrix, changed):
+        """
+        Произведения, у которых могли измениться соседи: изменённые,
+        произведения с общими с ними оценщиками и произведения, у
+        которых изменённые хранятся в соседях.
+        """
+        title_ids = changed | matrix.co_rated(changed)
+        for chunk in chunks(changed):
+            title_ids.update(SimilarTitle.objects.filter(
+                neighbor_id__in=chunk).values_list('title_id', flat=True))
+        return title_ids
+
+    @staticmethod
+    def store(matrix, title_ids, options):
+        """
+        Заменяет соседей произведений по пачке за транзакцию. Версия
+        тега SIMILAR хранится в базе и меняется в той же транзакции,
+        поэтому процессы сервера сбрасывают ответы similar/ сразу.
+        """
+        results = compute_neighbors(
+            matrix, chunks(title_ids, options['chunk_size']),
+            options['top_k'], options['min_common'], options['workers'],
+        )
+        for neighbors in results:
+            with transaction.atomic():
+                SimilarTitle.objects.filter(
+                    title_id__in=list(neighbors)).delete()
+                SimilarTitle.objects.bulk_create([
+                    SimilarTitle(title_id=title_id, neighbor_id=neighbor_id,
+                                 score=score)
+                    for title_id, rows in neighbors.items()
+                    for score, neighbor_id in rows
+                ])
+                invalidate(SIMILAR)
@@ -0,0 +1,190 @@
+import csv
+import os
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from api.cache import CATEGORIES, GENRES, TITLES, TITLES_LIST, invalidate
+from reviews.models import Category, Comments, Genre, Review, Title, User
+
+DATA_DIR = os.path.join(settings.BASE_DIR, 'static', 'data')
+
+GenreTitle = Title.genre.through
+
+
+def read_csv(path):
+    """Построчно читает CSV-файл, не загружая его в память целиком."""
+    with open(path, encoding='utf-8', newline='') as csv_file:
+        yield from csv.DictReader(csv_file)
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+@contextmanager
+def keep_auto_now_add(model):
+    """Сохраняет даты публикации из файла вместо текущего времени."""
+    fields = [field for field in model._meta.fields
+              if getattr(field, 'auto_now_add', False)]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = 'Загружает данные из CSV-файлов static/data в базу данных'
+
+    tables = (
+        ('users.csv', User, 'build_user'),
+        ('category.csv', Category, 'build_category'),
+        ('genre.csv', Genre, 'build_genre'),
+        ('titles.csv', Title, 'build_title'),
+        ('genre_title.csv', GenreTitle, 'build_genre_title'),
+        ('review.csv', Review, 'build_review'),
+        ('comments.csv', Comments, 'build_comment'),
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default=DATA_DIR,
+            help='Каталог с CSV-файлами',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Количество строк в одном INSERT',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.isdir(path):
+            raise CommandError(f'Каталог {path} не найден')
+        self.batch_size = options['batch_size']
+        self.known_ids = {}
+        imported = set()
+        for filename, model, builder in self.tables:
+            file_path = os.path.join(path, filename)
+            if not os.path.exists(file_path):
+                self.stdout.write(
+                    self.style.WARNING(f'{filename}: файл не найден')
+                )
+                continue
+            self.import_file(file_path, model, getattr(self, builder))
+            imported.add(model)
+        if Review in imported:
+            call_command('recalculate_ratings', stdout=self.stdout)
+        if imported & {Title, GenreTitle, Genre, Category}:
+            call_command('rebuild_search_index', stdout=self.stdout)
+        if imported:
+            # строки пишутся bulk_create, сигналы сброса кеша не срабатывают
+            invalidate(TITLES, TITLES_LIST, GENRES, CATEGORIES)
+
+    def import_file(self, file_path, model, builder):
+        filename = os.path.basename(file_path)
+        read = 0
+        started = time.monotonic()
+        with transaction.atomic(), keep_auto_now_add(model):
+            # ignore_conflicts молча пропускает уже загруженные строки,
+            # поэтому вставленные считаются по таблице
+            existing = model._base_manager.count()
+            for batch in batches(read_csv(file_path), self.batch_size):
+                objects = [obj for obj in map(builder, batch) if obj]
+                model.objects.bulk_create(objects, ignore_conflicts=True)
+                read += len(batch)
+            rows = model._base_manager.count() - existing
+        skipped = read - rows
+        elapsed = time.monotonic() - started
+        rate = rows / elapsed if elapsed else rows
+        self.stdout.write(self.style.SUCCESS(
+            f'{filename}: {rows} строк за {elapsed:.2f} с '
+            f'({rate:.0f} строк/с), пропущено {skipped}'
+        ))
+
+    def resolve(self, model, value):
+        """
+        Возвращает id связанной записи или None, если её нет в базе,
+        :param model: модель, на которую ссылается колонка
+        :param value: значение колонки из файла
+        """
+        if model not in self.known_ids:
+            self.known_ids[model] = set(
+                model.objects.values_list('id', flat=True).iterator()
+            )
+        if value and int(value) in self.known_ids[model]:
+            return int(value)
+        return None
+
+    def build_user(self, row):
+        return User(
+            id=row['id'],
+            username=row['username'],
+            email=row['email'],
+            role=row['role'],
+            bio=row['bio'],
+            first_name=row['first_name'],
+            last_name=row['last_name'],
+            password=make_password(None),
+        )
+
+    def build_category(self, row):
+        return Category(id=row['id'], name=row['name'], slug=row['slug'])
+
+    def build_genre(self, row):
+        return Genre(id=row['id'], name=row['name'], slug=row['slug'])
+
+    def build_title(self, row):
+        return Title(
+            id=row['id'],
+            name=row['name'],
+            year=row['year'],
+            category_id=self.resolve(Category, row['category']),
+        )
+
+    def build_genre_title(self, row):
+        title_id = self.resolve(Title, row['title_id'])
+        genre_id = self.resolve(Genre, row['genre_id'])
+        if title_id is None or genre_id is None:
+            return None
+        return GenreTitle(id=row['id'], title_id=title_id, genre_id=genre_id)
+
+    def build_review(self, row):
+        title_id = self.resolve(Title, row['title_id'])
+        author_id = self.resolve(User, row['author'])
+        if title_id is None or author_id is None:
+            return None
+        return Review(
+            id=row['id'],
+            title_id=title_id,
+            author_id=author_id,
+            text=row['text'],
+            score=int(row['score']) if row['score'] else None,
+            pub_date=parse_datetime(row['pub_date']),
+        )
+
+    def build_comment(self, row):
+        review_id = self.resolve(Review, row['review_id'])
+        if review_id is None:
+            return None
+        return Comments(
+            id=row['id'],
+            review_id=review_id,
+            author_id=self.resolve(User, row['author']),
+            text=row['text'],
+            pub_date=parse_datetime(row['pub_date']),
+        )
@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from api.deletion import process_job
+from reviews.models import DeletionJob
+
+
+class Command(BaseCommand):
+    help = 'Удаляет по частям объекты из очереди DeletionJob'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Количество строк, удаляемых одной транзакцией',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5.0,
+            help='Пауза в секундах, если очередь пуста',
+        )
+        parser.add_argument(
+            '--max-attempts', type=int, default=5,
+            help='После стольких неудачных попыток задание пропускается',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Разобрать очередь и завершиться',
+        )
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        total = 0
+        try:
+            while True:
+                job = (DeletionJob.objects
+                       .filter(finished_at=None,
+                               attempts__lt=options['max_attempts'])
+                       .order_by('id').first())
+                if job is not None:
+                    total += self.run_job(job)
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f'Удалено объектов: {total}'))
+
+    def run_job(self, job):
+        try:
+            while not process_job(job, self.batch_size):
+                self.stdout.write(f'{job}: {job.processed}/{job.total}')
+        except Exception as error:
+            DeletionJob.objects.filter(pk=job.pk).update(
+                attempts=F('attempts') + 1
+            )
+            self.stderr.write(f'Не удалось удалить {job}: {error}')
+            return 0
+        self.stdout.write(f'{job}: удалено, строк {job.processed}')
+        return 1
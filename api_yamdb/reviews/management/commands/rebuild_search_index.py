@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.cache import CATEGORIES, GENRES, TITLES, TITLES_LIST, invalidate
+from reviews.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс произведений'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = rebuild_index()
+            invalidate(TITLES, TITLES_LIST, GENRES, CATEGORIES)
+        self.stdout.write(self.style.SUCCESS(
+            f'Поисковый индекс перестроен для {count} произведений'
+        ))
@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from api.cache import CATEGORIES, GENRES, TITLES, TITLES_LIST, invalidate
+from reviews.models import SCORE_FIELDS, SCORES, Review, Title, score_field
+
+RATING_FIELDS = ('rating_sum', 'rating_count', 'rating_avg',
+                 'reviews_count', *SCORE_FIELDS)
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает сохранённые суммы, количество, среднее и '
+            'распределение оценок и количество отзывов произведений')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество произведений, обновляемых одним запросом',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        # распределение оценок считается тем же GROUP BY условными COUNT;
+        # отзывы удаляемых пользователей уже вычтены и не учитываются
+        totals = (Review.objects.filter(author__is_active=True)
+                  .values('title')
+                  .annotate(score_sum=Sum('score'), score_count=Count('score'),
+                            review_count=Count('id'),
+                            **{score_field(score): Count(
+                                'id', filter=Q(score=score))
+                               for score in SCORES})
+                  .order_by('title'))
+        updated = 0
+        with transaction.atomic():
+            Title.objects.update(rating_sum=0, rating_count=0,
+                                 rating_avg=None, reviews_count=0,
+                                 **dict.fromkeys(SCORE_FIELDS, 0))
+            batch = []
+            for row in totals.iterator(chunk_size=batch_size):
+                score_sum = row['score_sum'] or 0
+                score_count = row['score_count']
+                batch.append(Title(
+                    pk=row['title'],
+                    rating_sum=score_sum,
+                    rating_count=score_count,
+                    rating_avg=(score_sum / score_count if score_count
+                                else None),
+                    reviews_count=row['review_count'],
+                    **{field: row[field] for field in SCORE_FIELDS},
+                ))
+                if len(batch) >= batch_size:
+                    updated += self._flush(batch, batch_size)
+            updated += self._flush(batch, batch_size)
+            invalidate(TITLES, TITLES_LIST, GENRES, CATEGORIES)
+        self.stdout.write(self.style.SUCCESS(
+            f'Рейтинг пересчитан для {updated} произведений'
+        ))
+
+    @staticmethod
+    def _flush(batch, batch_size):
+        Title.objects.bulk_update(
+            batch, RATING_FIELDS, batch_size=batch_size
+        )
+        count = len(batch)
+        batch.clear()
+        return count
@@ -0,0 +1,312 @@
+import csv
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from api.cache import CATEGORIES, GENRES, TITLES, TITLES_LIST, invalidate
+from api_yamdb.settings import ADMIN, MODERATOR, USER
+from reviews.csv_layout import CSV_COLUMNS, format_date
+from reviews.models import (SCORE_FIELDS, Category, Comments, Genre, Review,
+                            Title, User)
+
+GenreTitle = Title.genre.through
+
+WORDS = (
+    'побег', 'отец', 'война', 'мир', 'туман', 'ёжик', 'ночь', 'день',
+    'город', 'море', 'звезда', 'сердце', 'дорога', 'тень', 'песня', 'огонь',
+    'зима', 'лето', 'река', 'ветер', 'время', 'дом', 'сад', 'небо',
+    'остров', 'мастер', 'король', 'страх', 'свет', 'память', 'сон', 'путь',
+)
+REVIEW_TEXTS = (
+    'Шедевр, пересматриваю каждый год.',
+    'Неплохо, но ожидал большего.',
+    'Скучно и затянуто.',
+    'Отличная работа, рекомендую.',
+    'Середнячок, один раз можно.',
+    'Лучшее, что я видел за последнее время.',
+    'Не понравилось совсем.',
+    'Есть удачные моменты, но в целом слабо.',
+)
+COMMENT_TEXTS = (
+    'Полностью согласен.',
+    'Не могу согласиться.',
+    'Спасибо за отзыв!',
+    'Вы явно смотрели что-то другое.',
+)
+START_DATE = datetime(2015, 1, 1, tzinfo=timezone.utc)
+PERIOD_SECONDS = 8 * 365 * 24 * 3600
+
+
+def zipf_counts(total, size, exponent, cap):
+    """
+    Делит total между size элементами по закону Ципфа,
+    ни один элемент не получает больше cap.
+    """
+    weights = [1 / rank ** exponent for rank in range(1, size + 1)]
+    norm = sum(weights)
+    counts = [min(int(total * weight / norm), cap) for weight in weights]
+    rest = total - sum(counts)
+    for index in range(size):
+        if rest <= 0:
+            break
+        extra = min(cap - counts[index], rest)
+        counts[index] += extra
+        rest -= extra
+    return counts
+
+
+class Dataset:
+    """
+    Воспроизводимый по seed набор данных, строки каждой таблицы
+    отдаются генераторами в порядке колонок CSV_COLUMNS.
+    """
+
+    def __init__(self, options, first_ids):
+        self.options = options
+        self.first_ids = first_ids
+        self.seed = options['seed']
+
+    def rng(self, table):
+        return random.Random(f'{self.seed}:{table}')
+
+    def ids(self, model, count):
+        start = self.first_ids[model]
+        return range(start, start + count)
+
+    def users(self):
+        rng = self.rng('users')
+        for user_id in self.ids(User, self.options['users']):
+            role = rng.choices((USER, MODERATOR, ADMIN), (980, 15, 5))[0]
+            yield (user_id, f'seed{user_id}', f'seed{user_id}@yamdb.fake',
+                   role, '', '', '')
+
+    def categories(self):
+        for category_id in self.ids(Category, self.options['categories']):
+            yield (category_id, f'Категория {category_id}',
+                   f'category-{category_id}')
+
+    def genres(self):
+        for genre_id in self.ids(Genre, self.options['genres']):
+            yield genre_id, f'Жанр {genre_id}', f'genre-{genre_id}'
+
+    def titles(self):
+        rng = self.rng('titles')
+        categories = self.ids(Category, self.options['categories'])
+        for title_id in self.ids(Title, self.options['titles']):
+            name = ' '.join(rng.sample(WORDS, rng.randint(1, 3))).capitalize()
+            category = rng.choice(categories) if categories else ''
+            yield title_id, name, rng.randint(1920, 2021), category
+
+    def genre_titles(self):
+        rng = self.rng('genre_titles')
+        genres = self.ids(Genre, self.options['genres'])
+        if not genres:
+            return
+        row_id = self.first_ids[GenreTitle]
+        for title_id in self.ids(Title, self.options['titles']):
+            for genre_id in rng.sample(genres, min(rng.randint(1, 3),
+                                                   len(genres))):
+                yield row_id, title_id, genre_id
+                row_id += 1
+
+    def reviews(self):
+        """
+        Популярность произведений подчиняется закону Ципфа: несколько
+        произведений собирают большую часть отзывов, у остальных
+        длинный хвост из единиц. Автор пишет не больше одного отзыва
+        на произведение.
+        """
+        rng = self.rng('reviews')
+        titles = list(self.ids(Title, self.options['titles']))
+        users = self.ids(User, self.options['users'])
+        if not titles or not users:
+            return
+        rng.shuffle(titles)
+        review_id = self.first_ids[Review]
+        for title_id, count in zip(titles, self.review_counts()):
+            if not count:
+                break
+            mean = rng.uniform(3, 9)
+            for author_id in rng.sample(users, count):
+                score = min(max(round(rng.gauss(mean, 2)), 0), 10)
+                yield (review_id, title_id, rng.choice(REVIEW_TEXTS),
+                       author_id, score, self.pub_date(rng))
+                review_id += 1
+
+    def review_counts(self):
+        return zipf_counts(self.options['reviews'], self.options['titles'],
+                           self.options['zipf'], self.options['users'])
+
+    def comments(self):
+        """Комментарии тяготеют к отзывам популярных произведений."""
+        rng = self.rng('comments')
+        reviews = sum(self.review_counts())
+        users = self.ids(User, self.options['users'])
+        if not reviews or not users:
+            return
+        first_review = self.first_ids[Review]
+        for comment_id in self.ids(Comments, self.options['comments']):
+            review_id = first_review + int(reviews * rng.random() ** 3)
+            yield (comment_id, review_id, rng.choice(COMMENT_TEXTS),
+                   rng.choice(users), self.pub_date(rng))
+
+    @staticmethod
+    def pub_date(rng):
+        return START_DATE + timedelta(
+            seconds=rng.randrange(PERIOD_SECONDS),
+            microseconds=rng.randrange(1000) * 1000,
+        )
+
+
+class DatabaseSink:
+    """Пишет строки напрямую в таблицы пакетами executemany"""
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        adapt_date = connection.ops.adapt_datetimefield_value
+        now = adapt_date(timezone.now())
+        password = make_password(None)
+        self.tables = {
+            'users.csv': (
+                User, ('id', 'username', 'email', 'role', 'bio',
+                       'first_name', 'last_name', 'password', 'is_superuser',
+                       'is_staff', 'is_active', 'date_joined'),
+                lambda row: (*row, password, False, False, True, now),
+            ),
+            'category.csv': (
+                Category, ('id', 'name', 'slug', 'is_hidden'),
+                lambda row: (*row, False),
+            ),
+            'genre.csv': (
+                Genre, ('id', 'name', 'slug', 'is_hidden'),
+                lambda row: (*row, False),
+            ),
+            'titles.csv': (
+                Title, ('id', 'name', 'year', 'category_id', 'rating_sum',
+                        'rating_count', 'reviews_count', *SCORE_FIELDS,
+                        'is_hidden'),
+                lambda row: (*row[:3], row[3] or None, 0, 0, 0,
+                             *[0] * len(SCORE_FIELDS), False),
+            ),
+            'genre_title.csv': (
+                GenreTitle, ('id', 'title_id', 'genre_id'), None),
+            'review.csv': (
+                Review, ('id', 'title_id', 'text', 'author_id', 'score',
+                         'pub_date'),
+                lambda row: (*row[:5], adapt_date(row[5])),
+            ),
+            'comments.csv': (
+                Comments, ('id', 'review_id', 'text', 'author_id',
+                           'pub_date'),
+                lambda row: (*row[:4], adapt_date(row[4])),
+            ),
+        }
+
+    def write(self, filename, rows):
+        model, columns, convert = self.tables[filename]
+        quote = connection.ops.quote_name
+        sql = (f'INSERT INTO {quote(model._meta.db_table)} '
+               f'({", ".join(map(quote, columns))}) '
+               f'VALUES ({", ".join(["%s"] * len(columns))})')
+        if convert is not None:
+            rows = map(convert, rows)
+        written = 0
+        with transaction.atomic(), connection.cursor() as cursor:
+            while True:
+                batch = list(islice(rows, self.batch_size))
+                if not batch:
+                    return written
+                cursor.executemany(sql, batch)
+                written += len(batch)
+
+    def finish(self, stdout):
+        call_command('recalculate_ratings', stdout=stdout)
+        call_command('rebuild_search_index', stdout=stdout)
+        # строки вставлены напрямую, сигналы сброса кеша не срабатывали
+        invalidate(TITLES, TITLES_LIST, GENRES, CATEGORIES)
+
+
+class CsvSink:
+    """Пишет строки в CSV-файлы с колонками static/data"""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, filename, rows):
+        written = 0
+        with open(os.path.join(self.path, filename), 'w', encoding='utf-8',
+                  newline='') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(CSV_COLUMNS[filename])
+            for row in rows:
+                if isinstance(row[-1], datetime):
+                    row = (*row[:-1], format_date(row[-1]))
+                writer.writerow(row)
+                written += 1
+        return written
+
+    def finish(self, stdout):
+        pass
+
+
+class Command(BaseCommand):
+    help = ('Генерирует воспроизводимый набор данных для нагрузочных '
+            'тестов и записывает его в базу или в CSV')
+
+    def add_arguments(self, parser):
+        for name, default in (('users', 10000), ('categories', 10),
+                              ('genres', 30), ('titles', 10000),
+                              ('reviews', 100000), ('comments', 50000)):
+            parser.add_argument(f'--{name}', type=int, default=default,
+                                help=f'Количество записей {name}')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Зерно генератора случайных чисел')
+        parser.add_argument('--zipf', type=float, default=1.1,
+                            help='Показатель закона Ципфа для популярности')
+        parser.add_argument('--batch-size', type=int, default=10000,
+                            help='Количество строк в одном INSERT')
+        parser.add_argument('--csv', metavar='PATH',
+                            help='Записать CSV в каталог вместо базы')
+
+    def handle(self, *args, **options):
+        if options['csv']:
+            sink = CsvSink(options['csv'])
+            first_ids = dict.fromkeys(
+                (User, Category, Genre, Title, GenreTitle, Review, Comments),
+                1)
+        else:
+            sink = DatabaseSink(options['batch_size'])
+            first_ids = {
+                model: (model._base_manager.aggregate(Max('id'))['id__max']
+                        or 0) + 1
+                for model in (User, Category, Genre, Title, GenreTitle,
+                              Review, Comments)
+            }
+        dataset = Dataset(options, first_ids)
+        for filename, rows in (
+                ('users.csv', dataset.users()),
+                ('category.csv', dataset.categories()),
+                ('genre.csv', dataset.genres()),
+                ('titles.csv', dataset.titles()),
+                ('genre_title.csv', dataset.genre_titles()),
+                ('review.csv', dataset.reviews()),
+                ('comments.csv', dataset.comments())):
+            started = time.monotonic()
+            written = sink.write(filename, rows)
+            elapsed = time.monotonic() - started
+            rate = written / elapsed if elapsed else written
+            self.stdout.write(self.style.SUCCESS(
+                f'{filename}: {written} строк за {elapsed:.2f} с '
+                f'({rate:.0f} строк/с)'
+            ))
+        sink.finish(self.stdout)
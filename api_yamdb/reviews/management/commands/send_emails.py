@@ -0,0 +1,79 @@
+import time
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db.models import F
+from django.utils import timezone
+
+from reviews.models import OutgoingEmail
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди OutgoingEmail'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Количество писем, отправляемых за один проход',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5.0,
+            help='Пауза в секундах, если очередь пуста',
+        )
+        parser.add_argument(
+            '--max-attempts', type=int, default=5,
+            help='После стольких неудачных попыток письмо пропускается',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Разобрать очередь и завершиться',
+        )
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        self.max_attempts = options['max_attempts']
+        connection = get_connection()
+        total = 0
+        try:
+            while True:
+                sent = self.send_batch(connection)
+                total += sent
+                if sent:
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            connection.close()
+        self.stdout.write(self.style.SUCCESS(f'Отправлено писем: {total}'))
+
+    def send_batch(self, connection):
+        emails = list(
+            OutgoingEmail.objects
+            .filter(sent_at=None, attempts__lt=self.max_attempts)
+            .order_by('id')[:self.batch_size]
+        )
+        if not emails:
+            return 0
+        ids = [email.id for email in emails]
+        messages = [
+            EmailMessage(email.subject, email.body, email.from_email,
+                         [email.to], connection=connection)
+            for email in emails
+        ]
+        try:
+            connection.open()
+            connection.send_messages(messages)
+        except Exception as error:
+            connection.close()
+            OutgoingEmail.objects.filter(id__in=ids).update(
+                attempts=F('attempts') + 1
+            )
+            self.stderr.write(f'Не удалось отправить письма: {error}')
+            return 0
+        OutgoingEmail.objects.filter(id__in=ids).update(
+            sent_at=timezone.now(), attempts=F('attempts') + 1
+        )
+        return len(emails)
@@ -0,0 +1,58 @@
+from django.db import migrations
+
+# Снимок reviews.search на момент миграции: модуль может меняться,
+# а миграция должна строить индекс в том виде, который был тогда.
+SEARCH_TABLE = 'reviews_title_search'
+
+
+def normalize(text):
+    return (text or '').casefold().replace('ё', 'е')
+
+
+def create_search_table(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5('
+        'name, description, genres, category, '
+        "tokenize='unicode61 remove_diacritics 2')"
+    )
+    connection.ensure_connection()
+    connection.connection.create_function(
+        'yamdb_normalize', 1, normalize, deterministic=True
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE} '
+            '(rowid, name, description, genres, category) '
+            'SELECT t.id, yamdb_normalize(t.name), '
+            'yamdb_normalize(t.description), '
+            "yamdb_normalize(group_concat(g.name, ' ')), "
+            'yamdb_normalize(c.name) '
+            'FROM reviews_title t '
+            'LEFT JOIN reviews_category c ON c.id = t.category_id '
+            'LEFT JOIN reviews_title_genre tg ON tg.title_id = t.id '
+            'LEFT JOIN reviews_genre g ON g.id = tg.genre_id '
+            'GROUP BY t.id'
+        )
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')"
+        )
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
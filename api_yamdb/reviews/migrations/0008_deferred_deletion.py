@@ -0,0 +1,50 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_title_ordering'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('title', 'произведение'), ('genre', 'жанр'), ('category', 'категория'), ('user', 'пользователь')], max_length=20, verbose_name='Тип объекта')),
+                ('object_id', models.PositiveIntegerField(verbose_name='ID объекта')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата постановки в очередь')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата завершения')),
+                ('total', models.PositiveIntegerField(blank=True, null=True, verbose_name='Строк к обработке')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='Обработано строк')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Неудачные попытки')),
+            ],
+            options={
+                'verbose_name': 'Удаление в очереди',
+                'verbose_name_plural': 'Очередь удалений',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='is_hidden',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Ждёт удаления'),
+        ),
+        migrations.AddField(
+            model_name='genre',
+            name='is_hidden',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Ждёт удаления'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='is_hidden',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Ждёт удаления'),
+        ),
+        migrations.AddIndex(
+            model_name='deletionjob',
+            index=models.Index(fields=['finished_at', 'id'], name='deletion_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_score_histogram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarityRun',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(max_length=20, verbose_name='Мера сходства')),
+                ('top_k', models.PositiveSmallIntegerField(verbose_name='Соседей у произведения')),
+                ('min_common', models.PositiveSmallIntegerField(verbose_name='Минимум общих оценок')),
+                ('started_at', models.DateTimeField(verbose_name='Дата начала')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата завершения')),
+                ('titles', models.PositiveIntegerField(default=0, verbose_name='Пересчитано произведений')),
+            ],
+            options={
+                'verbose_name': 'Расчёт похожих произведений',
+                'verbose_name_plural': 'Расчёты похожих произведений',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SimilarTitle',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Сходство')),
+            ],
+            options={
+                'verbose_name': 'Похожее произведение',
+                'verbose_name_plural': 'Похожие произведения',
+            },
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='reviews_changed_at',
+            field=models.DateTimeField(editable=False, null=True, verbose_name='Дата изменения оценок'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['reviews_changed_at'], name='title_reviews_changed_idx'),
+        ),
+        migrations.AddField(
+            model_name='similartitle',
+            name='neighbor',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reviews.Title', verbose_name='Похожее произведение'),
+        ),
+        migrations.AddField(
+            model_name='similartitle',
+            name='title',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar', to='reviews.Title', verbose_name='Произведение'),
+        ),
+        migrations.AddIndex(
+            model_name='similartitle',
+            index=models.Index(fields=['title', '-score', 'neighbor'], name='similar_title_score_idx'),
+        ),
+    ]
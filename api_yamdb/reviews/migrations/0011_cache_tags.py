@@ -0,0 +1,24 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0010_similar_titles'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheTag',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False, verbose_name='Тег')),
+                ('version', models.BigIntegerField(verbose_name='Версия')),
+            ],
+            options={
+                'verbose_name': 'Версия тега кеша',
+                'verbose_name_plural': 'Версии тегов кеша',
+            },
+        ),
+    ]
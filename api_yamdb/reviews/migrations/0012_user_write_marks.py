@@ -0,0 +1,24 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0011_cache_tags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserWriteMark',
+            fields=[
+                ('user_id', models.PositiveIntegerField(primary_key=True, serialize=False, verbose_name='Пользователь')),
+                ('written_at', models.DateTimeField(verbose_name='Время записи')),
+            ],
+            options={
+                'verbose_name': 'Запись пользователя',
+                'verbose_name_plural': 'Записи пользователей',
+            },
+        ),
+    ]
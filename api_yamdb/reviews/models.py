@@ -1,5 +1,10 @@
+from collections import Counter
+
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import ExpressionWrapper, F, FloatField
+from django.db.models.functions import Cast, NullIf
+from django.utils import timezone
 
 from api_yamdb.settings import ADMIN, MODERATOR, USER
 
@@ -49,10 +54,61 @@ class User(AbstractUser):
         ]
 
 
+SCORES = range(0, 11)
+
+
+def score_field(score):
+    """Поле произведения с числом отзывов с оценкой score."""
+    return f'score_{score}'
+
+
+SCORE_FIELDS = tuple(map(score_field, SCORES))
+
+
+def rating_changes(sum_delta, count_delta, reviews_delta=0,
+                   score_deltas=None):
+    """
+    Выражения для update(), которые сдвигают сохранённые сумму и
+    количество оценок и пересчитывают среднюю оценку в том же запросе,
+    :param score_deltas: оценка -> изменение числа отзывов с ней
+    """
+    rating_sum = F('rating_sum') + sum_delta
+    rating_count = F('rating_count') + count_delta
+    changes = {
+        'rating_sum': rating_sum,
+        'rating_count': rating_count,
+        'rating_avg': ExpressionWrapper(
+            Cast(rating_sum, FloatField()) / NullIf(rating_count, 0),
+            output_field=FloatField(),
+        ),
+        'reviews_count': F('reviews_count') + reviews_delta,
+    }
+    for score, delta in (score_deltas or {}).items():
+        if delta:
+            changes[score_field(score)] = F(score_field(score)) + delta
+    # по этой отметке build_similar_titles находит изменённые произведения
+    changes['reviews_changed_at'] = timezone.now()
+    return changes
+
+
+class VisibleManager(models.Manager):
+    """
+    Строки без отметки is_hidden. Скрытые строки ждут удаления командой
+    process_deletions и доступны через _base_manager.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_hidden=False)
+
+
 class Genre(models.Model):
     """Класс для описания жанров в бд"""
     name = models.CharField(max_length=256)
     slug = models.SlugField(unique=True, max_length=50)
+    is_hidden = models.BooleanField('Ждёт удаления', default=False,
+                                    editable=False)
+
+    objects = VisibleManager()
 
     def __str__(self):
         return f'{self.name}'
@@ -62,6 +118,10 @@ class Category(models.Model):
     """Класс для описания категорий в бд"""
     name = models.CharField(max_length=256)
     slug = models.SlugField(unique=True, max_length=50)
+    is_hidden = models.BooleanField('Ждёт удаления', default=False,
+                                    editable=False)
+
+    objects = VisibleManager()
 
     def __str__(self):
         return f'{self.name}'
@@ -81,10 +141,84 @@ class Title(models.Model):
         on_delete=models.SET_NULL,
         blank=True, null=True,
     )
+    rating_sum = models.PositiveIntegerField(
+        'Сумма оценок', default=0, editable=False
+    )
+    rating_count = models.PositiveIntegerField(
+        'Количество оценок', default=0, editable=False
+    )
+    # хранятся ради сортировки списка по индексу
+    rating_avg = models.FloatField(
+        'Средняя оценка', null=True, editable=False
+    )
+    reviews_count = models.PositiveIntegerField(
+        'Количество отзывов', default=0, editable=False
+    )
+    # распределение оценок: сколько отзывов с оценкой 0, 1, ..., 10
+    score_0 = models.PositiveIntegerField(default=0, editable=False)
+    score_1 = models.PositiveIntegerField(default=0, editable=False)
+    score_2 = models.PositiveIntegerField(default=0, editable=False)
+    score_3 = models.PositiveIntegerField(default=0, editable=False)
+    score_4 = models.PositiveIntegerField(default=0, editable=False)
+    score_5 = models.PositiveIntegerField(default=0, editable=False)
+    score_6 = models.PositiveIntegerField(default=0, editable=False)
+    score_7 = models.PositiveIntegerField(default=0, editable=False)
+    score_8 = models.PositiveIntegerField(default=0, editable=False)
+    score_9 = models.PositiveIntegerField(default=0, editable=False)
+    score_10 = models.PositiveIntegerField(default=0, editable=False)
+    reviews_changed_at = models.DateTimeField(
+        'Дата изменения оценок', null=True, editable=False
+    )
+    is_hidden = models.BooleanField('Ждёт удаления', default=False,
+                                    editable=False)
+
+    objects = VisibleManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['year'], name='title_year_idx'),
+            models.Index(fields=['category', 'year'],
+                         name='title_category_year_idx'),
+            models.Index(fields=['rating_avg', 'id'],
+                         name='title_rating_idx'),
+            models.Index(fields=['category', 'rating_avg', 'id'],
+                         name='title_category_rating_idx'),
+            models.Index(fields=['reviews_count', 'id'],
+                         name='title_reviews_count_idx'),
+            models.Index(fields=['name', 'id'], name='title_name_idx'),
+            models.Index(fields=['reviews_changed_at'],
+                         name='title_reviews_changed_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    @property
+    def rating(self):
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
+
+    def update_rating(self, old_score=None, new_score=None, reviews_delta=0):
+        """
+        Учитывает изменение оценки отзыва в сохранённых сумме и количестве,
+        :param old_score: оценка до изменения (None для нового отзыва)
+        :param new_score: оценка после изменения (None для удалённого)
+        :param reviews_delta: 1 для нового отзыва, -1 для удалённого
+        """
+        sum_delta = (new_score or 0) - (old_score or 0)
+        count_delta = (new_score is not None) - (old_score is not None)
+        if not sum_delta and not count_delta and not reviews_delta:
+            return
+        score_deltas = Counter()
+        if old_score is not None:
+            score_deltas[old_score] -= 1
+        if new_score is not None:
+            score_deltas[new_score] += 1
+        Title.objects.filter(pk=self.pk).update(**rating_changes(
+            sum_delta, count_delta, reviews_delta, score_deltas
+        ))
+
 
 class Review(models.Model):
     """
@@ -120,7 +254,13 @@ class Review(models.Model):
     class Meta:
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
-        ordering = ['-pub_date']
+        ordering = ['-pub_date', '-id']
+        indexes = [
+            models.Index(fields=['title', '-pub_date', '-id'],
+                         name='review_title_feed_idx'),
+            models.Index(fields=['title', 'score'],
+                         name='review_title_score_idx'),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['author', 'title'], name='unique_author_title'
@@ -160,7 +300,160 @@ class Comments(models.Model):
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
-        ordering = ['-pub_date']
+        ordering = ['-pub_date', '-id']
+        indexes = [
+            models.Index(fields=['review', '-pub_date', '-id'],
+                         name='comments_review_feed_idx'),
+        ]
 
     def __str__(self):
         return self.text
+
+
+class OutgoingEmail(models.Model):
+    """
+    Очередь писем, которые отправляет команда send_emails
+    """
+    subject = models.CharField('Тема', max_length=255)
+    body = models.TextField('Текст письма')
+    from_email = models.EmailField('Отправитель')
+    to = models.EmailField('Получатель')
+    created = models.DateTimeField('Дата постановки в очередь',
+                                   auto_now_add=True)
+    sent_at = models.DateTimeField('Дата отправки', blank=True, null=True)
+    attempts = models.PositiveSmallIntegerField('Попытки отправки',
+                                                default=0)
+
+    class Meta:
+        verbose_name = 'Письмо в очереди'
+        verbose_name_plural = 'Очередь писем'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['sent_at', 'id'], name='outbox_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.to}: {self.subject}'
+
+
+class DeletionJob(models.Model):
+    """
+    Очередь удалений, которые по частям выполняет команда process_deletions
+    """
+    TITLE = 'title'
+    GENRE = 'genre'
+    CATEGORY = 'category'
+    USER = 'user'
+    KINDS = (
+        (TITLE, 'произведение'),
+        (GENRE, 'жанр'),
+        (CATEGORY, 'категория'),
+        (USER, 'пользователь'),
+    )
+    kind = models.CharField('Тип объекта', max_length=20, choices=KINDS)
+    object_id = models.PositiveIntegerField('ID объекта')
+    created = models.DateTimeField('Дата постановки в очередь',
+                                   auto_now_add=True)
+    finished_at = models.DateTimeField('Дата завершения', blank=True,
+                                       null=True)
+    total = models.PositiveIntegerField('Строк к обработке', blank=True,
+                                        null=True)
+    processed = models.PositiveIntegerField('Обработано строк', default=0)
+    attempts = models.PositiveSmallIntegerField('Неудачные попытки',
+                                                default=0)
+
+    class Meta:
+        verbose_name = 'Удаление в очереди'
+        verbose_name_plural = 'Очередь удалений'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['finished_at', 'id'],
+                         name='deletion_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.get_kind_display()} {self.object_id}'
+
+
+class SimilarTitle(models.Model):
+    """
+    Ближайшие соседи произведения по оценкам одних и тех же
+    пользователей, таблицу заполняет команда build_similar_titles
+    """
+    title = models.ForeignKey(
+        Title, on_delete=models.CASCADE, related_name='similar',
+        verbose_name='Произведение',
+    )
+    neighbor = models.ForeignKey(
+        Title, on_delete=models.CASCADE, related_name='+',
+        verbose_name='Похожее произведение',
+    )
+    score = models.FloatField('Сходство')
+
+    class Meta:
+        verbose_name = 'Похожее произведение'
+        verbose_name_plural = 'Похожие произведения'
+        indexes = [
+            models.Index(fields=['title', '-score', 'neighbor'],
+                         name='similar_title_score_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.title_id} -> {self.neighbor_id}: {self.score}'
+
+
+class SimilarityRun(models.Model):
+    """
+    Прогон build_similar_titles: следующий прогон с теми же
+    параметрами пересчитывает только изменившиеся с его начала оценки
+    """
+    metric = models.CharField('Мера сходства', max_length=20)
+    top_k = models.PositiveSmallIntegerField('Соседей у произведения')
+    min_common = models.PositiveSmallIntegerField('Минимум общих оценок')
+    started_at = models.DateTimeField('Дата начала')
+    finished_at = models.DateTimeField('Дата завершения', blank=True,
+                                       null=True)
+    titles = models.PositiveIntegerField('Пересчитано произведений',
+                                         default=0)
+
+    class Meta:
+        verbose_name = 'Расчёт похожих произведений'
+        verbose_name_plural = 'Расчёты похожих произведений'
+        ordering = ['id']
+
+    def __str__(self):
+        return f'{self.metric} {self.started_at}'
+
+
+class CacheTag(models.Model):
+    """
+    Версия тега кеша ответов API — время последнего изменения
+    в наносекундах. Версии хранятся в базе, чтобы все процессы видели
+    одну версию, и меняются в одной транзакции с данными
+    """
+    name = models.CharField('Тег', max_length=100, primary_key=True)
+    version = models.BigIntegerField('Версия')
+
+    class Meta:
+        verbose_name = 'Версия тега кеша'
+        verbose_name_plural = 'Версии тегов кеша'
+
+    def __str__(self):
+        return f'{self.name}: {self.version}'
+
+
+class UserWriteMark(models.Model):
+    """
+    Время последней успешной записи пользователя: после неё он
+    REPLICA_STICKY_SECONDS читает с основной базы. Одна строка
+    на пользователя, каждая запись её перезаписывает
+    """
+    user_id = models.PositiveIntegerField('Пользователь', primary_key=True)
+    written_at = models.DateTimeField('Время записи')
+
+    class Meta:
+        verbose_name = 'Запись пользователя'
+        verbose_name_plural = 'Записи пользователей'
+
+    def __str__(self):
+        return f'{self.user_id}: {self.written_at}'
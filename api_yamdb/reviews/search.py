@@ -0,0 +1,126 @@
+import re
+
+from django.db import connection
+
+SEARCH_TABLE = 'reviews_title_search'
+SEARCH_COLUMNS = ('name', 'description', 'genres', 'category')
+# ограничение SQLite на число параметров в одном запросе
+MAX_PARAMS = 500
+
+
+def normalize(text):
+    """
+    Приводит текст к виду, в котором он хранится в поисковом индексе:
+    регистр сворачивается для любых букв, ё заменяется на е.
+    """
+    return (text or '').casefold().replace('ё', 'е')
+
+
+def is_supported():
+    return connection.vendor == 'sqlite'
+
+
+def build_match_query(text):
+    """
+    Превращает запрос пользователя в выражение FTS5: все слова
+    должны встретиться, каждое слово ищется как префикс.
+    """
+    words = re.findall(r'\w+', normalize(text))
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def register_normalize():
+    """Добавляет normalize в SQLite как функцию yamdb_normalize."""
+    connection.ensure_connection()
+    connection.connection.create_function(
+        'yamdb_normalize', 1, normalize, deterministic=True
+    )
+
+
+def chunks(ids, size=MAX_PARAMS):
+    ids = list(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def index_insert_sql(where):
+    """
+    INSERT строк индекса из таблиц произведений, жанров и категорий,
+    нормализация выполняется в SQLite функцией yamdb_normalize.
+    """
+    from .models import Category, Genre, Title
+
+    title = Title._meta.db_table
+    through = Title.genre.through._meta.db_table
+    return (
+        f'INSERT INTO {SEARCH_TABLE} (rowid, {", ".join(SEARCH_COLUMNS)}) '
+        f'SELECT t.id, yamdb_normalize(t.name), '
+        f'yamdb_normalize(t.description), '
+        f"yamdb_normalize(group_concat(g.name, ' ')), "
+        f'yamdb_normalize(c.name) '
+        f'FROM {title} t '
+        f'LEFT JOIN {Category._meta.db_table} c ON c.id = t.category_id '
+        f'LEFT JOIN {through} tg ON tg.title_id = t.id '
+        f'LEFT JOIN {Genre._meta.db_table} g ON g.id = tg.genre_id '
+        f'{where} GROUP BY t.id'
+    )
+
+
+def remove_titles(title_ids):
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        for chunk in chunks(title_ids):
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(
+                f'DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})',
+                chunk,
+            )
+
+
+def index_titles(title_ids):
+    """Перестраивает строки поискового индекса для произведений."""
+    if not is_supported():
+        return
+    register_normalize()
+    with connection.cursor() as cursor:
+        for chunk in chunks(title_ids):
+            remove_titles(chunk)
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(
+                index_insert_sql(f'WHERE t.id IN ({placeholders})'), chunk
+            )
+
+
+def rebuild_index():
+    if not is_supported():
+        return 0
+    register_normalize()
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        cursor.execute(index_insert_sql(''))
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')"
+        )
+        cursor.execute(f'SELECT count(*) FROM {SEARCH_TABLE}')
+        return cursor.fetchone()[0]
+
+
+def search_titles(queryset, text):
+    """
+    Оставляет в queryset произведения, найденные по тексту,
+    и сортирует их по релевантности.
+    """
+    match = build_match_query(text)
+    if not match:
+        return queryset
+    if not is_supported():
+        return queryset.filter(name__icontains=text)
+    table = queryset.model._meta.db_table
+    return queryset.extra(
+        tables=[SEARCH_TABLE],
+        where=[f'{SEARCH_TABLE}.rowid = {table}.id',
+               f'{SEARCH_TABLE} MATCH %s'],
+        params=[match],
+        order_by=[f'{SEARCH_TABLE}.rank', f'{table}.id'],
+    )
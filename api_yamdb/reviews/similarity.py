@@ -0,0 +1,104 @@
+import heapq
+import math
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+COSINE = 'cosine'
+PEARSON = 'pearson'
+METRICS = (COSINE, PEARSON)
+
+# матрица процесса-исполнителя, её задаёт init_matrix
+_matrix = None
+
+
+class ScoreMatrix:
+    """
+    Разреженная матрица оценок пользователь x произведение: строки
+    хранятся по произведениям и по пользователям, чтобы скалярные
+    произведения считались только по общим оценкам.
+    """
+
+    def __init__(self, reviews, metric=COSINE):
+        """
+        :param reviews: тройки (author_id, title_id, score)
+        :param metric: cosine или pearson — косинус оценок, отсчитанных
+                       от средней оценки произведения
+        """
+        self.titles = defaultdict(list)
+        for author_id, title_id, score in reviews:
+            self.titles[title_id].append((author_id, float(score)))
+        if metric == PEARSON:
+            for title_id, column in self.titles.items():
+                mean = sum(score for _, score in column) / len(column)
+                self.titles[title_id] = [(author_id, score - mean)
+                                         for author_id, score in column]
+        self.users = defaultdict(list)
+        self.norms = {}
+        for title_id, column in self.titles.items():
+            for author_id, score in column:
+                self.users[author_id].append((title_id, score))
+            self.norms[title_id] = math.sqrt(
+                sum(score * score for _, score in column))
+
+    def co_rated(self, title_ids):
+        """Произведения, у которых есть общий оценщик с title_ids."""
+        result = set()
+        for title_id in title_ids:
+            for author_id, _ in self.titles.get(title_id, ()):
+                result.update(other for other, _ in self.users[author_id])
+        return result
+
+    def neighbors(self, title_id, top_k, min_common):
+        """
+        top_k произведений с наибольшим положительным сходством и хотя
+        бы min_common общими оценщиками,
+        :return: список (сходство, id соседа) по убыванию сходства
+        """
+        norm = self.norms.get(title_id)
+        if not norm:
+            return []
+        dots = defaultdict(float)
+        common = defaultdict(int)
+        for author_id, score in self.titles[title_id]:
+            for other, other_score in self.users[author_id]:
+                dots[other] += score * other_score
+                common[other] += 1
+        candidates = []
+        for other, dot in dots.items():
+            other_norm = self.norms[other]
+            if (other == title_id or common[other] < min_common
+                    or not other_norm or dot <= 0):
+                continue
+            candidates.append((round(dot / (norm * other_norm), 6), -other))
+        return [(score, -other) for score, other
+                in heapq.nlargest(top_k, candidates)]
+
+
+def init_matrix(matrix):
+    global _matrix
+    _matrix = matrix
+
+
+def neighbors_chunk(title_ids, top_k, min_common):
+    return {title_id: _matrix.neighbors(title_id, top_k, min_common)
+            for title_id in title_ids}
+
+
+def compute_neighbors(matrix, chunks, top_k, min_common, workers=1):
+    """
+    Соседи произведений пачками chunks. При workers > 1 пачки
+    считаются в пуле процессов, матрица передаётся каждому процессу
+    один раз при запуске,
+    :return: итератор словарей {id произведения: соседи} по пачкам
+    """
+    if workers <= 1:
+        init_matrix(matrix)
+        for chunk in chunks:
+            yield neighbors_chunk(chunk, top_k, min_common)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_matrix,
+                             initargs=(matrix,)) as executor:
+        chunks = list(chunks)
+        yield from executor.map(neighbors_chunk, chunks,
+                                [top_k] * len(chunks),
+                                [min_common] * len(chunks))
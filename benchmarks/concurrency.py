@@ -0,0 +1,242 @@
+"""
+Пропускная способность WSGI и ASGI при большом числе одновременных
+клиентов на маршрутах чтения каталога.
+
+WSGI-приложение обслуживает многопоточный сервер wsgiref (поток на
+соединение), ASGI-приложение — минимальный HTTP-сервер на asyncio из
+этого файла. Клиенты на asyncio держат --concurrency одновременных
+соединений, оба сервера работают с одной и той же базой:
+
+    python benchmarks/concurrency.py --concurrency 200 --requests 5000
+"""
+import argparse
+import asyncio
+import json
+import sys
+import threading
+import time
+from socketserver import ThreadingMixIn
+from urllib.parse import unquote
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from routes import SIZES, percentile
+from utils import setup_django
+
+HOST = '127.0.0.1'
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def start_wsgi(port):
+    from django.core.wsgi import get_wsgi_application
+
+    server = make_server(HOST, port, get_wsgi_application(),
+                         server_class=ThreadingWSGIServer,
+                         handler_class=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.shutdown
+
+
+async def handle_asgi(app, reader, writer):
+    """Один запрос HTTP/1.1 с Connection: close."""
+    try:
+        method, target, version = (
+            (await reader.readline()).decode('latin-1').split())
+        headers = []
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers.append((name.strip().lower().encode('latin-1'),
+                            value.strip().encode('latin-1')))
+        length = int(dict(headers).get(b'content-length', 0))
+        body = await reader.readexactly(length) if length else b''
+        path, _, query = target.partition('?')
+        scope = {
+            'type': 'http',
+            'method': method,
+            'path': unquote(path),
+            'query_string': query.encode('latin-1'),
+            'headers': headers,
+            'http_version': version.split('/')[1],
+            'server': writer.get_extra_info('sockname')[:2],
+            'client': writer.get_extra_info('peername')[:2],
+        }
+
+        async def receive():
+            return {'type': 'http.request', 'body': body}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                writer.write(
+                    f'HTTP/1.1 {message["status"]} \r\n'.encode()
+                    + b''.join(name + b': ' + value + b'\r\n'
+                               for name, value in message['headers'])
+                    + b'Connection: close\r\n\r\n'
+                )
+            else:
+                writer.write(message.get('body', b''))
+            await writer.drain()
+
+        await app(scope, receive, send)
+    finally:
+        writer.close()
+
+
+def start_asgi(port):
+    from api_yamdb.asgi import application
+
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+
+    async def serve():
+        server = await asyncio.start_server(
+            lambda reader, writer: handle_asgi(application, reader, writer),
+            HOST, port, backlog=1024,
+        )
+        ready.set()
+        async with server:
+            await server.serve_forever()
+
+    task = loop.create_task(serve())
+
+    def run():
+        try:
+            loop.run_until_complete(task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            loop.close()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    ready.wait()
+
+    def stop():
+        # отмена serve_forever закрывает сервер, цикл завершается сам
+        loop.call_soon_threadsafe(task.cancel)
+        thread.join()
+
+    return stop
+
+
+async def fetch(port, path):
+    reader, writer = await asyncio.open_connection(HOST, port)
+    writer.write(
+        f'GET {path} HTTP/1.1\r\nHost: {HOST}\r\n'
+        'Accept: application/json\r\nConnection: close\r\n\r\n'.encode()
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return int(response[9:12])
+
+
+async def load(port, paths, requests, concurrency):
+    latencies, errors = [], 0
+    counter = iter(range(requests))
+
+    async def client():
+        nonlocal errors
+        for index in counter:
+            started = time.perf_counter()
+            try:
+                status = await fetch(port, paths[index % len(paths)])
+            except OSError:
+                status = 599
+            latencies.append(time.perf_counter() - started)
+            errors += status >= 400
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        'requests': requests,
+        'errors': errors,
+        'throughput_rps': round(requests / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+def read_paths():
+    from django.db.models import Count
+
+    from reviews.models import Review, Title
+
+    title_id = (Title.objects.order_by('-rating_count', 'id')
+                .values_list('id', flat=True).first())
+    review_id = (Review.objects.filter(title_id=title_id)
+                 .annotate(comments_count=Count('comments'))
+                 .order_by('-comments_count', 'id')
+                 .values_list('id', flat=True).first())
+    title_ids = list(Title.objects.values_list('id', flat=True)[:50])
+    paths = ['/api/v1/genres/', '/api/v1/categories/']
+    for page in range(1, 11):
+        paths.append(f'/api/v1/titles/?page={page}')
+        paths.append(f'/api/v1/titles/{title_id}/reviews/?page={page}')
+    paths.append(f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/')
+    paths.extend(f'/api/v1/titles/{pk}/' for pk in title_ids)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    for name, default in SIZES:
+        parser.add_argument(f'--{name}', type=int, default=default)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--cache', action='store_true',
+                        help='включить кеш ответов API')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--output', help='сохранить результат в JSON')
+    parser.add_argument('--db', help='путь к файлу базы SQLite')
+    args = parser.parse_args()
+
+    setup_django(args.db)
+    from django.conf import settings
+    from django.core.management import call_command
+
+    settings.DEBUG = False
+    if not args.cache:
+        settings.CACHES['api'] = {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+    call_command('seed', seed=args.seed, stdout=sys.stderr,
+                 **{name: getattr(args, name) for name, _ in SIZES})
+    paths = read_paths()
+
+    results = {}
+    for offset, (name, start) in enumerate((('wsgi', start_wsgi),
+                                            ('asgi', start_asgi))):
+        port = args.port + offset
+        stop = start(port)
+        asyncio.run(load(port, paths, min(args.requests, 100),
+                         args.concurrency))
+        results[name] = asyncio.run(
+            load(port, paths, args.requests, args.concurrency))
+        stop()
+        result = results[name]
+        print(f'{name}: {result["throughput_rps"]:>8} rps  '
+              f'p50 {result["p50_ms"]:>9} ms  p95 {result["p95_ms"]:>9} ms  '
+              f'p99 {result["p99_ms"]:>9} ms  errors {result["errors"]}')
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump({'concurrency': args.concurrency, **results}, output,
+                      indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+"""
+Планы и время горячих запросов без индексов из reviews.models и с ними.
+
+    python benchmarks/query_plans.py --reviews 1000000
+"""
+import argparse
+import random
+import time
+
+from utils import setup_django
+
+INDEXES = (
+    'review_title_feed_idx',
+    'review_title_score_idx',
+    'comments_review_feed_idx',
+    'title_year_idx',
+    'title_category_year_idx',
+)
+
+
+def seed(reviews_count, rng):
+    from django.db import connection, transaction
+    from django.utils import timezone
+
+    from reviews.models import (SCORE_FIELDS, Category, Comments, Review,
+                                Title, User)
+
+    titles_count = max(reviews_count // 100, 10)
+    users_count = max(reviews_count // 100, 100)
+    per_user = reviews_count // users_count
+    comments_count = reviews_count // 5
+    now = timezone.now().isoformat(' ')
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {Category._meta.db_table} '
+            '(id, name, slug, is_hidden) VALUES (%s, %s, %s, 0)',
+            [(i, f'Категория {i}', f'category-{i}') for i in range(1, 11)],
+        )
+        cursor.executemany(
+            f'INSERT INTO {Title._meta.db_table} '
+            '(id, name, year, category_id, rating_sum, rating_count, '
+            f'reviews_count, is_hidden, {", ".join(SCORE_FIELDS)}) '
+            f'VALUES (%s, %s, %s, %s, 0, 0, 0, 0{", 0" * len(SCORE_FIELDS)})',
+            ((i, f'Произведение {i}', rng.randint(1900, 2021),
+              rng.randint(1, 10)) for i in range(1, titles_count + 1)),
+        )
+        cursor.executemany(
+            f'INSERT INTO {User._meta.db_table} (id, password, is_superuser, '
+            'username, first_name, last_name, email, is_staff, is_active, '
+            'date_joined, bio, role) VALUES '
+            "(%s, '!', 0, %s, '', '', %s, 0, 1, %s, '', 'user')",
+            ((i, f'user{i}', f'user{i}@yamdb.fake', now)
+             for i in range(1, users_count + 1)),
+        )
+        cursor.executemany(
+            f'INSERT INTO {Review._meta.db_table} '
+            '(id, title_id, author_id, text, score, pub_date) '
+            'VALUES (%s, %s, %s, %s, %s, %s)',
+            ((user * per_user + n + 1, title, user + 1, 'Отзыв',
+              rng.randint(0, 10), now)
+             for user in range(users_count)
+             for n, title in enumerate(
+                 rng.sample(range(1, titles_count + 1), per_user))),
+        )
+        cursor.executemany(
+            f'INSERT INTO {Comments._meta.db_table} '
+            '(id, review_id, author_id, text, pub_date) '
+            'VALUES (%s, %s, %s, %s, %s)',
+            ((i, rng.randint(1, users_count * per_user),
+              rng.randint(1, users_count), 'Комментарий', now)
+             for i in range(1, comments_count + 1)),
+        )
+        cursor.execute('ANALYZE')
+    return titles_count, users_count
+
+
+def hot_queries(titles_count, users_count):
+    from django.db.models import Count, Sum
+
+    from reviews.models import Comments, Review, Title
+
+    title_id = titles_count // 2
+    return {
+        'reviews feed': Review.objects.filter(
+            title_id=title_id).order_by('-pub_date', '-id')[:6],
+        'comments feed': Comments.objects.filter(
+            review_id=1).order_by('-pub_date', '-id')[:6],
+        'duplicate review check': Review.objects.filter(
+            author_id=users_count // 2, title_id=title_id),
+        'title rating rebuild': Review.objects.exclude(score=None).values(
+            'title').annotate(Sum('score'), Count('id')).order_by('title'),
+        'titles by year': Title.objects.filter(year=2000),
+        'titles by category and year': Title.objects.filter(
+            category_id=3, year=2000),
+    }
+
+
+def measure(queries, repeat):
+    from django.db import connection
+
+    report = {}
+    with connection.cursor() as cursor:
+        for name, queryset in queries.items():
+            sql, params = queryset.query.sql_with_params()
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = [row[-1] for row in cursor.fetchall()]
+            started = time.perf_counter()
+            for _ in range(repeat):
+                cursor.execute(sql, params)
+                cursor.fetchall()
+            elapsed = (time.perf_counter() - started) / repeat
+            report[name] = (plan, elapsed)
+    return report
+
+
+def model_indexes():
+    from django.apps import apps
+
+    for model in apps.get_app_config('reviews').get_models():
+        for index in model._meta.indexes:
+            if index.name in INDEXES:
+                yield model, index
+
+
+def drop_indexes():
+    from django.db import connection
+
+    with connection.schema_editor() as editor:
+        for model, index in model_indexes():
+            editor.remove_index(model, index)
+    # закэшированные планы запросов переживают изменение схемы
+    connection.close()
+
+
+def create_indexes():
+    from django.db import connection
+
+    with connection.schema_editor() as editor:
+        for model, index in model_indexes():
+            editor.add_index(model, index)
+        editor.execute('ANALYZE')
+    connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--reviews', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--db', help='путь к файлу базы SQLite')
+    args = parser.parse_args()
+
+    db_path = setup_django(args.db)
+    print(f'База: {db_path}, отзывов: {args.reviews}')
+    sizes = seed(args.reviews, random.Random(args.seed))
+    queries = hot_queries(*sizes)
+    drop_indexes()
+    before = measure(queries, args.repeat)
+    create_indexes()
+    after = measure(queries, args.repeat)
+    for name in queries:
+        print(f'\n{name}')
+        for label, report in (('до', before), ('после', after)):
+            plan, elapsed = report[name]
+            print(f'  {label}: {elapsed * 1000:.2f} мс')
+            for line in plan:
+                print(f'    {line}')
+
+
+if __name__ == '__main__':
+    main()
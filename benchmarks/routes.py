@@ -0,0 +1,399 @@
+"""
+Нагрузочный прогон всех маршрутов api/urls.py внутри процесса.
+
+Для каждого сценария считаются пропускная способность, задержки
+p50/p95/p99, число SQL-запросов на запрос и пиковая память.
+Отчёт сохраняется в JSON и может сравниваться с базовым:
+
+    python benchmarks/routes.py --output report.json
+    python benchmarks/routes.py --baseline benchmarks/baseline.json
+
+Если медиана задержки или пиковая память сценария выросли больше
+чем на --threshold или он выполняет больше запросов к базе, скрипт
+завершится с кодом 1. Отчёты с другими размерами данных, --seed,
+--requests, --warmup или --cache не сравниваются: скрипт завершится
+с кодом 2.
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+from utils import setup_django
+
+SIZES = (
+    ('users', 1000),
+    ('categories', 10),
+    ('genres', 30),
+    ('titles', 1000),
+    ('reviews', 20000),
+    ('comments', 5000),
+)
+
+
+class QueryCounter:
+    """Обёртка для connection.execute_wrapper, считает SQL-запросы."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Context:
+    """Данные, к которым обращаются сценарии, и клиенты для ролей."""
+
+    def __init__(self):
+        from django.contrib.auth.tokens import default_token_generator
+        from django.db.models import Count
+        from django.test import Client
+
+        from api.authentication import RoleAccessToken
+        from api_yamdb.settings import ADMIN, USER
+        from reviews.models import Category, Genre, Review, Title, User
+
+        self.make_code = default_token_generator.make_token
+        self.users = User
+        admin = User.objects.create(username='bench-admin', role=ADMIN,
+                                    email='bench-admin@yamdb.fake')
+        self.user = User.objects.create(username='bench-user', role=USER,
+                                        email='bench-user@yamdb.fake')
+        self.clients = {'anon': Client()}
+        for role, user in (('admin', admin), ('user', self.user)):
+            self.clients[role] = Client(
+                HTTP_AUTHORIZATION=f'Bearer {RoleAccessToken.for_user(user)}'
+            )
+        self.title_ids = list(Title.objects.order_by('id')
+                              .values_list('id', flat=True))
+        self.genres = list(Genre.objects.values_list('slug', flat=True))
+        self.categories = list(Category.objects.values_list('slug',
+                                                            flat=True))
+        self.usernames = list(User.objects.filter(username__startswith='seed')
+                              .values_list('username', flat=True))
+        # самое популярное произведение и его самый обсуждаемый отзыв
+        self.title_id = (Title.objects.order_by('-rating_count', 'id')
+                         .values_list('id', flat=True).first())
+        self.review_id = (
+            Review.objects.filter(title_id=self.title_id)
+            .annotate(comments_count=Count('comments'))
+            .order_by('-comments_count', 'id')
+            .values_list('id', flat=True).first()
+        )
+        self.created = {}
+
+    def pick(self, items, index):
+        return items[index % len(items)]
+
+    def created_id(self, scenario, index, key='id'):
+        return self.pick(self.created[scenario], index)[key]
+
+    def reviews_path(self):
+        return f'/api/v1/titles/{self.title_id}/reviews/'
+
+    def comments_path(self):
+        return f'{self.reviews_path()}{self.review_id}/comments/'
+
+    def token_data(self, index):
+        user = self.users.objects.get(username=f'bench-signup-{index}')
+        return {'username': user.username,
+                'confirmation_code': self.make_code(user)}
+
+
+# (имя, метод, роль, функция (контекст, номер) -> (путь, данные)),
+# сценарии изменения и удаления работают с объектами,
+# созданными предыдущими сценариями
+SCENARIOS = (
+    ('titles_list', 'GET', 'anon',
+     lambda c, i: ('/api/v1/titles/', None)),
+    ('titles_list_page', 'GET', 'anon',
+     lambda c, i: (f'/api/v1/titles/?page={i % 50 + 1}', None)),
+    ('titles_detail', 'GET', 'anon',
+     lambda c, i: (f'/api/v1/titles/{c.pick(c.title_ids, i)}/', None)),
+    ('titles_filter', 'GET', 'anon',
+     lambda c, i: (f'/api/v1/titles/?genre={c.pick(c.genres, i)}'
+                   f'&category={c.pick(c.categories, i)}', None)),
+    ('titles_search', 'GET', 'anon',
+     lambda c, i: (f'/api/v1/titles/?search='
+                   f'{("туман", "ёжик", "город", "мир")[i % 4]}', None)),
+    ('titles_create', 'POST', 'admin',
+     lambda c, i: ('/api/v1/titles/', {
+         'name': f'Бенчмарк {i}', 'year': 2000,
+         'genre': [c.pick(c.genres, i)],
+         'category': c.pick(c.categories, i)})),
+    ('titles_update', 'PATCH', 'admin',
+     lambda c, i: (f'/api/v1/titles/{c.created_id("titles_create", i)}/',
+                   {'year': 2001})),
+    ('titles_delete', 'DELETE', 'admin',
+     lambda c, i: (f'/api/v1/titles/{c.created_id("titles_create", i)}/',
+                   None)),
+    ('genres_list', 'GET', 'anon',
+     lambda c, i: ('/api/v1/genres/', None)),
+    ('genres_create', 'POST', 'admin',
+     lambda c, i: ('/api/v1/genres/',
+                   {'name': f'Бенчмарк {i}', 'slug': f'bench-{i}'})),
+    ('genres_delete', 'DELETE', 'admin',
+     lambda c, i: (f'/api/v1/genres/bench-{i}/', None)),
+    ('categories_list', 'GET', 'anon',
+     lambda c, i: ('/api/v1/categories/', None)),
+    ('categories_create', 'POST', 'admin',
+     lambda c, i: ('/api/v1/categories/',
+                   {'name': f'Бенчмарк {i}', 'slug': f'bench-{i}'})),
+    ('categories_delete', 'DELETE', 'admin',
+     lambda c, i: (f'/api/v1/categories/bench-{i}/', None)),
+    ('reviews_list', 'GET', 'anon',
+     lambda c, i: (f'{c.reviews_path()}?page={i % 20 + 1}', None)),
+    ('reviews_list_cursor', 'GET', 'anon',
+     lambda c, i: (f'{c.reviews_path()}?pagination=cursor', None)),
+    ('reviews_detail', 'GET', 'anon',
+     lambda c, i: (f'{c.reviews_path()}{c.review_id}/', None)),
+    ('reviews_create', 'POST', 'user',
+     lambda c, i: (f'/api/v1/titles/{c.pick(c.title_ids, i)}/reviews/',
+                   {'text': 'Отзыв из бенчмарка', 'score': i % 11})),
+    ('reviews_update', 'PATCH', 'user',
+     lambda c, i: (f'/api/v1/titles/{c.pick(c.title_ids, i)}/reviews/'
+                   f'{c.created_id("reviews_create", i)}/', {'score': 5})),
+    ('reviews_delete', 'DELETE', 'user',
+     lambda c, i: (f'/api/v1/titles/{c.pick(c.title_ids, i)}/reviews/'
+                   f'{c.created_id("reviews_create", i)}/', None)),
+    ('comments_create', 'POST', 'user',
+     lambda c, i: (c.comments_path(), {'text': 'Комментарий'})),
+    ('comments_list', 'GET', 'anon',
+     lambda c, i: (f'{c.comments_path()}?page={i % 5 + 1}', None)),
+    ('comments_detail', 'GET', 'anon',
+     lambda c, i: (f'{c.comments_path()}'
+                   f'{c.created_id("comments_create", i)}/', None)),
+    ('comments_update', 'PATCH', 'user',
+     lambda c, i: (f'{c.comments_path()}'
+                   f'{c.created_id("comments_create", i)}/',
+                   {'text': 'Исправленный комментарий'})),
+    ('comments_delete', 'DELETE', 'user',
+     lambda c, i: (f'{c.comments_path()}'
+                   f'{c.created_id("comments_create", i)}/', None)),
+    ('signup', 'POST', 'anon',
+     lambda c, i: ('/api/v1/auth/signup/', {
+         'username': f'bench-signup-{i}',
+         'email': f'bench-signup-{i}@yamdb.fake'})),
+    ('token', 'POST', 'anon',
+     lambda c, i: ('/api/v1/auth/token/', c.token_data(i))),
+    ('users_list', 'GET', 'admin',
+     lambda c, i: ('/api/v1/users/', None)),
+    ('users_search', 'GET', 'admin',
+     lambda c, i: (f'/api/v1/users/?search=seed{i}', None)),
+    ('users_detail', 'GET', 'admin',
+     lambda c, i: (f'/api/v1/users/{c.pick(c.usernames, i)}/', None)),
+    ('users_create', 'POST', 'admin',
+     lambda c, i: ('/api/v1/users/', {
+         'username': f'bench-{i}', 'email': f'bench-{i}@yamdb.fake'})),
+    ('users_update', 'PATCH', 'admin',
+     lambda c, i: (f'/api/v1/users/bench-{i}/', {'bio': 'Обновлено'})),
+    ('users_delete', 'DELETE', 'admin',
+     lambda c, i: (f'/api/v1/users/bench-{i}/', None)),
+    ('me', 'GET', 'user',
+     lambda c, i: ('/api/v1/users/me/', None)),
+    ('me_update', 'PATCH', 'user',
+     lambda c, i: ('/api/v1/users/me/', {'bio': f'О себе {i}'})),
+)
+
+
+def percentile(values, fraction):
+    """Перцентиль по методу ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(int(round(fraction * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def send(context, name, method, role, build, index):
+    path, data = build(context, index)
+    body = json.dumps(data) if data is not None else ''
+    response = context.clients[role].generic(
+        method, path, body, content_type='application/json'
+    )
+    if method == 'POST' and response.status_code == 201:
+        context.created.setdefault(name, []).append(response.json())
+    return response.status_code
+
+
+def run_scenario(context, scenario, requests, warmup, use_cache):
+    """
+    Прогрев идёт под tracemalloc и даёт пиковую память на запрос,
+    замеры времени и числа запросов делаются без него.
+    """
+    from django.db import connection
+
+    from api.cache import get_cache
+
+    name, method, role, build = scenario
+    counter = QueryCounter()
+    latencies, queries, errors = [], [], 0
+    peak_memory = 0
+    for index in range(warmup):
+        if not use_cache:
+            get_cache().clear()
+        # первый запрос сценария может импортировать модули
+        if index == 1 or warmup == 1:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        send(context, name, method, role, build, index)
+        peak_memory = max(peak_memory, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+    with connection.execute_wrapper(counter):
+        for index in range(warmup, warmup + requests):
+            if not use_cache:
+                get_cache().clear()
+            counter.count = 0
+            started = time.perf_counter()
+            status = send(context, name, method, role, build, index)
+            latencies.append(time.perf_counter() - started)
+            queries.append(counter.count)
+            errors += status >= 400
+    total = sum(latencies)
+    return {
+        'requests': requests,
+        'errors': errors,
+        'throughput_rps': round(requests / total, 1) if total else None,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'queries': statistics.median(queries),
+        'max_queries': max(queries),
+        'peak_memory_kb': round(peak_memory / 1024, 1),
+    }
+
+
+# параметры прогона, без совпадения которых отчёты несравнимы
+COMPARABLE_META = ('sizes', 'seed', 'requests', 'warmup', 'cache')
+# версии только предупреждают: сравнение после обновления — их цель
+VERSION_META = ('python', 'django')
+
+
+def meta_differences(report, baseline, keys):
+    """Параметры из keys, которые отличаются у отчёта и базового."""
+    base_meta = baseline.get('meta', {})
+    return [
+        f'{key}: {base_meta.get(key)} -> {report["meta"][key]}'
+        for key in keys if base_meta.get(key) != report['meta'][key]
+    ]
+
+
+def compare(report, baseline, threshold, min_delta):
+    """
+    Возвращает список регрессий относительно базового отчёта:
+    рост задержек и памяти больше чем на threshold (и не меньше
+    min_delta в абсолютных единицах метрики, чтобы не ловить шум
+    на быстрых запросах) или рост числа SQL-запросов и ошибок.
+    """
+    regressions = []
+    for name, current in report['scenarios'].items():
+        base = baseline.get('scenarios', {}).get(name)
+        if base is None:
+            continue
+        for metric, floor in min_delta.items():
+            if (current[metric] > base[metric] * (1 + threshold)
+                    and current[metric] - base[metric] >= floor):
+                regressions.append(
+                    f'{name}: {metric} {base[metric]} -> {current[metric]}'
+                )
+        for metric in ('queries', 'errors'):
+            if current[metric] > base[metric]:
+                regressions.append(
+                    f'{name}: {metric} {base[metric]} -> {current[metric]}'
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    for name, default in SIZES:
+        parser.add_argument(f'--{name}', type=int, default=default)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--requests', type=int, default=100,
+                        help='замеряемых запросов на сценарий')
+    parser.add_argument('--warmup', type=int, default=5,
+                        help='запросов прогрева на сценарий')
+    parser.add_argument('--scenario', action='append',
+                        help='запустить только указанные сценарии')
+    parser.add_argument('--cache', action='store_true',
+                        help='не сбрасывать кэш ответов между запросами')
+    parser.add_argument('--output', default='benchmark-report.json')
+    parser.add_argument('--baseline', help='JSON-отчёт для сравнения')
+    parser.add_argument('--threshold', type=float, default=0.5,
+                        help='допустимый рост задержек и памяти, доля')
+    parser.add_argument('--min-delta-ms', type=float, default=2.0,
+                        help='минимальный рост задержки для регрессии, мс')
+    parser.add_argument('--min-delta-kb', type=float, default=64.0,
+                        help='минимальный рост памяти для регрессии, КиБ')
+    parser.add_argument('--db', help='путь к файлу базы SQLite')
+    args = parser.parse_args()
+
+    setup_django(args.db)
+    import django
+    from django.conf import settings
+    from django.core.management import call_command
+
+    settings.DEBUG = False
+    sizes = {name: getattr(args, name) for name, _ in SIZES}
+    call_command('seed', seed=args.seed, verbosity=0, stdout=sys.stderr,
+                 **sizes)
+    context = Context()
+
+    scenarios = {}
+    for scenario in SCENARIOS:
+        if args.scenario and scenario[0] not in args.scenario:
+            continue
+        result = run_scenario(context, scenario, args.requests,
+                              args.warmup, args.cache)
+        scenarios[scenario[0]] = result
+        print(f'{scenario[0]:<22} {result["throughput_rps"]:>9} rps  '
+              f'p50 {result["p50_ms"]:>8} ms  p95 {result["p95_ms"]:>8} ms  '
+              f'p99 {result["p99_ms"]:>8} ms  '
+              f'queries {result["queries"]:>4}  '
+              f'memory {result["peak_memory_kb"]:>8} KiB  '
+              f'errors {result["errors"]}')
+
+    report = {
+        'meta': {
+            'sizes': sizes,
+            'seed': args.seed,
+            'requests': args.requests,
+            'warmup': args.warmup,
+            'cache': args.cache,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+        },
+        'scenarios': scenarios,
+    }
+    with open(args.output, 'w', encoding='utf-8') as report_file:
+        json.dump(report, report_file, ensure_ascii=False, indent=2)
+    print(f'Отчёт: {args.output}')
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+        for difference in meta_differences(report, baseline, VERSION_META):
+            print(f'ВНИМАНИЕ другая версия {difference}')
+        differences = meta_differences(report, baseline, COMPARABLE_META)
+        if differences:
+            for difference in differences:
+                print(f'НЕСРАВНИМО {difference}')
+            sys.exit(2)
+        # хвосты p95/p99 на сотне запросов слишком шумные,
+        # поэтому сравниваются только медиана и память
+        min_delta = {'p50_ms': args.min_delta_ms,
+                     'peak_memory_kb': args.min_delta_kb}
+        regressions = compare(report, baseline, args.threshold, min_delta)
+        for regression in regressions:
+            print(f'РЕГРЕССИЯ {regression}')
+        if regressions:
+            sys.exit(1)
+        print('Регрессий нет')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Время сериализации страницы списка сериализаторами DRF и быстрыми
+сериализаторами из строк values(), включая запросы к базе:
+
+    python benchmarks/serializers.py --page-size 100
+"""
+import argparse
+import sys
+import time
+
+from routes import SIZES
+from utils import setup_django
+
+
+def measure(func, repeat):
+    """Медиана времени вызова func в миллисекундах."""
+    func()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return timings[len(timings) // 2] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    for name, default in SIZES:
+        parser.add_argument(f'--{name}', type=int, default=default)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.management import call_command
+    from django.db.models import Count
+
+    from api.serializers import (CommentValuesSerializer,
+                                 ReviewValuesSerializer,
+                                 TitlesValuesSerializer)
+    from api.views import TitleViewSet
+    from reviews.models import Comments, Review, Title
+
+    call_command('seed', seed=args.seed, stdout=sys.stderr,
+                 **{name: getattr(args, name) for name, _ in SIZES})
+    title_id = (Title.objects.order_by('-reviews_count', 'id')
+                .values_list('id', flat=True).first())
+    review_id = (Review.objects.annotate(comments_count=Count('comments'))
+                 .order_by('-comments_count', 'id')
+                 .values_list('id', flat=True).first())
+    size = args.page_size
+    pages = (
+        ('titles', TitleViewSet.queryset.order_by('id'),
+         TitlesValuesSerializer),
+        ('reviews', Review.objects.filter(title_id=title_id)
+         .select_related('author'), ReviewValuesSerializer),
+        ('comments', Comments.objects.filter(review_id=review_id)
+         .select_related('author'), CommentValuesSerializer),
+    )
+    for name, queryset, values_serializer_class in pages:
+        model_serializer_class = values_serializer_class.model_serializer_class
+        values_serializer = values_serializer_class()
+
+        def model_page():
+            return model_serializer_class(
+                queryset.all()[:size], many=True).data
+
+        def values_page():
+            return values_serializer.serialize(
+                values_serializer.get_queryset(queryset)[:size])
+
+        assert model_page() == values_page()
+        model_ms = measure(model_page, args.repeat)
+        values_ms = measure(values_page, args.repeat)
+        print(f'{name:>9}: DRF {model_ms:8.3f} ms  values() '
+              f'{values_ms:8.3f} ms  x{model_ms / values_ms:.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+"""Общие функции для скриптов измерения производительности."""
+import os
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_DIR = os.path.join(ROOT_DIR, 'api_yamdb')
+
+
+def setup_django(db_path=None):
+    """
+    Настраивает Django на отдельную базу SQLite и применяет миграции,
+    :param db_path: путь к файлу базы, по умолчанию временный файл
+    :return: путь к файлу базы
+    """
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix='yamdb-bench-'),
+                               'bench.sqlite3')
+    sys.path.insert(0, PROJECT_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = db_path
+
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+    return db_path
@@ -0,0 +1,12 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clear_api_cache():
+    from django.core.cache import caches
+
+    from api.cache import cache_stats
+    from api_yamdb.settings import API_CACHE
+    caches[API_CACHE].clear()
+    cache_stats.reset()
+    yield
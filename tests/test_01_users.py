@@ -1,5 +1,6 @@
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 
 from .common import auth_client, create_users_api
 
@@ -400,6 +401,7 @@ class Test01UserAPI:
         assert response.status_code == 204, (
             'Проверьте, что при DELETE запросе `/api/v1/users/{username}/` возвращаете статус 204'
         )
+        call_command('process_deletions', once=True)
         assert get_user_model().objects.count() == 2, (
             'Проверьте, что при DELETE запросе `/api/v1/users/{username}/` удаляете пользователя'
         )
@@ -439,6 +441,7 @@ class Test01UserAPI:
             'Проверьте, что при DELETE запросе `/api/v1/users/{username}/` '
             f'от суперпользователя, возвращаете статус {code}'
         )
+        call_command('process_deletions', once=True)
         assert get_user_model().objects.count() == users_before - 1, (
             'Проверьте, что при DELETE запросе `/api/v1/users/{username}/` '
             'от суперпользователя, пользователь удаляется.'
@@ -571,3 +574,39 @@ class Test01UserAPI:
             'Проверьте, что при PATCH запросе `/api/v1/users/me/`, '
             'пользователь с ролью user не может сменить себе роль'
         )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_12_token_claims_without_user_query(self, admin_client, user):
+        from django.contrib.auth.tokens import default_token_generator
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from rest_framework.test import APIClient
+
+        response = APIClient().post('/api/v1/auth/token/', data={
+            'username': user.username,
+            'confirmation_code': default_token_generator.make_token(user),
+        })
+        assert response.status_code == 200, (
+            'Проверьте, что POST запрос `/api/v1/auth/token/` с верным кодом возвращает токен'
+        )
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {response.json()}')
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/genres/')
+        assert response.status_code == 200
+        assert not [query for query in context.captured_queries
+                    if '"reviews_user"' in query['sql']], (
+            'Проверьте, что пользователь из токена определяется без запроса к таблице пользователей'
+        )
+
+        response = client.post('/api/v1/genres/', data={'name': 'Рок', 'slug': 'rock'})
+        assert response.status_code == 403, (
+            'Проверьте, что пользователь с ролью user не может создавать жанры'
+        )
+        admin_client.patch(f'/api/v1/users/{user.username}/', data={'role': 'admin'})
+        response = client.post('/api/v1/genres/', data={'name': 'Рок', 'slug': 'rock'})
+        assert response.status_code == 201, (
+            'Проверьте, что смена роли через `/api/v1/users/{username}/` '
+            'сразу учитывается для уже выданного токена'
+        )
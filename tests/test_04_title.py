@@ -249,3 +249,56 @@ class Test04TitleAPI:
         user, moderator = create_users_api(admin_client)
         self.check_permissions(user, 'обычного пользователя', titles, categories, genres)
         self.check_permissions(moderator, 'модератора', titles, categories, genres)
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('titles_count', [1, 3, 5])
+    def test_05_titles_list_query_count(self, client, admin_client,
+                                        django_assert_num_queries,
+                                        titles_count):
+        from reviews.models import Category, Genre, Title
+
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        category = Category.objects.get(slug=categories[0]['slug'])
+        genre_objects = Genre.objects.filter(slug__in=[genre['slug'] for genre in genres])
+        for i in range(titles_count):
+            title = Title.objects.create(name=f'Произведение {i}', year=2000, category=category)
+            title.genre.set(genre_objects)
+
+        # версии тегов кеша создаются первым запросом
+        client.get('/api/v1/titles/?page=1')
+        # версии тегов кеша, COUNT для пагинации, произведения
+        # с категориями, жанры
+        with django_assert_num_queries(4):
+            response = client.get('/api/v1/titles/')
+        assert len(response.json()['results']) == titles_count, (
+            'Проверьте, что при GET запросе `/api/v1/titles/` возвращаются все произведения страницы'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_titles_search(self, client, admin_client):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        data = {'name': 'Ёжик в тумане', 'year': 1975, 'genre': [genres[1]['slug']],
+                'category': categories[0]['slug'], 'description': 'Мультфильм'}
+        title_id = admin_client.post('/api/v1/titles/', data=data).json()['id']
+        data = {'name': 'Побег из Шоушенка', 'year': 1994, 'genre': [genres[2]['slug']],
+                'category': categories[0]['slug'], 'description': 'Тюремная драма'}
+        admin_client.post('/api/v1/titles/', data=data)
+
+        for query in ('ежик', 'ЁЖИК', 'ёжик туман', 'комедия'):
+            response = client.get('/api/v1/titles/', {'search': query})
+            assert [title['id'] for title in response.json()['results']] == [title_id], (
+                'Проверьте, что параметр `search` в `/api/v1/titles/` ищет без учёта регистра и '
+                f'различия ё/е по названию и жанрам, запрос: {query}'
+            )
+        response = client.get('/api/v1/titles/', {'search': 'фильм'})
+        assert response.json()['count'] == 2, (
+            'Проверьте, что параметр `search` ищет по названию категории'
+        )
+
+        admin_client.patch(f'/api/v1/titles/{title_id}/', data={'name': 'Туманность Андромеды'})
+        response = client.get('/api/v1/titles/', {'search': 'ежик'})
+        assert response.json()['count'] == 0, (
+            'Проверьте, что поисковый индекс обновляется при изменении произведения'
+        )
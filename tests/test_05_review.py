@@ -334,3 +334,53 @@ class Test05ReviewAPI:
             'без токена авторизации возвращается статус 401'
         )
         self.check_permissions(user, 'обычного пользователя', reviews, titles)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_reviews_cursor_pagination(self, client, admin_client, django_user_model):
+        from reviews.models import Review
+
+        titles, _, _ = create_titles(admin_client)
+        for i in range(12):
+            author = django_user_model.objects.create_user(
+                username=f'reader{i}', email=f'reader{i}@yamdb.fake')
+            Review.objects.create(title_id=titles[0]['id'], author=author, text=f'Отзыв {i}', score=i % 11)
+        # одинаковая дата публикации проверяет порядок по id
+        Review.objects.update(pub_date=Review.objects.first().pub_date)
+        expected = list(Review.objects.order_by('-pub_date', '-id').values_list('id', flat=True))
+
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/?pagination=cursor'
+        pages = []
+        while url:
+            data = client.get(url).json()
+            assert 'count' not in data, (
+                'Проверьте, что при `?pagination=cursor` не выполняется подсчёт отзывов'
+            )
+            pages.append(data)
+            url = data['next']
+        assert [review['id'] for page in pages for review in page['results']] == expected, (
+            'Проверьте, что при `?pagination=cursor` отзывы возвращаются по убыванию (pub_date, id) без пропусков'
+        )
+        assert [len(page['results']) for page in pages] == [5, 5, 2]
+
+        data = client.get(pages[-1]['previous']).json()
+        assert [review['id'] for review in data['results']] == expected[5:10], (
+            'Проверьте, что ссылка `previous` ведёт на предыдущую страницу'
+        )
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/reviews/?cursor=broken')
+        assert response.status_code == 404, (
+            'Проверьте, что при неверном курсоре возвращается статус 404'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_review_create_query_count(self, admin_client, django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        # произведение с проверкой повторного отзыва, BEGIN, INSERT,
+        # UPDATE рейтинга, UPDATE версий тегов кеша
+        with django_assert_num_queries(5):
+            response = admin_client.post(url, data={'text': 'Отлично', 'score': 9})
+        assert response.status_code == 201
+        response = admin_client.post(url, data={'text': 'Ещё раз', 'score': 1})
+        assert response.status_code == 400, (
+            'Проверьте, что повторный отзыв на то же произведение не создаётся'
+        )
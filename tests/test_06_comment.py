@@ -246,3 +246,21 @@ class Test06CommentAPI:
             'без токена авторизации возвращается статус 401'
         )
         self.check_permissions(user, 'обычного пользователя', f'{pre_url}{comments[2]["id"]}/')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_comment_create_query_count(self, admin_client, admin, django_assert_num_queries):
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/comments/'
+        # отзыв вместе с произведением одним запросом, затем INSERT
+        with django_assert_num_queries(2):
+            response = admin_client.post(url, data={'text': 'Согласен'})
+        assert response.status_code == 201, (
+            'Проверьте, что при POST запросе `/api/v1/titles/{title_id}/reviews/{review_id}/comments/` '
+            'с правильными данными возвращается статус 201'
+        )
+        response = admin_client.post(
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/{reviews[0]["id"]}/comments/', data={'text': 'Согласен'}
+        )
+        assert response.status_code == 400, (
+            'Проверьте, что комментарий к отзыву другого произведения не создаётся'
+        )
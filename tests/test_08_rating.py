@@ -0,0 +1,81 @@
+import pytest
+from django.core.management import call_command
+
+from .common import auth_client, create_reviews
+
+
+class Test08RatingAPI:
+
+    def get_rating(self, client, title_id):
+        return client.get(f'/api/v1/titles/{title_id}/').json().get('rating')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_rating_follows_review_changes(self, admin_client, admin):
+        reviews, titles, user, _ = create_reviews(admin_client, admin)
+        title_id = titles[0]['id']
+        assert self.get_rating(admin_client, title_id) == 4, (
+            'Проверьте, что `rating` произведения учитывает созданные отзывы'
+        )
+        assert self.get_rating(admin_client, titles[1]['id']) is None, (
+            'Проверьте, что у произведения без отзывов `rating` равен None'
+        )
+
+        admin_client.patch(
+            f'/api/v1/titles/{title_id}/reviews/{reviews[1]["id"]}/',
+            data={'score': 9}
+        )
+        assert self.get_rating(admin_client, title_id) == 6, (
+            'Проверьте, что при PATCH запросе к отзыву `rating` произведения '
+            'пересчитывается'
+        )
+
+        auth_client(user).delete(
+            f'/api/v1/titles/{title_id}/reviews/{reviews[1]["id"]}/'
+        )
+        assert self.get_rating(admin_client, title_id) == 4, (
+            'Проверьте, что при удалении отзыва `rating` произведения '
+            'пересчитывается'
+        )
+
+        admin_client.delete(f'/api/v1/users/{reviews[2]["author"]}/')
+        call_command('process_deletions', once=True)
+        assert self.get_rating(admin_client, title_id) == 5, (
+            'Проверьте, что при удалении пользователя его оценки '
+            'исключаются из `rating` произведения'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_recalculate_ratings_command(self, admin_client, admin):
+        from reviews.models import Title
+
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        Title.objects.update(rating_sum=0, rating_count=0)
+        call_command('recalculate_ratings', batch_size=1)
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (12, 3), (
+            'Проверьте, что команда `recalculate_ratings` восстанавливает '
+            'сумму и количество оценок'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_repeated_destroy_keeps_rating(self, admin_client, admin):
+        from api.views import ReviewsViewSet
+        from reviews.models import Review, Title
+
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        title_id = titles[0]['id']
+        stale = Review.objects.get(pk=reviews[1]['id'])
+        admin_client.delete(
+            f'/api/v1/titles/{title_id}/reviews/{stale.pk}/'
+        )
+        counters = Title.objects.values_list(
+            'rating_sum', 'rating_count', 'reviews_count').get(pk=title_id)
+
+        view = ReviewsViewSet(kwargs={'title_id': title_id})
+        view.perform_destroy(stale)
+        assert Title.objects.values_list(
+            'rating_sum', 'rating_count', 'reviews_count'
+        ).get(pk=title_id) == counters, (
+            'Проверьте, что повторное удаление уже удалённого отзыва '
+            'не уменьшает счётчики оценок произведения второй раз'
+        )
@@ -0,0 +1,86 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from .common import auth_client, create_genre, create_titles, create_users_api
+
+
+class Test09CacheAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_genres_cache_invalidation(self, client, admin_client):
+        create_genre(admin_client)
+        response = client.get('/api/v1/genres/')
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что первый GET запрос `/api/v1/genres/` не берётся из кеша'
+        )
+        response = client.get('/api/v1/genres/')
+        assert response['X-Cache'] == 'HIT', (
+            'Проверьте, что повторный GET запрос `/api/v1/genres/` берётся из кеша'
+        )
+        assert response.json()['count'] == 3
+
+        admin_client.post('/api/v1/genres/', data={'name': 'Рок', 'slug': 'rock'})
+        response = client.get('/api/v1/genres/')
+        assert response.json()['count'] == 4, (
+            'Проверьте, что создание жанра сбрасывает кеш `/api/v1/genres/`'
+        )
+        admin_client.delete('/api/v1/genres/rock/')
+        response = client.get('/api/v1/genres/')
+        assert response.json()['count'] == 3, (
+            'Проверьте, что удаление жанра сбрасывает кеш `/api/v1/genres/`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_title_cache_invalidation(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        client.get(url)
+        assert client.get(url)['X-Cache'] == 'HIT'
+        other_url = f'/api/v1/titles/{titles[1]["id"]}/'
+        client.get(other_url)
+
+        user, _ = create_users_api(admin_client)
+        auth_client(user).post(f'{url}reviews/', data={'text': 'Отлично', 'score': 8})
+        response = client.get(url)
+        assert response.json()['rating'] == 8, (
+            'Проверьте, что новый отзыв сбрасывает кеш произведения'
+        )
+        assert client.get(other_url)['X-Cache'] == 'HIT', (
+            'Проверьте, что отзыв не сбрасывает кеш других произведений'
+        )
+
+        admin_client.delete('/api/v1/genres/horror/')
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что удаление жанра сбрасывает кеш произведений'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_cache_stats(self, client, admin_client, user_client):
+        client.get('/api/v1/categories/')
+        client.get('/api/v1/categories/')
+        assert user_client.get('/api/v1/cache/stats/').status_code == 403
+        response = admin_client.get('/api/v1/cache/stats/')
+        assert response.status_code == 200
+        assert response.json()['categories-list'] == {'hits': 1, 'misses': 1}, (
+            'Проверьте, что `/api/v1/cache/stats/` считает попадания и промахи кеша'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_commands_invalidate_cache(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        client.get(url)
+        client.get('/api/v1/titles/')
+        for command in ('recalculate_ratings', 'rebuild_search_index'):
+            call_command(command, stdout=StringIO())
+            assert client.get(url)['X-Cache'] == 'MISS', (
+                f'Проверьте, что команда `{command}` сбрасывает кеш '
+                'произведения'
+            )
+            assert client.get('/api/v1/titles/')['X-Cache'] == 'MISS', (
+                f'Проверьте, что команда `{command}` сбрасывает кеш '
+                'списка произведений'
+            )
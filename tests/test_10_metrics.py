@@ -0,0 +1,31 @@
+import pytest
+
+from .common import create_titles
+
+
+class Test10MetricsAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_metrics(self, client, admin_client, user_client):
+        from api import metrics
+
+        create_titles(admin_client)
+        metrics.reset()
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/')
+
+        assert user_client.get('/api/v1/metrics/').status_code == 403, (
+            'Проверьте, что `/api/v1/metrics/` доступен только администратору'
+        )
+        response = admin_client.get('/api/v1/metrics/')
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain'), (
+            'Проверьте, что метрики отдаются в текстовом формате Prometheus'
+        )
+        body = response.content.decode()
+        assert 'yamdb_request_duration_seconds_count{endpoint="titles-list"} 2' in body, (
+            'Проверьте, что время запросов собирается по имени URL'
+        )
+        assert 'yamdb_db_queries_bucket{endpoint="titles-list",le="+Inf"} 2' in body
+        assert 'yamdb_serialization_duration_seconds_count{endpoint="titles-list"} 2' in body
+        assert 'yamdb_cache_hits_total{endpoint="titles-list"} 1' in body
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+from django.core.management import call_command
+
+SIZES = {'users': 50, 'categories': 3, 'genres': 5, 'titles': 40,
+         'reviews': 500, 'comments': 200}
+
+
+class Test11SeedCommand:
+
+    def test_01_seed_csv_is_reproducible(self, tmp_path):
+        first, second, other = (tmp_path / 'first', tmp_path / 'second',
+                                tmp_path / 'other')
+        call_command('seed', csv=str(first), seed=1, **SIZES)
+        call_command('seed', csv=str(second), seed=1, **SIZES)
+        call_command('seed', csv=str(other), seed=2, **SIZES)
+        files = sorted(os.listdir(first))
+        assert files == sorted(os.listdir(second)), (
+            'Проверьте, что команда `seed` создаёт одинаковый набор файлов'
+        )
+        for filename in files:
+            assert (first / filename).read_bytes() == (
+                second / filename).read_bytes(), (
+                'Проверьте, что при одинаковом `--seed` команда `seed` '
+                f'генерирует одинаковый файл {filename}'
+            )
+        assert (first / 'review.csv').read_bytes() != (
+            other / 'review.csv').read_bytes(), (
+            'Проверьте, что `--seed` влияет на сгенерированные отзывы'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_seed_database(self, client):
+        from reviews.models import Comments, Genre, Review, Title
+
+        assert client.get('/api/v1/genres/').json()['count'] == 0
+        call_command('seed', **SIZES)
+        assert Review.objects.count() == SIZES['reviews'], (
+            'Проверьте, что команда `seed` создаёт заданное число отзывов'
+        )
+        assert Comments.objects.count() == SIZES['comments'], (
+            'Проверьте, что команда `seed` создаёт заданное число '
+            'комментариев'
+        )
+        counts = sorted(
+            Title.objects.values_list('rating_count', flat=True), reverse=True
+        )
+        assert sum(counts) == SIZES['reviews'], (
+            'Проверьте, что после команды `seed` пересчитан рейтинг'
+        )
+        assert counts[0] > 5 * counts[len(counts) // 2], (
+            'Проверьте, что популярность произведений неравномерна'
+        )
+        response = client.get('/api/v1/titles/?search=жанр')
+        assert response.status_code == 200
+        assert response.json()['count'] == SIZES['titles'], (
+            'Проверьте, что после команды `seed` перестроен поисковый индекс'
+        )
+        assert client.get('/api/v1/genres/').json()['count'] == (
+            SIZES['genres']
+        ), 'Проверьте, что команда `seed` сбрасывает кеш списка жанров'
+        slug = Genre.objects.values_list('slug', flat=True).first()
+        assert client.get(f'/api/v1/titles/?genre={slug}').status_code == (
+            200
+        ), 'Проверьте, что жанры из `seed` сразу доступны в фильтре'
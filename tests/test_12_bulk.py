@@ -0,0 +1,161 @@
+import pytest
+
+from api.mixins import insert_objects
+from reviews.models import Genre
+
+from .common import create_categories, create_genre, create_titles
+
+
+class Test12BulkAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_bulk_create_titles(self, client, admin_client,
+                                   django_assert_max_num_queries):
+        create_genre(admin_client)
+        create_categories(admin_client)
+        data = [
+            {'name': f'Пачка {i}', 'year': 2000 + i,
+             'genre': ['horror', 'comedy'], 'category': 'films'}
+            for i in range(20)
+        ]
+        data.append({'name': 'Без жанра', 'year': 2000,
+                     'genre': ['unknown'], 'category': 'films'})
+        # число запросов не зависит от размера пачки, новые теги
+        # произведений создаются в таблице версий одним INSERT
+        with django_assert_max_num_queries(13):
+            response = admin_client.post(
+                '/api/v1/titles/', data=data, format='json')
+        assert response.status_code == 207, (
+            'Проверьте, что при ошибках в части элементов POST запрос '
+            '`/api/v1/titles/` со списком возвращает статус 207'
+        )
+        body = response.json()
+        assert len(body['results']) == 20, (
+            'Проверьте, что корректные элементы пачки сохраняются'
+        )
+        assert [error['index'] for error in body['errors']] == [20], (
+            'Проверьте, что ошибки возвращаются с номером элемента'
+        )
+        assert 'genre' in body['errors'][0]['errors']
+        assert body['results'][0]['genre'] == ['horror', 'comedy']
+        assert body['results'][0]['category'] == 'films'
+
+        response = client.get('/api/v1/titles/?genre=comedy')
+        assert response.json()['count'] == 20, (
+            'Проверьте, что жанры произведений из пачки сохраняются'
+        )
+        title_id = body['results'][5]['id']
+        response = client.get(f'/api/v1/titles/{title_id}/')
+        assert response.json()['name'] == 'Пачка 5', (
+            'Проверьте, что у созданных пачкой произведений верные `id`'
+        )
+        response = client.get('/api/v1/titles/?search=пачка')
+        assert response.json()['count'] == 20, (
+            'Проверьте, что произведения из пачки попадают в поиск'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_bulk_create_atomic(self, client, admin_client):
+        create_categories(admin_client)
+        data = [
+            {'name': 'Пачка', 'year': 2000, 'genre': [], 'category': 'films'},
+            {'name': 'Без категории', 'year': 2000, 'genre': []},
+        ]
+        response = admin_client.post(
+            '/api/v1/titles/?atomic=true', data=data, format='json')
+        assert response.status_code == 400, (
+            'Проверьте, что в режиме atomic ошибка в элементе возвращает 400'
+        )
+        assert response.json()['errors'][0]['index'] == 1
+        assert client.get('/api/v1/titles/').json()['count'] == 0, (
+            'Проверьте, что в режиме atomic ничего не сохраняется при ошибке'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_bulk_genres_and_categories(self, client, admin_client,
+                                           user_client):
+        create_genre(admin_client)
+        data = [
+            {'name': 'Рок', 'slug': 'rock'},
+            {'name': 'Поп', 'slug': 'pop'},
+            {'name': 'Ещё рок', 'slug': 'rock'},
+            {'name': 'Снова ужасы', 'slug': 'horror'},
+        ]
+        response = user_client.post('/api/v1/genres/', data=data,
+                                    format='json')
+        assert response.status_code == 403, (
+            'Проверьте, что пачку жанров может создать только администратор'
+        )
+        response = admin_client.post('/api/v1/genres/', data=data,
+                                     format='json')
+        assert response.status_code == 207
+        assert [error['index'] for error in response.json()['errors']] == [
+            2, 3], (
+            'Проверьте, что повторяющиеся и занятые slug возвращают ошибки'
+        )
+        assert client.get('/api/v1/genres/').json()['count'] == 5
+
+        response = admin_client.post('/api/v1/categories/', data=[
+            {'name': 'Фильм', 'slug': 'films'},
+            {'name': 'Музыка', 'slug': 'music'},
+        ], format='json')
+        assert response.status_code == 201, (
+            'Проверьте, что POST запрос `/api/v1/categories/` со списком '
+            'без ошибок возвращает статус 201'
+        )
+        response = admin_client.patch('/api/v1/categories/', data=[
+            {'slug': 'music', 'name': 'Пластинки'},
+            {'slug': 'missing', 'name': 'Нет такой'},
+        ], format='json')
+        assert response.status_code == 207
+        assert response.json()['errors'][0]['errors'] == {
+            'slug': ['Объект не найден']}
+        names = {category['slug']: category['name'] for category in
+                 client.get('/api/v1/categories/').json()['results']}
+        assert names == {'films': 'Фильм', 'music': 'Пластинки'}, (
+            'Проверьте, что PATCH запрос `/api/v1/categories/` со списком '
+            'изменяет категории'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_bulk_update_titles(self, client, admin_client,
+                                   django_assert_max_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        data = [
+            {'id': titles[0]['id'], 'year': 1999, 'genre': ['drama']},
+            {'id': titles[1]['id'], 'name': 'Новый проект',
+             'category': 'films'},
+        ]
+        with django_assert_max_num_queries(12):
+            response = admin_client.patch(
+                '/api/v1/titles/', data=data, format='json')
+        assert response.status_code == 200, (
+            'Проверьте, что PATCH запрос `/api/v1/titles/` со списком '
+            'возвращает статус 200'
+        )
+        first = client.get(f'/api/v1/titles/{titles[0]["id"]}/').json()
+        assert first['year'] == 1999
+        assert [genre['slug'] for genre in first['genre']] == ['drama'], (
+            'Проверьте, что PATCH со списком заменяет жанры произведения'
+        )
+        second = client.get(f'/api/v1/titles/{titles[1]["id"]}/').json()
+        assert second['name'] == 'Новый проект'
+        assert second['category']['slug'] == 'films'
+        assert [genre['slug'] for genre in second['genre']] == ['drama'], (
+            'Проверьте, что PATCH без поля genre не меняет жанры'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_insert_objects_ids(self, admin_client):
+        create_genre(admin_client)
+        genres = [Genre(id=1000, name='Явный', slug='explicit'),
+                  Genre(name='Первый', slug='first'),
+                  Genre(name='Второй', slug='second')]
+        insert_objects(Genre, genres)
+        assert {genre.slug: genre.pk for genre in genres} == dict(
+            Genre.objects.filter(slug__in=['explicit', 'first', 'second'])
+            .values_list('slug', 'id')
+        ), (
+            'Проверьте, что после вставки у каждого объекта свой id, '
+            'в том числе если в пачке есть объекты с заданным id'
+        )
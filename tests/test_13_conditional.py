@@ -0,0 +1,110 @@
+import pytest
+from django.db.models import F
+
+from api.cache import GENRES
+from reviews.models import CacheTag
+
+from .common import auth_client, create_genre, create_titles, create_users_api
+
+
+class Test13ConditionalAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_genres_etag(self, client, admin_client,
+                            django_assert_num_queries):
+        create_genre(admin_client)
+        response = client.get('/api/v1/genres/')
+        etag = response.get('ETag')
+        assert etag and response.get('Last-Modified'), (
+            'Проверьте, что ответ на GET запрос `/api/v1/genres/` содержит '
+            'заголовки ETag и Last-Modified'
+        )
+        # только запрос версий тегов
+        with django_assert_num_queries(1):
+            response = client.get('/api/v1/genres/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            'Проверьте, что запрос `/api/v1/genres/` с актуальным '
+            'If-None-Match возвращает 304 без запроса списка'
+        )
+        assert not response.content
+        assert response['ETag'] == etag
+
+        admin_client.post('/api/v1/genres/', data={'name': 'Рок',
+                                                   'slug': 'rock'})
+        response = client.get('/api/v1/genres/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что создание жанра меняет ETag `/api/v1/genres/`'
+        )
+        assert response['ETag'] != etag
+        assert response.json()['count'] == 4
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_categories_last_modified(self, client, admin_client):
+        response = client.get('/api/v1/categories/')
+        assert 'Last-Modified' not in response, (
+            'Проверьте, что у ни разу не менявшегося списка нет '
+            'Last-Modified: время его изменения неизвестно'
+        )
+        assert not CacheTag.objects.exists(), (
+            'Проверьте, что GET запрос не создаёт строки версий тегов'
+        )
+
+        admin_client.post('/api/v1/categories/', data={'name': 'Книги',
+                                                       'slug': 'books'})
+        response = client.get('/api/v1/categories/')
+        last_modified = response['Last-Modified']
+        response = client.get('/api/v1/categories/',
+                              HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == 304, (
+            'Проверьте, что запрос `/api/v1/categories/` с актуальным '
+            'If-Modified-Since возвращает 304'
+        )
+        response = client.get(
+            '/api/v1/categories/',
+            HTTP_IF_MODIFIED_SINCE='Thu, 01 Jan 2015 00:00:00 GMT',
+        )
+        assert response.status_code == 200, (
+            'Проверьте, что запрос с устаревшим If-Modified-Since '
+            'возвращает полный ответ'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_title_etag_follows_reviews(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        urls = [f'/api/v1/titles/{title["id"]}/' for title in titles]
+        etags = [client.get(url)['ETag'] for url in urls]
+        list_etag = client.get('/api/v1/titles/')['ETag']
+
+        user, _ = create_users_api(admin_client)
+        auth_client(user).post(f'{urls[0]}reviews/',
+                               data={'text': 'Отлично', 'score': 8})
+        response = client.get(urls[0], HTTP_IF_NONE_MATCH=etags[0])
+        assert response.status_code == 200, (
+            'Проверьте, что новый отзыв меняет ETag произведения'
+        )
+        assert response.json()['rating'] == 8
+        response = client.get(urls[1], HTTP_IF_NONE_MATCH=etags[1])
+        assert response.status_code == 304, (
+            'Проверьте, что отзыв не меняет ETag других произведений'
+        )
+        response = client.get('/api/v1/titles/', HTTP_IF_NONE_MATCH=list_etag)
+        assert response.status_code == 200, (
+            'Проверьте, что новый отзыв меняет ETag списка произведений'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_versions_shared_between_processes(self, client,
+                                                  admin_client):
+        create_genre(admin_client)
+        response = client.get('/api/v1/genres/')
+        etag = response['ETag']
+        # запись другого процесса меняет только версию в базе
+        CacheTag.objects.filter(name=GENRES).update(
+            version=F('version') + 10 ** 9)
+        response = client.get('/api/v1/genres/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что версии тегов хранятся в базе и изменение '
+            'из другого процесса меняет ETag'
+        )
+        assert response['X-Cache'] == 'MISS'
+        assert response['ETag'] != etag
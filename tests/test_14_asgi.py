@@ -0,0 +1,73 @@
+import asyncio
+import json
+
+import pytest
+
+from .common import create_titles
+
+
+@pytest.fixture(scope='module')
+def application():
+    from api.asgi import ASGIHandler
+
+    handler = ASGIHandler()
+    yield handler
+    handler.read_pool.shutdown()
+    handler.write_pool.shutdown()
+
+
+def asgi_request(application, path, method='GET', body=b'', headers=()):
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'query_string': query.encode(),
+        'headers': [(b'accept', b'application/json'), *headers],
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': body}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(application(scope, receive, send))
+    start, *chunks = messages
+    return start['status'], dict(start['headers']), b''.join(
+        chunk.get('body', b'') for chunk in chunks)
+
+
+class Test14AsgiAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_asgi_read_routes(self, application, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        for path in ('/api/v1/titles/', f'/api/v1/titles/{titles[0]["id"]}/',
+                     '/api/v1/titles/?genre=drama', '/api/v1/genres/',
+                     '/api/v1/categories/?search=films',
+                     f'/api/v1/titles/{titles[0]["id"]}/reviews/'):
+            status, headers, body = asgi_request(application, path)
+            assert status == 200, (
+                f'Проверьте, что ASGI-приложение отвечает на GET {path}'
+            )
+            assert json.loads(body) == client.get(path).json(), (
+                f'Проверьте, что ответ ASGI на GET {path} совпадает с WSGI'
+            )
+        assert headers[b'content-type'] == b'application/json'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_asgi_permissions(self, application, admin_client):
+        create_titles(admin_client)
+        data = json.dumps({'name': 'Рок', 'slug': 'rock'}).encode()
+        headers = [(b'content-type', b'application/json'),
+                   (b'content-length', str(len(data)).encode())]
+        status, _, _ = asgi_request(application, '/api/v1/genres/', 'POST', data, headers)
+        assert status == 401, (
+            'Проверьте, что через ASGI аноним не может создать жанр'
+        )
+        status, _, _ = asgi_request(application, '/api/v1/titles/?page=100')
+        assert status == 404, (
+            'Проверьте, что через ASGI работает та же пагинация'
+        )
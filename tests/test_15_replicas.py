@@ -0,0 +1,123 @@
+import time
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+
+from reviews.models import CacheTag, Genre, UserWriteMark
+
+from .common import auth_client, create_genre, create_titles, create_users_api
+
+
+@pytest.fixture
+def replica(settings, tmp_path):
+    connections.databases['replica'] = dict(
+        connections.databases['default'],
+        NAME=str(tmp_path / 'replica.sqlite3'),
+    )
+    settings.DATABASE_REPLICAS = ['replica']
+    yield 'replica'
+    connections['replica'].close()
+    del connections['replica']
+    del connections.databases['replica']
+
+
+class Test15ReplicasAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_anonymous_reads_replica(self, client, admin_client, replica):
+        create_genre(admin_client)
+        call_command('sync_replicas')
+        Genre.objects.create(name='Рок', slug='rock')
+        response = client.get('/api/v1/genres/')
+        assert response.status_code == 200
+        assert response.json()['count'] == 3, (
+            'Проверьте, что GET запрос анонимного пользователя читает '
+            'данные с реплики'
+        )
+        assert Genre.objects.using(replica).count() == 3
+        assert Genre.objects.count() == 4, (
+            'Проверьте, что чтение вне GET запросов идёт с основной базы'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_writes_go_to_primary(self, admin_client, user_client,
+                                     replica):
+        call_command('sync_replicas')
+        response = admin_client.post('/api/v1/genres/',
+                                     data={'name': 'Рок', 'slug': 'rock'})
+        assert response.status_code == 201
+        assert Genre.objects.filter(slug='rock').exists(), (
+            'Проверьте, что запись идёт в основную базу'
+        )
+        assert not Genre.objects.using(replica).exists()
+
+        response = admin_client.get('/api/v1/genres/')
+        assert response.json()['count'] == 1, (
+            'Проверьте, что после записи пользователь читает свои '
+            'изменения с основной базы'
+        )
+        response = user_client.get('/api/v1/genres/')
+        assert response.json()['count'] == 0, (
+            'Проверьте, что другие пользователи продолжают читать с реплики'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_sticky_window(self, admin_client, replica, settings):
+        settings.REPLICA_STICKY_SECONDS = 0.1
+        call_command('sync_replicas')
+        admin_client.post('/api/v1/genres/',
+                          data={'name': 'Рок', 'slug': 'rock'})
+        assert admin_client.get('/api/v1/genres/').json()['count'] == 1
+        time.sleep(0.2)
+        assert admin_client.get('/api/v1/genres/').json()['count'] == 0, (
+            'Проверьте, что по окончании окна REPLICA_STICKY_SECONDS '
+            'пользователь снова читает с реплики'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_replica_response_not_cached_for_writer(self, client,
+                                                       admin_client,
+                                                       replica):
+        titles, _, _ = create_titles(admin_client)
+        call_command('sync_replicas')
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        user, _ = create_users_api(admin_client)
+        writer = auth_client(user)
+        response = writer.post(f'{url}reviews/',
+                               data={'text': 'Отлично', 'score': 8})
+        assert response.status_code == 201
+        assert client.get(url).json()['rating'] is None
+
+        # другой процесс: липкость не хранится в памяти процесса
+        cache.clear()
+        response = writer.get(url)
+        assert response.json()['rating'] == 8, (
+            'Проверьте, что ответ, прочитанный с отстающей реплики, не '
+            'отдаётся из кеша пользователю, который только что записал'
+        )
+        assert response['X-Cache'] == 'MISS'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_failed_write_not_sticky(self, admin_client, replica):
+        call_command('sync_replicas')
+        response = admin_client.post('/api/v1/genres/', data={'name': 'Рок'})
+        assert response.status_code == 400
+        assert not UserWriteMark.objects.exists(), (
+            'Проверьте, что запрос с ошибкой не отправляет пользователя '
+            'читать с основной базы'
+        )
+
+        for slug in ('rock', 'jazz'):
+            admin_client.post('/api/v1/genres/',
+                              data={'name': slug, 'slug': slug})
+        assert UserWriteMark.objects.count() == 1, (
+            'Проверьте, что время записи хранится одной строкой '
+            'на пользователя'
+        )
+        assert not CacheTag.objects.filter(
+            name__startswith='replica').exists(), (
+            'Проверьте, что время записи не хранится в таблице версий '
+            'тегов кеша'
+        )
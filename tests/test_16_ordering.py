@@ -0,0 +1,64 @@
+import pytest
+from django.db import connection
+
+from reviews.models import Title
+
+from .common import auth_client, create_reviews, create_titles
+
+
+def ordered_ids(client, ordering, **params):
+    response = client.get('/api/v1/titles/',
+                          data={'ordering': ordering, **params})
+    assert response.status_code == 200
+    return [title['id'] for title in response.json()['results']]
+
+
+class Test16OrderingAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_ordering_fields(self, client, admin_client, admin):
+        reviews, titles, user, _ = create_reviews(admin_client, admin)
+        first, second = titles[0]['id'], titles[1]['id']
+        third = admin_client.post('/api/v1/titles/', data={
+            'name': 'Авангард', 'year': 2000, 'genre': titles[0]['genre'],
+            'category': titles[0]['category'],
+        }).json()['id']
+        auth_client(user).post(f'/api/v1/titles/{second}/reviews/',
+                               data={'text': 'Отлично', 'score': 9})
+
+        assert ordered_ids(client, '-rating') == [second, first, third], (
+            'Проверьте, что `?ordering=-rating` ставит произведения с '
+            'лучшей оценкой первыми, а без оценок — последними'
+        )
+        assert ordered_ids(client, '-reviews_count') == [
+            first, second, third]
+        assert ordered_ids(client, 'name') == [third, first, second]
+        assert ordered_ids(client, 'year') == [first, third, second], (
+            'Проверьте, что одинаковые значения упорядочиваются по id'
+        )
+        assert ordered_ids(client, '-year') == [second, third, first]
+        assert ordered_ids(client, 'unknown') == [first, second, third], (
+            'Проверьте, что без допустимого поля сортировки список '
+            'упорядочен по id'
+        )
+
+        admin_client.delete(
+            f'/api/v1/titles/{first}/reviews/{reviews[0]["id"]}/')
+        title = Title.objects.get(pk=first)
+        assert (title.rating_avg, title.reviews_count) == (3.5, 2), (
+            'Проверьте, что удаление отзыва обновляет сохранённые '
+            'среднюю оценку и количество отзывов'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_rating_order_uses_index(self, admin_client):
+        create_titles(admin_client)
+        queryset = Title.objects.order_by('-rating_avg', '-id')[:5]
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        assert 'title_rating_idx' in plan and 'TEMP B-TREE' not in plan, (
+            'Проверьте, что сортировка по рейтингу читает индекс '
+            f'title_rating_idx без отдельной сортировки: {plan}'
+        )
@@ -0,0 +1,111 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Category, Genre, Title, User
+
+from .common import create_comments
+
+
+def read_stream(response):
+    assert response.status_code == 200, response.content
+    assert response.streaming, (
+        'Проверьте, что выгрузка отдаётся потоковым ответом'
+    )
+    return b''.join(response.streaming_content).decode()
+
+
+def ndjson(client, url):
+    response = client.get(url, {'format': 'ndjson'})
+    assert response['Content-Type'].startswith('application/x-ndjson')
+    return [json.loads(line) for line in read_stream(response).splitlines()]
+
+
+class Test17ExportAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_export_admin_only(self, client, user_client, admin_client):
+        for url in ('/api/v1/export/titles/',
+                    '/api/v1/export/titles/1/reviews/'):
+            assert client.get(url).status_code == 401, (
+                f'Проверьте, что `{url}` недоступен анониму'
+            )
+            assert user_client.get(url).status_code == 403, (
+                f'Проверьте, что `{url}` доступен только администратору'
+            )
+        response = admin_client.get('/api/v1/export/titles/',
+                                    {'format': 'csv', 'table': 'passwords'})
+        assert response.status_code == 400, (
+            'Проверьте, что неизвестная таблица в ?table= возвращает 400'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_ndjson_matches_api(self, admin_client, admin):
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        exported = ndjson(admin_client, '/api/v1/export/titles/')
+        listed = admin_client.get('/api/v1/titles/').json()['results']
+        for title in exported + listed:
+            title['genre'].sort(key=lambda genre: genre['slug'])
+        assert exported == listed, (
+            'Проверьте, что выгрузка произведений содержит те же данные, '
+            'что и список `/api/v1/titles/`'
+        )
+
+        title_id = titles[0]['id']
+        exported = ndjson(admin_client,
+                          f'/api/v1/export/titles/{title_id}/reviews/')
+        assert [review['id'] for review in exported] == sorted(
+            review['id'] for review in reviews)
+        review = next(review for review in exported
+                      if review['id'] == reviews[0]['id'])
+        detail = admin_client.get(
+            f'/api/v1/titles/{title_id}/reviews/{review.pop("id")}/').json()
+        detail.pop('id')
+        assert [comment['text'] for comment in review.pop('comments')] == [
+            comment['text'] for comment in comments]
+        assert review == detail, (
+            'Проверьте, что отзыв в выгрузке совпадает с ответом API'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_csv_round_trip(self, admin_client, admin, tmp_path):
+        _, _, titles, _, _ = create_comments(admin_client, admin)
+
+        def export():
+            files = {}
+            for table in ('users', 'category', 'genre', 'titles',
+                          'genre_title'):
+                files[f'{table}.csv'] = read_stream(admin_client.get(
+                    '/api/v1/export/titles/',
+                    {'format': 'csv', 'table': table}))
+            for table in ('review', 'comments'):
+                lines = []
+                for title in titles:
+                    content = read_stream(admin_client.get(
+                        f'/api/v1/export/titles/{title["id"]}/reviews/',
+                        {'format': 'csv', 'table': table}))
+                    lines.extend(content.splitlines(keepends=True)[
+                        bool(lines):])
+                files[f'{table}.csv'] = ''.join(lines)
+            return files
+
+        files = export()
+        assert files['review.csv'].startswith(
+            'id,title_id,text,author,score,pub_date\r\n'), (
+            'Проверьте, что колонки CSV совпадают с файлами static/data'
+        )
+        for filename, content in files.items():
+            (tmp_path / filename).write_text(content, encoding='utf-8')
+        Title.objects.all().delete()
+        Genre.objects.all().delete()
+        Category.objects.all().delete()
+        # администратор нужен для выгрузки, остальные авторы удаляются
+        # вместе с их отзывами и комментариями
+        User.objects.exclude(pk=admin.pk).delete()
+        call_command('import_csv', path=str(tmp_path), stdout=StringIO())
+        assert export() == files, (
+            'Проверьте, что выгрузка CSV загружается командой import_csv '
+            'без потерь'
+        )
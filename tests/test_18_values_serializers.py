@@ -0,0 +1,63 @@
+from datetime import datetime, timezone
+
+import pytest
+from django.core.cache import caches
+
+from api_yamdb.settings import API_CACHE
+from reviews.models import Comments, Review, Title
+
+from .common import create_comments
+
+
+def both_modes(client, settings, url):
+    responses = []
+    for fast in (False, True):
+        settings.FAST_READ_SERIALIZERS = fast
+        caches[API_CACHE].clear()
+        response = client.get(url)
+        assert response.status_code == 200
+        responses.append(response.content)
+    return responses
+
+
+class Test18ValuesSerializersAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_lists_are_byte_identical(self, client, admin_client, admin,
+                                         settings):
+        comments, reviews, titles, _, _ = create_comments(admin_client,
+                                                          admin)
+        for year in range(1995, 2000):
+            response = admin_client.post('/api/v1/titles/', data={
+                'name': f'Без категории {year}', 'year': year,
+                'genre': [titles[0]['genre'][0]],
+                'category': titles[0]['category'],
+            })
+            Title.objects.filter(pk=response.json()['id']).update(
+                category=None, description=None)
+        # даты до 2011 года попадают на летнее и зимнее время в Москве
+        for index, review in enumerate(reviews):
+            Review.objects.filter(pk=review['id']).update(
+                pub_date=datetime(2005, 3 + index * 4, 27, 22, 30, 1, 5000,
+                                  tzinfo=timezone.utc))
+        Comments.objects.filter(pk=comments[0]['id']).update(
+            pub_date=datetime(2010, 10, 30, 23, 0, tzinfo=timezone.utc))
+
+        title_id, review_id = titles[0]['id'], reviews[0]['id']
+        urls = (
+            '/api/v1/titles/',
+            '/api/v1/titles/?page=2',
+            '/api/v1/titles/?ordering=-rating',
+            '/api/v1/titles/?search=проект',
+            f'/api/v1/titles/{title_id}/reviews/',
+            f'/api/v1/titles/{title_id}/reviews/?pagination=cursor',
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+            '?pagination=cursor',
+        )
+        for url in urls:
+            drf, values = both_modes(client, settings, url)
+            assert values == drf, (
+                f'Проверьте, что ответ `{url}` из строк values() побайтно '
+                'совпадает с ответом сериализаторов DRF'
+            )
@@ -0,0 +1,50 @@
+import pytest
+
+from reviews.models import Comments, Review, Title
+
+
+@pytest.fixture
+def feed(django_user_model):
+    title = Title.objects.create(name='Побег', year=1994)
+    authors = [
+        django_user_model.objects.create_user(
+            username=f'author{index}', email=f'author{index}@yamdb.fake')
+        for index in range(6)
+    ]
+    reviews = [
+        Review.objects.create(title=title, author=author, text='Отзыв',
+                              score=index)
+        for index, author in enumerate(authors)
+    ]
+    for author in authors:
+        Comments.objects.create(review=reviews[0], author=author,
+                                text='Комментарий')
+    return title, reviews
+
+
+class Test19AuthorQueriesAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('fast', (False, True))
+    def test_01_constant_queries(self, client, feed, settings, fast,
+                                 django_assert_num_queries):
+        settings.FAST_READ_SERIALIZERS = fast
+        title, reviews = feed
+        reviews_url = f'/api/v1/titles/{title.pk}/reviews/'
+        comments_url = f'{reviews_url}{reviews[0].pk}/comments/'
+        # страницы с одним и с пятью авторами, лента по курсору
+        for url, queries in ((f'{reviews_url}?page=2', 3),
+                             (f'{reviews_url}?page=1', 3),
+                             (f'{reviews_url}?pagination=cursor', 2),
+                             (f'{comments_url}?page=2', 3),
+                             (f'{comments_url}?page=1', 3),
+                             (f'{comments_url}?pagination=cursor', 2)):
+            with django_assert_num_queries(queries):
+                response = client.get(url)
+            assert response.status_code == 200
+            results = response.json()['results']
+            assert results and all(
+                item['author'].startswith('author') for item in results), (
+                f'Проверьте, что `{url}` возвращает username авторов, '
+                'загруженных тем же запросом'
+            )
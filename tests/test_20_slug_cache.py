@@ -0,0 +1,107 @@
+import pytest
+from django.core.cache import caches
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+
+from api.cache import GENRES
+from api_yamdb.settings import API_CACHE
+from reviews.models import CacheTag, Genre
+
+from .common import create_titles
+
+
+def slug_lookups(queries):
+    """Запросы, которые ищут жанры или категории по slug."""
+    return [query['sql'] for query in queries
+            if '"slug" IN (' in query['sql']
+            or '"slug" = ' in query['sql']]
+
+
+def slug_version_reads(queries):
+    """Запросы версий тегов словарей slug."""
+    return [query['sql'] for query in queries
+            if query['sql'].startswith('SELECT')
+            and 'reviews_cachetag' in query['sql']
+            and f"'{GENRES}'" in query['sql']]
+
+
+class Test20SlugCacheAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_filter_and_write_skip_lookups(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        url = (f'/api/v1/titles/?genre={genres[0]["slug"]}'
+               f'&category={categories[0]["slug"]}')
+        assert client.get(url).json()['count'] == 1
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url + '&page=1')
+        assert response.json()['count'] == 1
+        assert not slug_lookups(context.captured_queries), (
+            'Проверьте, что фильтр по жанру и категории берёт id из '
+            'словаря slug, а не из их таблиц'
+        )
+        assert len(slug_version_reads(context.captured_queries)) == 1, (
+            'Проверьте, что версии словарей slug читаются один раз '
+            'за запрос'
+        )
+        # версии ответа и словарей, COUNT, страница, жанры страницы
+        assert len(context.captured_queries) == 5
+
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post('/api/v1/titles/', data={
+                'name': 'Новое', 'year': 2001,
+                'genre': [genre['slug'] for genre in genres],
+                'category': categories[1]['slug'],
+            })
+        assert response.status_code == 201
+        assert response.json()['category'] == categories[1]['slug']
+        assert not slug_lookups(context.captured_queries), (
+            'Проверьте, что TitlesWriteSerializer не ищет жанры и '
+            'категорию по slug в базе'
+        )
+        assert len(slug_version_reads(context.captured_queries)) == 1, (
+            'Проверьте, что для всех жанров и категории версии словарей '
+            'slug читаются один раз'
+        )
+        # версии словарей, BEGIN, INSERT произведения, два запроса
+        # и INSERT связей с жанрами, версии кеша (2), поисковый индекс (2),
+        # жанры ответа
+        assert len(context.captured_queries) == 11
+
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Ошибка', 'year': 2001, 'genre': ['unknown'],
+            'category': categories[1]['slug'],
+        })
+        assert response.status_code == 400
+        assert 'genre' in response.json()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_invalidation(self, client, admin_client):
+        create_titles(admin_client)
+        assert client.get('/api/v1/titles/?genre=jazz').status_code == 400
+        admin_client.post('/api/v1/genres/', data={'name': 'Джаз',
+                                                   'slug': 'jazz'})
+        assert client.get('/api/v1/titles/?genre=jazz').status_code == 200, (
+            'Проверьте, что новый жанр сразу доступен в фильтре'
+        )
+        admin_client.delete('/api/v1/genres/jazz/')
+        assert client.get('/api/v1/titles/?genre=jazz').status_code == 400, (
+            'Проверьте, что удалённый жанр пропадает из фильтра'
+        )
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Новое', 'year': 2001, 'genre': ['jazz'],
+        })
+        assert response.status_code == 400, (
+            'Проверьте, что удалённый жанр нельзя назначить произведению'
+        )
+
+        # запись другого процесса: без сигналов и без общего кеша,
+        # меняется только версия тега в базе
+        Genre.objects.bulk_create([Genre(name='Блюз', slug='blues')])
+        caches[API_CACHE].clear()
+        CacheTag.objects.filter(name=GENRES).update(version=F('version') + 1)
+        assert client.get('/api/v1/titles/?genre=blues').status_code == 200, (
+            'Проверьте, что словарь перечитывается при смене версии '
+            'тега в базе'
+        )
@@ -0,0 +1,151 @@
+from io import StringIO
+
+import pytest
+from django.core.cache import caches
+from django.core.management import call_command
+
+from api_yamdb.settings import API_CACHE
+from reviews.models import (Category, Comments, DeletionJob, Genre, Review,
+                            Title, User)
+
+from .common import auth_client, create_comments, create_titles
+
+
+def process_deletions(batch_size=1):
+    stdout = StringIO()
+    call_command('process_deletions', once=True, batch_size=batch_size,
+                 stdout=stdout)
+    return stdout.getvalue()
+
+
+class Test21DeferredDeletionAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_title(self, client, admin_client, admin):
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        title_id = titles[0]['id']
+        response = admin_client.delete(f'/api/v1/titles/{title_id}/')
+        assert response.status_code == 204
+        assert client.get(f'/api/v1/titles/{title_id}/').status_code == 404, (
+            'Проверьте, что удалённое произведение скрывается сразу'
+        )
+        assert client.get('/api/v1/titles/').json()['count'] == 1
+        assert client.get(
+            f'/api/v1/titles/{title_id}/reviews/{reviews[0]["id"]}/comments/'
+        ).status_code == 404
+        assert Review.objects.count() == 3, (
+            'Проверьте, что отзывы произведения удаляются не в запросе, '
+            'а командой `process_deletions`'
+        )
+
+        output = process_deletions()
+        assert not Title._base_manager.filter(pk=title_id).exists()
+        assert not Review.objects.exists() and not Comments.objects.exists()
+        job = DeletionJob.objects.get()
+        assert job.finished_at is not None
+        # 3 комментария, 3 отзыва, 2 связи с жанрами и само произведение
+        assert job.processed == job.total == 9, (
+            'Проверьте, что задание удаления считает обработанные строки'
+        )
+        assert f'{job}: 1/9' in output, (
+            'Проверьте, что `process_deletions` печатает прогресс'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('fast', (False, True))
+    def test_02_genre_and_category(self, client, admin_client, settings,
+                                   fast):
+        settings.FAST_READ_SERIALIZERS = fast
+        titles, categories, genres = create_titles(admin_client)
+        admin_client.delete(f'/api/v1/genres/{genres[0]["slug"]}/')
+        admin_client.delete(f'/api/v1/categories/{categories[0]["slug"]}/')
+        caches[API_CACHE].clear()
+        title = client.get('/api/v1/titles/').json()['results'][0]
+        assert title['genre'] == [
+            {'name': genres[1]['name'], 'slug': genres[1]['slug']}
+        ], 'Проверьте, что удалённый жанр сразу пропадает у произведений'
+        assert title['category'] is None, (
+            'Проверьте, что удалённая категория сразу пропадает у '
+            'произведений'
+        )
+        response = admin_client.post('/api/v1/genres/', data=genres[0])
+        assert response.status_code == 201, (
+            'Проверьте, что slug удалённого жанра можно занять сразу'
+        )
+
+        process_deletions()
+        assert not Genre._base_manager.filter(is_hidden=True).exists()
+        assert not Category._base_manager.filter(is_hidden=True).exists()
+        assert Title.objects.get(pk=titles[0]['id']).category is None
+        assert list(Title.objects.get(pk=titles[0]['id'])
+                    .genre.values_list('slug', flat=True)) == ['comedy']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_user(self, client, admin_client, admin):
+        comments, reviews, titles, user, _ = create_comments(admin_client,
+                                                             admin)
+        user_client = auth_client(user)
+        response = admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert response.status_code == 204
+        assert user_client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что удалённый пользователь сразу теряет доступ'
+        )
+        usernames = [row['username'] for row in
+                     admin_client.get('/api/v1/users/').json()['results']]
+        assert user.username not in usernames
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        assert client.get(title_url).json()['rating'] == 4, (
+            'Проверьте, что отзывы удалённого пользователя сразу '
+            'перестают учитываться в рейтинге'
+        )
+        response = client.get(f'{title_url}reviews/')
+        assert sorted(row['id'] for row in response.json()['results']) == [
+            reviews[0]['id'], reviews[2]['id']
+        ], 'Проверьте, что отзывы удалённого пользователя скрываются сразу'
+        # несуществующий отзыв в адресе комментариев — 400
+        assert client.get(
+            f'{title_url}reviews/{reviews[1]["id"]}/comments/'
+        ).status_code == 400
+        response = client.get(f'{title_url}reviews/{reviews[0]["id"]}/comments/')
+        assert sorted(row['text'] for row in response.json()['results']) == [
+            'qwerty', 'qwerty321'
+        ], (
+            'Проверьте, что комментарии удалённого пользователя скрываются '
+            'сразу'
+        )
+        response = client.post('/api/v1/auth/signup/', data={
+            'username': user.username, 'email': user.email,
+        })
+        assert response.status_code == 200, (
+            'Проверьте, что имя и почта удалённого пользователя '
+            'освобождаются сразу'
+        )
+
+        process_deletions()
+        assert not User.objects.filter(pk=user.pk).exists()
+        assert not Review.objects.filter(author=user.pk).exists()
+        assert not Comments.objects.filter(author=user.pk).exists()
+        assert Comments.objects.count() == 2
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.json()['rating'] == 4
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/stats/')
+        assert response.json()['scores'] == [0, 0, 0, 0, 1, 1, 0, 0, 0, 0, 0]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_recalculate_before_user_deletion(self, admin_client, admin):
+        _, reviews, titles, user, _ = create_comments(admin_client, admin)
+        admin_client.delete(f'/api/v1/users/{user.username}/')
+        counters = ('rating_sum', 'rating_count', 'reviews_count', 'score_3')
+        title = Title.objects.filter(pk=titles[0]['id'])
+        assert title.values_list(*counters).get() == (9, 2, 2, 0)
+
+        call_command('recalculate_ratings', stdout=StringIO())
+        assert title.values_list(*counters).get() == (9, 2, 2, 0), (
+            'Проверьте, что `recalculate_ratings` не учитывает отзывы '
+            'пользователя, ожидающего удаления'
+        )
+        process_deletions()
+        assert title.values_list(*counters).get() == (9, 2, 2, 0), (
+            'Проверьте, что удаление отзывов после пересчёта не вычитает '
+            'их оценки второй раз'
+        )
@@ -0,0 +1,74 @@
+import pytest
+from django.core.cache import caches
+from django.core.management import call_command
+
+from api_yamdb.settings import API_CACHE
+from reviews.models import SCORE_FIELDS, Title
+
+from .common import auth_client, create_reviews
+
+
+class Test22ScoreHistogramAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_stats_follow_reviews(self, client, admin_client, admin):
+        reviews, titles, user, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/stats/'
+        response = client.get(url)
+        assert response.status_code == 200, (
+            'Проверьте, что `/api/v1/titles/{id}/stats/` доступен без '
+            'авторизации'
+        )
+        assert response.json() == {
+            'reviews_count': 3, 'mean': 4.0,
+            'scores': [0, 0, 0, 1, 1, 1, 0, 0, 0, 0, 0],
+        }
+
+        auth_client(user).patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[1]["id"]}/',
+            data={'score': 10}
+        )
+        assert client.get(url).json()['scores'] == [
+            0, 0, 0, 0, 1, 1, 0, 0, 0, 0, 1
+        ], 'Проверьте, что изменение оценки переносит отзыв в её счётчик'
+
+        admin_client.delete(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+        )
+        assert client.get(url).json() == {
+            'reviews_count': 2, 'mean': 7.0,
+            'scores': [0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 1],
+        }, 'Проверьте, что удаление отзыва уменьшает счётчик его оценки'
+        assert client.get('/api/v1/titles/0/stats/').status_code == 404
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_embedded_stats(self, client, admin_client, admin, settings):
+        create_reviews(admin_client, admin)
+        title = client.get('/api/v1/titles/').json()['results'][0]
+        assert 'stats' not in title, (
+            'Проверьте, что распределение оценок в списке выводится только '
+            'по `?stats=true`'
+        )
+        contents = []
+        for fast in (False, True):
+            settings.FAST_READ_SERIALIZERS = fast
+            caches[API_CACHE].clear()
+            contents.append(client.get('/api/v1/titles/?stats=true').content)
+        assert contents[0] == contents[1], (
+            'Проверьте, что быстрый сериализатор списка выводит `stats` '
+            'так же, как TitlesReadSerializer'
+        )
+        title = client.get(f'/api/v1/titles/{title["id"]}/?stats=true').json()
+        assert title['stats']['scores'][5] == 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_rebuild(self, client, admin_client, admin):
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        Title.objects.update(**dict.fromkeys(SCORE_FIELDS, 7))
+        call_command('recalculate_ratings', batch_size=1)
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert [getattr(title, field) for field in SCORE_FIELDS] == [
+            0, 0, 0, 1, 1, 1, 0, 0, 0, 0, 0
+        ], 'Проверьте, что `recalculate_ratings` пересобирает распределение'
+        title = Title.objects.get(pk=titles[1]['id'])
+        assert not any(getattr(title, field) for field in SCORE_FIELDS)
@@ -0,0 +1,127 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.cache import SIMILAR
+from reviews.models import (CacheTag, Review, SimilarityRun, SimilarTitle,
+                            Title, User)
+
+# оценки пользователей (строки) произведениям (столбцы)
+SCORES = (
+    (9, 8, 1, None, None),
+    (8, 9, 2, 5, None),
+    (2, 1, 9, 5, None),
+    (None, 2, 8, 5, 7),
+)
+
+
+def create_scores():
+    titles = [Title.objects.create(name=f'Произведение {index}', year=2000)
+              for index in range(len(SCORES[0]))]
+    for index, row in enumerate(SCORES):
+        user = User.objects.create(username=f'critic{index}',
+                                   email=f'critic{index}@yamdb.fake')
+        for title, score in zip(titles, row):
+            if score is not None:
+                Review.objects.create(author=user, title=title, text='Отзыв',
+                                      score=score)
+    return titles
+
+
+def similar_table():
+    return sorted(SimilarTitle.objects.values_list('title_id', 'neighbor_id',
+                                                   'score'))
+
+
+class Test23SimilarTitlesAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_similar(self, client):
+        titles = create_scores()
+        call_command('build_similar_titles', workers=2)
+        url = f'/api/v1/titles/{titles[0].pk}/similar/'
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == 200, (
+            'Проверьте, что `/api/v1/titles/{id}/similar/` доступен без '
+            'авторизации'
+        )
+        assert [row['id'] for row in response.json()] == [
+            titles[1].pk, titles[3].pk, titles[2].pk
+        ], 'Проверьте, что соседи отсортированы по убыванию сходства'
+        assert response.json()[0] == {
+            'id': titles[1].pk, 'name': titles[1].name, 'year': 2000,
+            'similarity': 0.976594,
+        }
+        # кроме них выполняются только запросы версий тегов кеша
+        queries = [query['sql'] for query in context.captured_queries
+                   if 'reviews_cachetag' not in query['sql']]
+        assert len(queries) == 1, (
+            'Проверьте, что похожие произведения читаются одним запросом'
+        )
+        sql = queries[0]
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        assert ('similar_title_score_idx' in plan
+                and 'TEMP B-TREE' not in plan), (
+            'Проверьте, что соседи читаются по индексу '
+            f'similar_title_score_idx без сортировки: {plan}'
+        )
+        # у последнего произведения один общий оценщик с остальными
+        assert client.get(
+            f'/api/v1/titles/{titles[4].pk}/similar/').json() == []
+        assert client.get('/api/v1/titles/0/similar/').status_code == 404
+
+        assert client.get(url)['X-Cache'] == 'HIT'
+        version = CacheTag.objects.get(name=SIMILAR).version
+        call_command('build_similar_titles', workers=1, metric='pearson')
+        assert CacheTag.objects.get(name=SIMILAR).version > version, (
+            'Проверьте, что `build_similar_titles` меняет версию тега в '
+            'базе, общей для процессов сервера'
+        )
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        assert [row['id'] for row in response.json()] == [titles[1].pk], (
+            'Проверьте, что мера pearson отсчитывает оценки от средней '
+            'оценки произведения'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_incremental_refresh(self):
+        titles = create_scores()
+        call_command('build_similar_titles', workers=1)
+        call_command('build_similar_titles', workers=1)
+        assert SimilarityRun.objects.last().titles == 0, (
+            'Проверьте, что без новых оценок прогон ничего не пересчитывает'
+        )
+
+        user = User.objects.create(username='critic', email='c@yamdb.fake')
+        review = Review.objects.create(author=user, title=titles[4],
+                                       text='Отзыв', score=6)
+        titles[4].update_rating(new_score=6, reviews_delta=1)
+        call_command('build_similar_titles', workers=1)
+        assert SimilarityRun.objects.last().titles == 4, (
+            'Проверьте, что пересчитываются только произведения, '
+            'связанные с изменёнными оценками'
+        )
+
+        Review.objects.create(author=user, title=titles[3], text='Отзыв',
+                              score=5)
+        titles[3].update_rating(new_score=5, reviews_delta=1)
+        call_command('build_similar_titles', workers=1)
+        incremental = similar_table()
+        assert (titles[4].pk, titles[3].pk, 0.705024) in incremental
+        call_command('build_similar_titles', workers=1, full=True)
+        assert incremental == similar_table(), (
+            'Проверьте, что частичный пересчёт совпадает с полным'
+        )
+
+        review.delete()
+        titles[4].update_rating(old_score=6, reviews_delta=-1)
+        call_command('build_similar_titles', workers=1)
+        incremental = similar_table()
+        assert not SimilarTitle.objects.filter(title=titles[4]).exists()
+        call_command('build_similar_titles', workers=1, full=True)
+        assert incremental == similar_table()
@@ -0,0 +1,68 @@
+import csv
+import os
+import re
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+
+from reviews.models import Category, Comments, Genre, Review, Title, User
+
+DATA_DIR = os.path.join(settings.BASE_DIR, 'static', 'data')
+TABLES = {'users.csv': User, 'category.csv': Category, 'genre.csv': Genre,
+          'titles.csv': Title, 'genre_title.csv': Title.genre.through,
+          'review.csv': Review, 'comments.csv': Comments}
+
+
+def csv_rows(filename):
+    with open(os.path.join(DATA_DIR, filename), encoding='utf-8',
+              newline='') as csv_file:
+        return sum(1 for _ in csv.DictReader(csv_file))
+
+
+def import_csv():
+    stdout = StringIO()
+    call_command('import_csv', stdout=stdout)
+    return {
+        filename: (int(rows), int(skipped)) for filename, rows, skipped
+        in re.findall(r'(\S+\.csv): (\d+) строк .*пропущено (\d+)',
+                      stdout.getvalue())
+    }
+
+
+class Test24ImportCSVCommand:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_import_twice(self):
+        expected = {filename: csv_rows(filename) for filename in TABLES}
+        assert import_csv() == {
+            filename: (rows, 0) for filename, rows in expected.items()
+        }, 'Проверьте, что `import_csv` загружает все строки static/data'
+        for filename, model in TABLES.items():
+            assert model._base_manager.count() == expected[filename]
+
+        assert import_csv() == {
+            filename: (0, rows) for filename, rows in expected.items()
+        }, (
+            'Проверьте, что при повторной загрузке `import_csv` не считает '
+            'уже загруженные строки вставленными'
+        )
+        for filename, model in TABLES.items():
+            assert model._base_manager.count() == expected[filename]
+        assert Title.objects.filter(rating_count__gt=0).exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_imported_slugs_visible(self, client):
+        url = '/api/v1/titles/?genre=drama&category=movie'
+        assert client.get(url).status_code == 400
+        assert client.get('/api/v1/genres/').json()['count'] == 0
+
+        import_csv()
+        assert client.get(url).status_code == 200, (
+            'Проверьте, что жанры и категории, загруженные `import_csv`, '
+            'сразу доступны в фильтре произведений'
+        )
+        assert client.get('/api/v1/genres/').json()['count'] == (
+            csv_rows('genre.csv')
+        ), 'Проверьте, что `import_csv` сбрасывает кеш списка жанров'